@@ -0,0 +1,150 @@
+# encoding: utf-8
+
+"""Validate a whole folder of .glyphs files against the JSON schemas.
+
+The files are validated in a process pool and the results are written as
+JSON Lines (one JSON object per file) to a single report file as they come in:
+
+	{"path": "/fonts/A.glyphs", "formatVersion": 3, "status": "OK", "errors": []}
+
+Results are cached by the hash of the file content, the hash of the schemas and
+the version of the validator (`validatorVersion` and the code of the modules in
+`validatorModules`), so files that didn't change since the last run are not
+parsed again. Unexpected errors ("error" results) are not cached, those files
+are validated again on the next run. Each file is validated while it is parsed
+(see streamValidator.py), so the workers never hold a complete font in memory.
+"""
+
+from __future__ import print_function
+
+import hashlib
+import json
+import os
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from glyphsParser import ParseError, formatVersion
+from streamValidator import StreamingValidator
+
+__all__ = ["validateCorpus", "validateFile", "schemaPaths"]
+
+schemaFolder = os.path.dirname(os.path.abspath(__file__))
+schemaPaths = {
+	2: os.path.join(schemaFolder, "Glyphs2FileSchema.json"),
+	3: os.path.join(schemaFolder, "Glyphs3FileSchema.json"),
+}
+
+# bump when the results of the validator change
+validatorVersion = 1
+validatorModules = [os.path.join(schemaFolder, name) for name in ("corpusValidator.py", "streamValidator.py", "schemaCompiler.py", "glyphsParser.py")]
+
+_validators = {}
+
+
+def _hashFile(path):
+	digest = hashlib.sha1()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(1 << 20), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+def _validatorHash():
+	digest = hashlib.sha1(str(validatorVersion).encode("ascii"))
+	for path in [schemaPaths[version] for version in sorted(schemaPaths)] + validatorModules:
+		digest.update(_hashFile(path).encode("ascii"))
+	return digest.hexdigest()
+
+
+def _validator(version):
+	# compiled once per worker process
+	validator = _validators.get(version)
+	if validator is None:
+		validator = StreamingValidator.fromFile(schemaPaths[version])
+		_validators[version] = validator
+	return validator
+
+
+def validateFile(path):
+	"""Validate one file and return the result dict."""
+	result = {"path": path, "formatVersion": None, "status": "OK", "errors": []}
+	try:
+		version = formatVersion(path)
+		result["formatVersion"] = version
+		if version not in schemaPaths:
+			result["status"] = "skipped"
+			return result
+		errors = [{"path": keyPath, "message": message} for keyPath, message in _validator(version).streamErrors(path)]
+		if errors:
+			result["status"] = "invalid"
+			result["errors"] = errors
+	except (ParseError, UnicodeDecodeError) as error:
+		result["status"] = "parseError"
+		result["errors"] = [{"path": "", "message": str(error)}]
+	except Exception:
+		result["status"] = "error"
+		result["errors"] = [{"path": "", "message": traceback.format_exc()}]
+	return result
+
+
+def _loadCache(cachePath):
+	try:
+		with open(cachePath, "r", encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+def _saveCache(cache, cachePath):
+	tempPath = cachePath + ".tmp"
+	with open(tempPath, "w", encoding="utf-8") as f:
+		json.dump(cache, f, ensure_ascii=False)
+	os.replace(tempPath, cachePath)
+
+
+def validateCorpus(folder, reportPath, cachePath=None, skipFiles=(), processes=None, pattern="**/*.glyphs"):
+	"""Validate all files in `folder` and write the results to `reportPath`.
+
+	cachePath: where to keep the results between runs, defaults to `reportPath` + ".cache"
+	skipFiles: full paths of files to leave out
+	processes: number of worker processes, defaults to the number of CPUs
+
+	Returns a dict counting the results per status.
+	"""
+	if cachePath is None:
+		cachePath = reportPath + ".cache"
+	validatorHash = _validatorHash()
+	cache = _loadCache(cachePath)
+	newCache = {}
+	counts = {}
+
+	paths = sorted(str(path) for path in Path(folder).glob(pattern))
+	skipFiles = set(skipFiles)
+	with open(reportPath, "w", encoding="utf-8") as report:
+
+		def addResult(path, result, key):
+			if result["status"] != "error":
+				newCache[key] = result
+			result = dict(result, path=path)
+			report.write(json.dumps(result, ensure_ascii=False) + "\n")
+			counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+		pending = {}
+		for path in paths:
+			if path in skipFiles:
+				continue
+			key = "%s:%s" % (_hashFile(path), validatorHash)
+			if key in cache:
+				addResult(path, cache[key], key)
+			else:
+				pending[path] = key
+		if pending:
+			with ProcessPoolExecutor(max_workers=processes) as executor:
+				futures = dict((executor.submit(validateFile, path), path) for path in pending)
+				for future in as_completed(futures):
+					path = futures[future]
+					addResult(path, future.result(), pending[path])
+	_saveCache(newCache, cachePath)
+	return counts
@@ -0,0 +1,288 @@
+# encoding: utf-8
+
+"""Benchmarks for reading, validating and writing .glyphs files.
+
+A test font of the requested size is built from the glyphs in
+GlyphsFileFormatv3.glyphs: N glyphs with one layer per master, each with
+`paths` paths of K nodes, and kerning between a share of all glyph pairs.
+Each step runs in a fresh process, so the peak memory (RSS) of the process
+can be reported per step:
+
+	python formatBenchmark.py --glyphs 5000 --masters 3 --nodes 40 --kerning 0.01 --output results.json
+	python formatBenchmark.py --glyphs 5000 --compare results.json
+
+The results are written as JSON. With `--compare` the times are compared to an
+earlier result and slower steps are reported.
+"""
+
+from __future__ import print_function
+
+import copy
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from glyphsParser import load, loads
+from glyphsWriter import dump, dumps, writePackage
+from glyphsPackage import GlyphsPackageReader
+from schemaCompiler import SchemaValidator
+from streamValidator import StreamingValidator
+
+__all__ = ["synthesizeFont", "runBenchmarks", "compareResults", "steps"]
+
+resultVersion = 1
+
+sampleFolder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+samplePath = os.path.join(sampleFolder, "GlyphsFileFormatv3.glyphs")
+schemaPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Glyphs3FileSchema.json")
+
+
+def _pathNodes(nodeCount, index, scale):
+	# a closed outline around an ellipse, curve segments where the node count allows it
+	nodes = []
+	types = []
+	while len(types) + 3 <= nodeCount:
+		types.extend(("o", "o", "c"))
+	types.extend("l" * (nodeCount - len(types)))
+	for i, nodeType in enumerate(types):
+		angle = 2 * math.pi * i / nodeCount
+		x = round(250 + (200 + 10 * index) * scale * math.cos(angle))
+		y = round(350 + (300 + 10 * index) * scale * math.sin(angle))
+		nodes.append([x, y, nodeType])
+	return nodes
+
+
+def synthesizeFont(glyphCount=1000, masterCount=2, nodeCount=40, pathCount=2, kerningDensity=0.01, seed=1, sample=samplePath):
+	"""Build a font dict of the given size from the sample file.
+
+	kerningDensity: the share of all glyph pairs that get a kerning value in each master
+	"""
+	random.seed(seed)
+	font = load(sample)
+	templateMaster = font["fontMaster"][0]
+	masters = []
+	for index in range(masterCount):
+		master = copy.deepcopy(templateMaster)
+		master["id"] = "m%03d" % index
+		master["name"] = "Master %d" % index
+		if "axesValues" in master:
+			master["axesValues"] = [100 * index for value in master["axesValues"]]
+		masters.append(master)
+	font["fontMaster"] = masters
+
+	templates = [glyph for glyph in font["glyphs"] if glyph.get("layers")]
+	glyphs = []
+	for index in range(glyphCount):
+		template = templates[index % len(templates)]
+		glyph = dict((key, value) for key, value in template.items() if key not in ("layers", "unicode"))
+		glyph["glyphname"] = "g%05d" % index
+		glyph["unicode"] = 0xE000 + index if index < 0x1900 else None
+		templateLayer = template["layers"][0]
+		layers = []
+		for masterIndex, master in enumerate(masters):
+			layer = dict((key, value) for key, value in templateLayer.items() if key not in ("shapes", "layerId", "associatedMasterId", "name"))
+			layer["layerId"] = master["id"]
+			layer["width"] = 500 + 10 * masterIndex
+			layer["shapes"] = [
+				{"closed": 1, "nodes": _pathNodes(nodeCount, pathIndex, 1 + 0.1 * masterIndex)}
+				for pathIndex in range(pathCount)
+			]
+			layers.append(layer)
+		glyph["layers"] = layers
+		glyphs.append(glyph)
+	font["glyphs"] = glyphs
+
+	pairCount = min(int(kerningDensity * glyphCount * glyphCount), glyphCount * glyphCount)
+	names = [glyph["glyphname"] for glyph in glyphs]
+	pairs = set()
+	while len(pairs) < pairCount:
+		pairs.add((random.choice(names), random.choice(names)))
+	pairs = sorted(pairs)
+	kerning = {}
+	for master in masters:
+		masterKerning = {}
+		for left, right in pairs:
+			masterKerning.setdefault(left, {})[right] = random.randint(-120, 60)
+		kerning[master["id"]] = masterKerning
+	font["kerningLTR"] = kerning
+	return font
+
+
+# the steps run in a fresh process each; they get the path of the test font and return the timed function
+
+def _stepParse(path):
+	return lambda: load(path)
+
+
+def _stepValidate(path):
+	data = load(path)
+	validator = SchemaValidator.fromFile(schemaPath)
+	return lambda: validator.errors(data)
+
+
+def _stepStreamValidate(path):
+	validator = StreamingValidator.fromFile(schemaPath)
+	return lambda: validator.streamErrors(path)
+
+
+def _stepSerialize(path):
+	data = load(path)
+	return lambda: dump(data, io.StringIO())
+
+
+def _stepRoundTrip(path):
+	with open(path, "rb") as f:
+		original = f.read()
+
+	def roundTrip():
+		result = dumps(loads(original)).encode("utf-8")
+		if result != original:
+			raise ValueError("round trip changed the file")
+	return roundTrip
+
+
+def _stepWritePackage(path):
+	data = load(path)
+	packagePath = path + "package"
+
+	def write():
+		shutil.rmtree(packagePath, ignore_errors=True)
+		writePackage(data, packagePath)
+	return write
+
+
+def _stepReadPackage(path):
+	packagePath = path + "package"
+	if not os.path.exists(packagePath):
+		writePackage(load(path), packagePath)
+	return lambda: GlyphsPackageReader(packagePath).font(processes=1)
+
+
+steps = {
+	"parse": _stepParse,
+	"validate": _stepValidate,
+	"streamValidate": _stepStreamValidate,
+	"serialize": _stepSerialize,
+	"roundTrip": _stepRoundTrip,
+	"writePackage": _stepWritePackage,
+	"readPackage": _stepReadPackage,
+}
+
+
+def _peakRSS():
+	try:
+		import resource
+	except ImportError:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# kilobytes on Linux, bytes on macOS
+	return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _runStep(name, path, repeat):
+	baseRSS = _peakRSS()
+	function = steps[name](path)
+	times = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		function()
+		times.append(time.perf_counter() - start)
+	return {"seconds": min(times), "runs": times, "peakRSS": _peakRSS(), "baseRSS": baseRSS}
+
+
+def runBenchmarks(glyphCount=1000, masterCount=2, nodeCount=40, pathCount=2, kerningDensity=0.01, repeat=3, stepNames=None, seed=1):
+	"""Build the test font, run the steps and return the results as dict."""
+	stepNames = list(stepNames or steps)
+	folder = tempfile.mkdtemp(prefix="glyphsBenchmark")
+	try:
+		path = os.path.join(folder, "Benchmark.glyphs")
+		start = time.perf_counter()
+		font = synthesizeFont(glyphCount, masterCount, nodeCount, pathCount, kerningDensity, seed)
+		dump(font, path)
+		buildTime = time.perf_counter() - start
+		del font
+		results = {}
+		context = get_context("spawn")
+		for name in stepNames:
+			# a new process for each step, so that ru_maxrss is the peak of this step only
+			with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+				results[name] = executor.submit(_runStep, name, path, repeat).result()
+			results[name]["megabytesPerSecond"] = os.path.getsize(path) / results[name]["seconds"] / 1e6
+		return {
+			"version": resultVersion,
+			"date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+			"python": platform.python_version(),
+			"platform": platform.platform(),
+			"config": {
+				"glyphs": glyphCount,
+				"masters": masterCount,
+				"nodes": nodeCount,
+				"paths": pathCount,
+				"kerningDensity": kerningDensity,
+				"repeat": repeat,
+				"seed": seed,
+			},
+			"fileSize": os.path.getsize(path),
+			"buildSeconds": buildTime,
+			"results": results,
+		}
+	finally:
+		shutil.rmtree(folder, ignore_errors=True)
+
+
+def compareResults(old, new, tolerance=0.1):
+	"""Return a list of (step, oldSeconds, newSeconds) for steps that got more than `tolerance` slower."""
+	slower = []
+	for name, result in sorted(new["results"].items()):
+		oldResult = old["results"].get(name)
+		if oldResult is None:
+			continue
+		if result["seconds"] > oldResult["seconds"] * (1 + tolerance):
+			slower.append((name, oldResult["seconds"], result["seconds"]))
+	return slower
+
+
+if __name__ == '__main__':
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Benchmark the .glyphs file format tools")
+	parser.add_argument("--glyphs", type=int, default=1000)
+	parser.add_argument("--masters", type=int, default=2)
+	parser.add_argument("--nodes", type=int, default=40, help="nodes per path")
+	parser.add_argument("--paths", type=int, default=2, help="paths per layer")
+	parser.add_argument("--kerning", type=float, default=0.01, help="share of all glyph pairs that are kerned")
+	parser.add_argument("--repeat", type=int, default=3)
+	parser.add_argument("--steps", default=",".join(steps), help="comma separated, from: %s" % ", ".join(steps))
+	parser.add_argument("--output", help="write the results to this JSON file")
+	parser.add_argument("--compare", help="compare with the results in this JSON file")
+	args = parser.parse_args()
+
+	results = runBenchmarks(args.glyphs, args.masters, args.nodes, args.paths, args.kerning, args.repeat, args.steps.split(","))
+	print("%d glyphs, %d masters, %d bytes" % (args.glyphs, args.masters, results["fileSize"]))
+	for name, result in results["results"].items():
+		peak = result["peakRSS"]
+		print("%-16s %8.3f s %8.2f MB/s   peak RSS %s" % (
+			name, result["seconds"], result["megabytesPerSecond"], "%.1f MB" % (peak / 1e6) if peak else "-"))
+	if args.output:
+		with open(args.output, "w", encoding="utf-8") as f:
+			json.dump(results, f, indent=1, sort_keys=True)
+	if args.compare:
+		with open(args.compare, "r", encoding="utf-8") as f:
+			old = json.load(f)
+		if old.get("config") != results["config"]:
+			print("the configuration differs from %s" % args.compare)
+		slower = compareResults(old, results)
+		for name, oldSeconds, newSeconds in slower:
+			print("slower: %s %.3f s > %.3f s" % (name, oldSeconds, newSeconds))
+		if slower:
+			sys.exit(1)
@@ -0,0 +1,157 @@
+# encoding: utf-8
+
+"""Random access to single glyphs in a .glyphs file.
+
+The file is scanned once to find where each glyph is stored. The byte offsets
+are saved in a sidecar file next to it (`Font.glyphs.glyphsindex`) together with
+the size and modification time of the font file. As long as those match, the
+index is reused and reading a glyph only parses the bytes of that glyph:
+
+	reader = GlyphsFileReader("Font.glyphs")
+	glyph = reader.glyph("A")
+"""
+
+from __future__ import print_function
+
+import json
+import os
+
+from glyphsParser import START_DICT, END_DICT, START_LIST, END_LIST, KEY, ParseError, iterEvents, loads
+
+__all__ = ["GlyphsFileReader", "buildIndex", "indexPathForFile"]
+
+indexVersion = 1
+
+
+def indexPathForFile(path):
+	return path + ".glyphsindex"
+
+
+def buildIndex(path):
+	"""Scan the file and return a list of (glyphname, start, end) byte ranges of the glyphs."""
+	entries = []
+	depth = 0
+	inGlyphs = False
+	start = None
+	name = None
+	events = iterEvents(path)
+	for event, value, offset in events:
+		if event is START_DICT or event is START_LIST:
+			depth += 1
+			if inGlyphs and depth == 3:
+				start = offset
+				name = None
+		elif event is END_DICT or event is END_LIST:
+			depth -= 1
+			if inGlyphs:
+				if depth == 2:
+					if name is None:
+						raise ParseError("Glyph without glyphname", start)
+					entries.append((name, start, offset + 1))
+				elif depth == 1:
+					inGlyphs = False
+		elif event is KEY:
+			if depth == 1:
+				inGlyphs = value == "glyphs"
+			elif inGlyphs and depth == 3 and value == "glyphname":
+				event, value, offset = next(events)
+				name = str(value)
+	return entries
+
+
+class GlyphsFileReader(object):
+	"""Read single glyphs from a .glyphs file without parsing the complete file.
+
+	path: the .glyphs file
+	indexPath: where to store the index, defaults to a sidecar file
+	writeIndex: set to False to only keep the index in memory
+	"""
+
+	def __init__(self, path, indexPath=None, writeIndex=True):
+		self.path = os.fspath(path)
+		self.indexPath = indexPath or indexPathForFile(self.path)
+		self.writeIndex = writeIndex
+		self._file = None
+		self._stamp = None
+		self._entries = None
+		self._offsets = None
+		self._loadIndex()
+
+	def __repr__(self):
+		return "<GlyphsFileReader %s (%d glyphs)>" % (self.path, len(self._entries))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def close(self):
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+	def _fileStamp(self):
+		stat = os.stat(self.path)
+		return [stat.st_size, stat.st_mtime_ns]
+
+	def _loadIndex(self):
+		stamp = self._fileStamp()
+		entries = None
+		try:
+			with open(self.indexPath, "r", encoding="utf-8") as f:
+				data = json.load(f)
+			if data.get("version") == indexVersion and [data.get("size"), data.get("mtime")] == stamp:
+				entries = [tuple(entry) for entry in data["glyphs"]]
+		except (OSError, ValueError, KeyError, TypeError):
+			entries = None
+		if entries is None:
+			entries = buildIndex(self.path)
+			if self.writeIndex:
+				data = {
+					"version": indexVersion,
+					"size": stamp[0],
+					"mtime": stamp[1],
+					"glyphs": entries,
+				}
+				try:
+					with open(self.indexPath, "w", encoding="utf-8") as f:
+						json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+				except OSError:
+					pass
+		self.close()
+		self._stamp = stamp
+		self._entries = entries
+		self._offsets = dict((name, (start, end)) for name, start, end in entries)
+
+	def _checkIndex(self):
+		if self._fileStamp() != self._stamp:
+			self._loadIndex()
+
+	def glyphNames(self):
+		"""The glyph names in the order of the file."""
+		self._checkIndex()
+		return [entry[0] for entry in self._entries]
+
+	def __len__(self):
+		return len(self._entries)
+
+	def __contains__(self, name):
+		self._checkIndex()
+		return name in self._offsets
+
+	def __iter__(self):
+		return iter(self.glyphNames())
+
+	def glyphData(self, name):
+		"""The raw bytes of the glyph dict."""
+		self._checkIndex()
+		start, end = self._offsets[name]
+		if self._file is None:
+			self._file = open(self.path, "rb")
+		self._file.seek(start)
+		return self._file.read(end - start)
+
+	def glyph(self, name):
+		"""Parse and return the glyph dict. Raises KeyError if there is no such glyph."""
+		return loads(self.glyphData(name))
@@ -0,0 +1,197 @@
+# encoding: utf-8
+
+"""Reading .glyphspackage bundles.
+
+A package contains the same data as a .glyphs file split into several files
+(see GlyphsFileFormatv3.md):
+
+	Font.glyphspackage/
+		fontinfo.plist   everything but the glyphs
+		order.plist      list of glyph names
+		UIState.plist    display strings and other UI state
+		glyphs/          one .glyph file per glyph, e.g. `A_.glyph`, `S_mily.glyph`
+
+order.plist is read right away, the glyph files are only read when a glyph is
+requested. loadAll() parses all glyph files in a process pool:
+
+	package = GlyphsPackageReader("Font.glyphspackage")
+	glyph = package.glyph("A")
+	glyphs = package.loadAll()
+"""
+
+from __future__ import print_function
+
+import mmap
+import os
+import unicodedata
+
+from concurrent.futures import ProcessPoolExecutor
+
+from glyphsParser import KEY, VALUE, iterEvents, load
+
+__all__ = ["GlyphsPackageReader", "glyphFileName", "readGlyphFile"]
+
+fontInfoFileName = "fontinfo.plist"
+orderFileName = "order.plist"
+uiStateFileName = "UIState.plist"
+glyphsFolderName = "glyphs"
+glyphFileExtension = ".glyph"
+
+# below this number of glyphs, loadAll() doesn't bother to start a process pool
+parallelThreshold = 200
+
+
+def glyphFileName(glyphName):
+	"""Return the file name Glyphs uses for a glyph, e.g. `A_.glyph` for `A`.
+
+	Each uppercase letter is followed by an underscore, so that names that
+	only differ in case don't clash on case insensitive file systems. Like on
+	macOS, the name is stored decomposed (NFD).
+	"""
+	glyphName = unicodedata.normalize("NFC", glyphName)
+	fileName = "".join([char + "_" if char.isupper() else char for char in glyphName])
+	return unicodedata.normalize("NFD", fileName) + glyphFileExtension
+
+
+def readGlyphFile(path):
+	"""Parse a single .glyph file through a memory map."""
+	with open(path, "rb") as f:
+		if os.fstat(f.fileno()).st_size == 0:
+			return load(f)
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+			return load(data)
+
+
+def _readGlyphName(path):
+	# only parse the file until the glyphname key
+	events = iterEvents(path, 4096)
+	try:
+		for event, value, _ in events:
+			if event is KEY and value == "glyphname":
+				event, value, _ = next(events)
+				if event is VALUE:
+					return str(value)
+				return None
+	finally:
+		events.close()
+	return None
+
+
+class GlyphsPackageReader(object):
+
+	def __init__(self, path):
+		self.path = os.fspath(path)
+		if not os.path.isdir(self.path):
+			raise IOError("No .glyphspackage at path: %s" % self.path)
+		self.glyphsPath = os.path.join(self.path, glyphsFolderName)
+		orderPath = os.path.join(self.path, orderFileName)
+		self.glyphOrder = [str(name) for name in load(orderPath)] if os.path.exists(orderPath) else []
+		self._fontInfo = None
+		self._uiState = None
+		self._glyphs = {}
+		self._glyphPaths = None
+
+	def __repr__(self):
+		return "<GlyphsPackageReader %s>" % self.path
+
+	@property
+	def fontInfo(self):
+		"""The content of fontinfo.plist."""
+		if self._fontInfo is None:
+			self._fontInfo = load(os.path.join(self.path, fontInfoFileName))
+		return self._fontInfo
+
+	@property
+	def uiState(self):
+		"""The content of UIState.plist, an empty dict if the file is missing."""
+		if self._uiState is None:
+			uiStatePath = os.path.join(self.path, uiStateFileName)
+			self._uiState = load(uiStatePath) if os.path.exists(uiStatePath) else {}
+		return self._uiState
+
+	def _scanGlyphFiles(self):
+		# map glyph names to files for glyphs whose file name can't be derived from the name
+		glyphPaths = {}
+		for fileName in sorted(os.listdir(self.glyphsPath)):
+			if not fileName.endswith(glyphFileExtension):
+				continue
+			filePath = os.path.join(self.glyphsPath, fileName)
+			name = _readGlyphName(filePath)
+			if name is not None:
+				glyphPaths[name] = filePath
+		self._glyphPaths = glyphPaths
+
+	def glyphPath(self, name):
+		"""The path of the .glyph file for the glyph. Raises KeyError if there is none."""
+		if self._glyphPaths is not None:
+			return self._glyphPaths[name]
+		filePath = os.path.join(self.glyphsPath, glyphFileName(name))
+		if os.path.exists(filePath):
+			return filePath
+		self._scanGlyphFiles()
+		return self._glyphPaths[name]
+
+	def glyphNames(self):
+		"""The glyph names from order.plist, followed by glyphs that are not listed there."""
+		if self._glyphPaths is None:
+			fileNames = set(fileName for fileName in os.listdir(self.glyphsPath) if fileName.endswith(glyphFileExtension))
+			expected = set(glyphFileName(name) for name in self.glyphOrder)
+			if fileNames == expected:
+				return list(self.glyphOrder)
+			self._scanGlyphFiles()
+		names = [name for name in self.glyphOrder if name in self._glyphPaths]
+		ordered = set(names)
+		names.extend(sorted(name for name in self._glyphPaths if name not in ordered))
+		return names
+
+	def __contains__(self, name):
+		try:
+			self.glyphPath(name)
+		except KeyError:
+			return False
+		return True
+
+	def __len__(self):
+		return len(self.glyphNames())
+
+	def __iter__(self):
+		return iter(self.glyphNames())
+
+	def glyph(self, name):
+		"""Parse and return the glyph dict. The result is cached."""
+		glyph = self._glyphs.get(name)
+		if glyph is None:
+			glyph = readGlyphFile(self.glyphPath(name))
+			self._glyphs[name] = glyph
+		return glyph
+
+	def loadAll(self, processes=None):
+		"""Parse all glyphs and return them as a list in font order.
+
+		Glyphs that are not cached yet are read in a process pool with
+		`processes` workers (defaults to the number of CPUs). Pass processes=1
+		to read them in this process.
+		"""
+		names = self.glyphNames()
+		missing = [name for name in names if name not in self._glyphs]
+		if missing:
+			paths = [self.glyphPath(name) for name in missing]
+			if processes == 1 or len(missing) < parallelThreshold:
+				glyphs = map(readGlyphFile, paths)
+				for name, glyph in zip(missing, glyphs):
+					self._glyphs[name] = glyph
+			else:
+				with ProcessPoolExecutor(max_workers=processes) as executor:
+					chunkSize = max(1, len(paths) // ((processes or os.cpu_count() or 1) * 8))
+					for name, glyph in zip(missing, executor.map(readGlyphFile, paths, chunksize=chunkSize)):
+						self._glyphs[name] = glyph
+		return [self._glyphs[name] for name in names]
+
+	def font(self, processes=None):
+		"""Return the complete font as one dict, like it is stored in a .glyphs file."""
+		font = dict(self.fontInfo)
+		font["glyphs"] = self.loadAll(processes)
+		displayStrings = self.uiState.get("displayStrings")
+		if displayStrings:
+			font["DisplayStrings"] = displayStrings
+		return dict((key, font[key]) for key in sorted(font))
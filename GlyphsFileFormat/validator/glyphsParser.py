@@ -0,0 +1,430 @@
+# encoding: utf-8
+
+"""Streaming parser for the property list dialect used in .glyphs files.
+
+The parser reads the raw bytes of a file in chunks, so files of any size can be
+processed in constant memory. It understands the flavour described in
+GlyphsFileFormatv3.md (and the older one in GlyphsFileFormatv2.md):
+
+- tuples like `(10,66,l)` or `(10,608,l,{name = x;})` are returned as lists
+- unquoted numbers become int or float, quoted strings always stay strings
+- newlines and tabs in strings don't need to be escaped
+- `<0a1b>` data is returned as bytes
+
+There are several levels of access:
+
+- iterEvents() yields low level (event, value, offset) tuples, buildValue() and
+  skipValue() build or skip the value that starts at the current event
+- iterKeyPaths() yields (keyPath, value) pairs like ("/glyphs/layers/width", 600)
+- iterItems() and iterGlyphs() yield one complete object (e.g. one glyph) at a time
+- load() and loads() parse everything into nested dicts and lists
+
+All functions take a path or a file object. Open files in binary mode, the
+offsets reported by iterEvents() are byte offsets into the file.
+"""
+
+from __future__ import print_function
+
+import os
+import re
+
+__all__ = [
+	"ParseError",
+	"START_DICT", "END_DICT", "START_LIST", "END_LIST", "KEY", "VALUE",
+	"iterEvents", "iterKeyPaths", "iterItems", "iterGlyphs", "formatVersion", "load", "loads",
+	"buildValue", "skipValue",
+]
+
+START_DICT = "startDict"
+END_DICT = "endDict"
+START_LIST = "startList"
+END_LIST = "endList"
+KEY = "key"
+VALUE = "value"
+
+defaultChunkSize = 1 << 16
+
+# groups: 1 punctuation, 2 quoted string, 3 data, 4 unquoted string or number
+_tokenRE = re.compile(rb'\s*(?:([{}()=;,])|"([^"\\]*(?:\\.[^"\\]*)*)"|<([0-9A-Fa-f\s]*)>|([^\s{}()=;,"<>]+))', re.S)
+_numberRE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?\Z")
+_escapeRE = re.compile(r'\\(?:([0-7]{1,3})|[Uu]([0-9A-Fa-f]{4})|(.))', re.S)
+_escapes = {
+	"n": "\n",
+	"t": "\t",
+	"r": "\r",
+	"a": "\a",
+	"b": "\b",
+	"f": "\f",
+	"v": "\v",
+}
+
+# parser states
+_EXPECT_VALUE = 0
+_EXPECT_KEY = 1
+_EXPECT_EQUALS = 2
+_EXPECT_SEMICOLON = 3
+_EXPECT_ITEM = 4
+_EXPECT_COMMA = 5
+_EXPECT_END = 6
+
+
+class ParseError(ValueError):
+
+	def __init__(self, message, offset=None):
+		if offset is not None:
+			message = "%s (at byte %d)" % (message, offset)
+		ValueError.__init__(self, message)
+		self.offset = offset
+
+
+def _unescapeMatch(match):
+	octal, unicode, char = match.groups()
+	if octal is not None:
+		return chr(int(octal, 8))
+	if unicode is not None:
+		return chr(int(unicode, 16))
+	return _escapes.get(char, char)
+
+
+def _unescape(string):
+	if "\\" not in string:
+		return string
+	return _escapeRE.sub(_unescapeMatch, string)
+
+
+def _convert(string):
+	if string[0] in "0123456789-+." and _numberRE.match(string):
+		if "." in string or "e" in string or "E" in string:
+			return float(string)
+		return int(string)
+	return string
+
+
+def _events(read, chunkSize):
+	buffer = b""
+	base = 0  # file offset of buffer[0]
+	pos = 0
+	eof = False
+	match = _tokenRE.match
+	stack = []  # True for dicts, False for lists
+	state = _EXPECT_VALUE
+	while True:
+		m = match(buffer, pos)
+		if m is None or (not eof and m.end() == len(buffer)):
+			# the token might continue in the next chunk
+			if eof:
+				rest = buffer[pos:]
+				if rest.strip():
+					raise ParseError("Unexpected data", base + pos + len(rest) - len(rest.lstrip()))
+				break
+			chunk = read(max(chunkSize, len(buffer) - pos))
+			if not chunk:
+				eof = True
+			elif not isinstance(chunk, bytes):
+				chunk = chunk.encode("utf-8")
+			base += pos
+			buffer = buffer[pos:] + chunk
+			pos = 0
+			continue
+		pos = m.end()
+		group = m.lastindex
+		offset = base + m.start(group)
+
+		if group == 1:
+			punctuation = m.group(1)
+			if punctuation == b"{":
+				if state != _EXPECT_VALUE and state != _EXPECT_ITEM:
+					raise ParseError("Unexpected '{'", offset)
+				yield START_DICT, None, offset
+				stack.append(True)
+				state = _EXPECT_KEY
+				continue
+			if punctuation == b"(":
+				if state != _EXPECT_VALUE and state != _EXPECT_ITEM:
+					raise ParseError("Unexpected '('", offset)
+				yield START_LIST, None, offset
+				stack.append(False)
+				state = _EXPECT_ITEM
+				continue
+			if punctuation == b"=":
+				if state != _EXPECT_EQUALS:
+					raise ParseError("Unexpected '='", offset)
+				state = _EXPECT_VALUE
+				continue
+			if punctuation == b";":
+				if state != _EXPECT_SEMICOLON:
+					raise ParseError("Unexpected ';'", offset)
+				state = _EXPECT_KEY
+				continue
+			if punctuation == b",":
+				if state != _EXPECT_COMMA:
+					raise ParseError("Unexpected ','", offset)
+				state = _EXPECT_ITEM
+				continue
+			if punctuation == b"}":
+				if state != _EXPECT_KEY:
+					raise ParseError("Unexpected '}'", offset)
+				stack.pop()
+				yield END_DICT, None, offset
+			else:  # ")"
+				if state != _EXPECT_ITEM and state != _EXPECT_COMMA:
+					raise ParseError("Unexpected ')'", offset)
+				stack.pop()
+				yield END_LIST, None, offset
+		else:
+			if group == 2:
+				offset -= 1
+				value = _unescape(m.group(2).decode("utf-8"))
+			elif group == 4:
+				value = m.group(4).decode("utf-8")
+			else:
+				offset -= 1
+				value = bytes.fromhex(m.group(3).decode("ascii"))
+				if state == _EXPECT_KEY:
+					raise ParseError("Data can't be used as key", offset)
+			if state == _EXPECT_KEY:
+				yield KEY, value, offset
+				state = _EXPECT_EQUALS
+				continue
+			if state != _EXPECT_VALUE and state != _EXPECT_ITEM:
+				raise ParseError("Unexpected value %r" % value, offset)
+			if group == 4:
+				value = _convert(value)
+			yield VALUE, value, offset
+
+		# a value was completed
+		if not stack:
+			state = _EXPECT_END
+		elif stack[-1]:
+			state = _EXPECT_SEMICOLON
+		else:
+			state = _EXPECT_COMMA
+	if state != _EXPECT_END:
+		raise ParseError("Unexpected end of file", base + len(buffer))
+
+
+def iterEvents(fp, chunkSize=defaultChunkSize):
+	"""Yield (event, value, offset) for each syntax element in the file.
+
+	event is one of START_DICT, END_DICT, START_LIST, END_LIST, KEY and VALUE.
+	value is the key or the scalar value, otherwise None. offset is the
+	byte offset of the element in the file.
+	"""
+	if isinstance(fp, (str, os.PathLike)):
+		with open(fp, "rb") as f:
+			for event in _events(f.read, chunkSize):
+				yield event
+	else:
+		for event in _events(fp.read, chunkSize):
+			yield event
+
+
+def _fill(container, events):
+	# consume events until `container` (already opened) is closed
+	stack = []
+	current = container
+	isDict = type(current) is dict
+	key = None
+	for event, value, _ in events:
+		if event is KEY:
+			key = value
+		elif event is VALUE:
+			if isDict:
+				current[key] = value
+			else:
+				current.append(value)
+		elif event is START_DICT or event is START_LIST:
+			child = {} if event is START_DICT else []
+			if isDict:
+				current[key] = child
+			else:
+				current.append(child)
+			stack.append(current)
+			current = child
+			isDict = event is START_DICT
+		else:
+			if not stack:
+				return container
+			current = stack.pop()
+			isDict = type(current) is dict
+	raise ParseError("Unexpected end of file")
+
+
+def buildValue(event, value, events):
+	"""Build the complete value that starts with `event` from the remaining `events`."""
+	if event is VALUE:
+		return value
+	if event is START_DICT:
+		return _fill({}, events)
+	if event is START_LIST:
+		return _fill([], events)
+	raise ParseError("Unexpected %s" % event)
+
+
+def _buildList(event, value, events):
+	# build a list whose opening event was already consumed; `event` is its first element
+	if event is END_LIST:
+		return []
+	return _fill([buildValue(event, value, events)], events)
+
+
+def skipValue(events):
+	"""Skip the rest of the dict or list whose start event was just consumed."""
+	depth = 1
+	for event, _, _ in events:
+		if event is START_DICT or event is START_LIST:
+			depth += 1
+		elif event is END_DICT or event is END_LIST:
+			depth -= 1
+			if depth == 0:
+				return
+
+
+def iterKeyPaths(fp, leafKeys=(), ignoreKeys=(), chunkSize=defaultChunkSize):
+	"""Yield (keyPath, value) for all values in the file.
+
+	Key paths are written like `/glyphs/layers/width`. List indexes are not part
+	of the path, so the items of a list of dicts share one key path. Lists that
+	don't contain dicts (e.g. nodes, tuples, DisplayStrings) are yielded as one value.
+
+	The values of keys in `leafKeys` are yielded as complete objects without
+	descending into them, keys in `ignoreKeys` are skipped with all their content.
+	"""
+	events = iterEvents(fp, chunkSize)
+	event, value, _ = next(events)
+	if event is not START_DICT:
+		raise ParseError("The file needs to contain a dictionary")
+	stack = []
+	path = ""
+	childPath = ""
+	isDict = True
+	for event, value, _ in events:
+		if event is KEY:
+			childPath = path + "/" + value
+			if value in ignoreKeys or value in leafKeys:
+				valueEvent, data, _ = next(events)
+				if value in leafKeys:
+					yield childPath, buildValue(valueEvent, data, events)
+				elif valueEvent is not VALUE:
+					skipValue(events)
+			continue
+		if not isDict:
+			childPath = path
+		if event is VALUE:
+			yield childPath, value
+		elif event is START_DICT:
+			stack.append((path, isDict))
+			path = childPath
+			isDict = True
+		elif event is START_LIST:
+			event, value, _ = next(events)
+			if event is START_DICT:
+				stack.append((path, isDict))
+				stack.append((childPath, False))
+				path = childPath
+				isDict = True
+			else:
+				yield childPath, _buildList(event, value, events)
+		else:
+			if not stack:
+				return
+			path, isDict = stack.pop()
+
+
+def _iterItems(events, event, value, keys):
+	if not keys:
+		if event is START_LIST:
+			for event, value, _ in events:
+				if event is END_LIST:
+					return
+				yield buildValue(event, value, events)
+		else:
+			yield buildValue(event, value, events)
+		return
+	if event is START_DICT:
+		for event, value, _ in events:
+			if event is END_DICT:
+				return
+			valueEvent, data, _ = next(events)
+			if value == keys[0]:
+				for item in _iterItems(events, valueEvent, data, keys[1:]):
+					yield item
+			elif valueEvent is not VALUE:
+				skipValue(events)
+	elif event is START_LIST:
+		for event, value, _ in events:
+			if event is END_LIST:
+				return
+			for item in _iterItems(events, event, value, keys):
+				yield item
+
+
+def iterItems(fp, keyPath, chunkSize=defaultChunkSize):
+	"""Yield the objects found at `keyPath` one at a time.
+
+	If the key path points to a list, each item is yielded on its own, so
+	iterItems(path, "/fontMaster") yields one master dict after the other and
+	iterItems(path, "/glyphs/layers") yields all layers of all glyphs.
+	Everything outside of the key path is skipped without building it.
+	"""
+	keys = [key for key in keyPath.split("/") if key]
+	events = iterEvents(fp, chunkSize)
+	event, value, _ = next(events)
+	for item in _iterItems(events, event, value, keys):
+		yield item
+
+
+def iterGlyphs(fp, chunkSize=defaultChunkSize):
+	"""Yield one glyph dict at a time."""
+	return iterItems(fp, "/glyphs", chunkSize)
+
+
+def formatVersion(fp):
+	"""Return the format version of the file (2 or 3) reading only its header."""
+	events = iterEvents(fp, 1024)
+	try:
+		event, value, _ = next(events)
+		if event is not START_DICT:
+			raise ParseError("The file needs to contain a dictionary")
+		for event, value, _ in events:
+			if event is not KEY:
+				continue
+			if value == ".formatVersion":
+				event, value, _ = next(events)
+				return int(value)
+			if value > ".formatVersion":
+				# keys are sorted, so it is missing
+				return 2
+			event, data, _ = next(events)
+			if event is not VALUE:
+				skipValue(events)
+	finally:
+		events.close()
+	return 2
+
+
+def load(fp, chunkSize=defaultChunkSize):
+	"""Parse the complete file into nested dicts and lists."""
+	events = iterEvents(fp, chunkSize)
+	event, value, _ = next(events)
+	result = buildValue(event, value, events)
+	for event in events:
+		pass
+	return result
+
+
+def loads(data):
+	"""Parse a string or bytes object."""
+	if not isinstance(data, bytes):
+		data = data.encode("utf-8")
+	chunks = [data]
+
+	def read(size):
+		return chunks.pop() if chunks else b""
+
+	events = _events(read, len(data))
+	event, value, _ = next(events)
+	result = buildValue(event, value, events)
+	for event in events:
+		pass
+	return result
@@ -0,0 +1,298 @@
+# encoding: utf-8
+
+"""Writer for the version 3 .glyphs format.
+
+The output follows the rules from the Notes section of GlyphsFileFormatv3.md:
+
+- no indentation, each key on its own line
+- lists have one element per line, empty lists and dicts span two lines
+- points, nodes and colors are written as tuples on one line, e.g. `(10,66,l)`
+- numbers are written without quotes, strings that look like numbers with quotes
+- newlines and tabs in strings are not escaped
+
+Dicts are written in the order of their keys, so data read with glyphsParser
+is written back byte for byte. Keys with a value of None are left out.
+
+The output is written straight to the file, there is no intermediate string for
+the whole font:
+
+	writeFont(font, "Font.glyphs")
+	writePackage(font, "Font.glyphspackage")
+
+writePackage() only rewrites the files of a package whose content changed.
+"""
+
+from __future__ import print_function
+
+import hashlib
+import io
+import os
+import re
+
+__all__ = ["dump", "dumps", "writeFont", "writePackage", "splitPackage", "GlyphsPackageWriter"]
+
+# lists stored with these keys are written as tuples
+tupleKeys = frozenset([
+	"color", "crop", "end", "fillColor", "origin", "other1", "other2", "place",
+	"pos", "scale", "slant", "start", "strokeColor", "target", "unicode",
+])
+
+# file paths in these keys may contain a slash without getting quotes
+pathKeys = frozenset(["imagePath"])
+
+_unquotedRE = re.compile(r"[A-Za-z0-9_.]+\Z")
+_unquotedPathRE = re.compile(r"[A-Za-z0-9_.][A-Za-z0-9_./]*\Z")
+# strings that could be read as a number (or look like one) get quotes
+_numberLikeRE = re.compile(r"[-+]?[0-9.]+(?:[eE][-+]?[0-9]+)?\Z")
+
+
+def _quote(string, unquotedRE=_unquotedRE):
+	if unquotedRE.match(string) and not _numberLikeRE.match(string):
+		return string
+	return '"%s"' % string.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _formatNumber(value):
+	if isinstance(value, bool):
+		return "1" if value else "0"
+	if isinstance(value, int):
+		return str(value)
+	if value.is_integer():
+		return str(int(value))
+	string = repr(value)
+	if "e" in string:
+		string = ("%.10f" % value).rstrip("0").rstrip(".")
+	return string
+
+
+def _isNumberList(value):
+	for item in value:
+		if not isinstance(item, (int, float)):
+			return False
+	return True
+
+
+class _Writer(object):
+
+	def __init__(self, write):
+		self.write = write
+
+	def writeValue(self, value, key=None, inList=False):
+		write = self.write
+		if isinstance(value, str):
+			if key in pathKeys:
+				write(_quote(value, _unquotedPathRE))
+			else:
+				write(_quote(value))
+		elif isinstance(value, dict):
+			self.writeDict(value)
+		elif isinstance(value, (list, tuple)):
+			if key in tupleKeys or (inList and value and _isNumberList(value)):
+				self.writeTuple(value)
+			else:
+				self.writeList(value, key)
+		elif isinstance(value, (int, float)):
+			write(_formatNumber(value))
+		elif isinstance(value, (bytes, bytearray)):
+			write("<%s>" % value.hex())
+		else:
+			raise TypeError("Can't write value of type %s" % type(value).__name__)
+
+	def writeDict(self, value):
+		write = self.write
+		write("{\n")
+		for key, item in value.items():
+			if item is None:
+				continue
+			write(_quote(key))
+			write(" = ")
+			self.writeValue(item, key)
+			write(";\n")
+		write("}")
+
+	def writeList(self, value, key=None):
+		write = self.write
+		if not value:
+			write("(\n)")
+			return
+		write("(\n")
+		if key == "nodes":
+			writeItem = self.writeTuple
+		else:
+			writeItem = self.writeListItem
+		first = True
+		for item in value:
+			if first:
+				first = False
+			else:
+				write(",\n")
+			writeItem(item)
+		write("\n)")
+
+	def writeListItem(self, value):
+		self.writeValue(value, inList=True)
+
+	def writeTuple(self, value):
+		write = self.write
+		write("(")
+		first = True
+		for item in value:
+			if first:
+				first = False
+			else:
+				write(",")
+			if isinstance(item, (int, float)):
+				write(_formatNumber(item))
+			else:
+				self.writeValue(item, inList=True)
+		write(")")
+
+
+def dump(obj, fp, newline=True):
+	"""Write `obj` to a text file object or a path."""
+	if isinstance(fp, (str, os.PathLike)):
+		with io.open(fp, "w", encoding="utf-8", newline="", buffering=1 << 16) as f:
+			dump(obj, f, newline)
+		return
+	_Writer(fp.write).writeValue(obj)
+	if newline:
+		fp.write("\n")
+
+
+def dumps(obj, newline=True):
+	"""Return the serialized `obj` as string."""
+	f = io.StringIO()
+	dump(obj, f, newline)
+	return f.getvalue()
+
+
+def writeFont(font, path):
+	"""Write the font dict as a single .glyphs file."""
+	dump(font, path)
+
+
+def splitPackage(font):
+	"""Split the font dict into the parts of a .glyphspackage.
+
+	Returns (fontInfo, order, uiState, glyphs).
+	"""
+	fontInfo = dict((key, value) for key, value in font.items() if key not in ("glyphs", "DisplayStrings"))
+	glyphs = font.get("glyphs") or []
+	order = [glyph["glyphname"] for glyph in glyphs]
+	uiState = {}
+	if font.get("DisplayStrings"):
+		uiState["displayStrings"] = font["DisplayStrings"]
+	return fontInfo, order, uiState, glyphs
+
+
+class GlyphsPackageWriter(object):
+	"""Write a font dict as .glyphspackage, only touching files whose content changed.
+
+	Each file is serialized on its own and its hash is compared with the file
+	on disk. Unchanged files are not written, so saving a package after editing
+	three glyphs only rewrites those three .glyph files (plus order.plist or
+	fontinfo.plist if they changed too). The writer remembers the hashes of the
+	files it has seen, so keeping one writer for repeated saves of the same
+	package avoids reading the files again.
+
+		writer = GlyphsPackageWriter("Font.glyphspackage")
+		changedFiles = writer.write(font)
+	"""
+
+	def __init__(self, path):
+		self.path = os.fspath(path)
+		self._hashes = {}  # file path > (size, mtime, digest)
+
+	def __repr__(self):
+		return "<GlyphsPackageWriter %s>" % self.path
+
+	def _isUnchanged(self, filePath, data, digest):
+		try:
+			stat = os.stat(filePath)
+		except OSError:
+			return False
+		if stat.st_size != len(data):
+			return False
+		known = self._hashes.get(filePath)
+		if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+			return known[2] == digest
+		with open(filePath, "rb") as f:
+			fileDigest = hashlib.sha1(f.read()).digest()
+		self._hashes[filePath] = (stat.st_size, stat.st_mtime_ns, fileDigest)
+		return fileDigest == digest
+
+	def _writeFile(self, filePath, obj, newline=True):
+		data = dumps(obj, newline).encode("utf-8")
+		digest = hashlib.sha1(data).digest()
+		if self._isUnchanged(filePath, data, digest):
+			return False
+		tempPath = filePath + ".tmp"
+		with open(tempPath, "wb") as f:
+			f.write(data)
+		os.replace(tempPath, filePath)
+		stat = os.stat(filePath)
+		self._hashes[filePath] = (stat.st_size, stat.st_mtime_ns, digest)
+		return True
+
+	def write(self, font):
+		"""Write the font and return the list of files that were written or removed."""
+		from glyphsPackage import fontInfoFileName, orderFileName, uiStateFileName, glyphsFolderName, glyphFileName
+
+		fontInfo, order, uiState, glyphs = splitPackage(font)
+		glyphsPath = os.path.join(self.path, glyphsFolderName)
+		if not os.path.isdir(glyphsPath):
+			os.makedirs(glyphsPath)
+		changed = []
+		for fileName, obj, newline in (
+			(fontInfoFileName, fontInfo, True),
+			(orderFileName, order, False),
+			(uiStateFileName, uiState, True),
+		):
+			filePath = os.path.join(self.path, fileName)
+			if self._writeFile(filePath, obj, newline):
+				changed.append(filePath)
+		written = set()
+		for glyph in glyphs:
+			fileName = glyphFileName(glyph["glyphname"])
+			filePath = os.path.join(glyphsPath, fileName)
+			if self._writeFile(filePath, glyph):
+				changed.append(filePath)
+			written.add(fileName)
+		for fileName in sorted(os.listdir(glyphsPath)):
+			if fileName.endswith(".glyph") and fileName not in written:
+				filePath = os.path.join(glyphsPath, fileName)
+				os.remove(filePath)
+				self._hashes.pop(filePath, None)
+				changed.append(filePath)
+		return changed
+
+
+def writePackage(font, path):
+	"""Write the font dict as a .glyphspackage bundle. Unchanged files are not touched.
+
+	Returns the list of files that were written or removed.
+	"""
+	return GlyphsPackageWriter(path).write(font)
+
+
+if __name__ == '__main__':
+	# round trip the sample files and check that the output is identical
+	import glob
+	import time
+	from glyphsParser import load
+
+	folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+	samples = [
+		os.path.join(folder, "GlyphsFileFormatv3.glyphs"),
+		os.path.join(folder, "files", "LinkedFontv3.glyphs"),
+	]
+	samples += sorted(glob.glob(os.path.join(folder, "GlyphsFileFormatv3.glyphspackage", "*.plist")))
+	samples += sorted(glob.glob(os.path.join(folder, "GlyphsFileFormatv3.glyphspackage", "glyphs", "*.glyph")))
+	for path in samples:
+		with io.open(path, "r", encoding="utf-8", newline="") as f:
+			original = f.read()
+		data = load(path)
+		start = time.time()
+		result = dumps(data, newline=original.endswith("\n"))
+		duration = time.time() - start
+		print("%s %s (%.2f ms)" % ("OK  " if result == original else "DIFF", os.path.relpath(path, folder), duration * 1000))
@@ -0,0 +1,354 @@
+# encoding: utf-8
+
+"""Statistics about the key paths used in a folder of .glyphs files.
+
+For each key path (written like `/glyphs/layers/width`, see glyphsParser.iterKeyPaths)
+the statistics count:
+
+- count: how often the key appears
+- files: in how many files it appears
+- types: how often each value type appears (string, integer, float, data, dict, list)
+- leaves: how often the value is not walked into, like the values iterKeyPaths yields
+- bytes: how many bytes of the files the key and its value take up, in total and
+  as histogram of powers of two; the parse time grows with it, so this shows
+  which parts of the format are expensive
+
+The files are read in a process pool and the counters of all files are merged:
+
+	stats = collectCorpus("/fonts")
+	stats.printReport(limit=30)
+	undeclared, unused = stats.compareWithSchema(SchemaValidator.fromFile("Glyphs3FileSchema.json"))
+
+Run the module with a folder to print the report, see `--help`.
+"""
+
+from __future__ import print_function
+
+import json
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from glyphsParser import START_DICT, END_DICT, START_LIST, END_LIST, VALUE, ParseError, formatVersion, iterEvents, skipValue
+
+__all__ = ["KeyPathStats", "collectFile", "collectCorpus", "declaredKeyPaths", "defaultLeafKeys", "defaultIgnoreKeys"]
+
+# the content of these keys are user defined names (glyph names, parameter names), it is counted as one value
+defaultLeafKeys = (
+	"kerningLTR",
+	"kerningRTL",
+	"kerningVertical",
+	"kerningContext",
+	"userData",
+	"instanceInterpolations",
+	"customParameters",
+	"deltaV",
+	"partSelection",
+	"piece",
+)
+
+# written by Glyphs for internal bookkeeping
+defaultIgnoreKeys = (
+	".storedFormatVersion",
+	"changeCount",
+	"bottomName",
+	"topName",
+)
+
+
+def _typeName(value):
+	if isinstance(value, str):
+		return "string"
+	if isinstance(value, int):
+		return "integer"
+	if isinstance(value, float):
+		return "float"
+	return "data"
+
+
+class KeyPathStats(object):
+	"""Counters per key path. Stats of several files are combined with merge()."""
+
+	def __init__(self):
+		self.files = 0
+		self.totalBytes = 0
+		self.keyPaths = {}  # keyPath > {"count", "files", "leaves", "types", "bytes", "maxBytes", "sizes"}
+
+	def __repr__(self):
+		return "<KeyPathStats %d key paths in %d files>" % (len(self.keyPaths), self.files)
+
+	def __len__(self):
+		return len(self.keyPaths)
+
+	def __contains__(self, keyPath):
+		return keyPath in self.keyPaths
+
+	def __getitem__(self, keyPath):
+		return self.keyPaths[keyPath]
+
+	def add(self, keyPath, typeName, size, isLeaf=True):
+		entry = self.keyPaths.get(keyPath)
+		if entry is None:
+			entry = {"count": 0, "files": 1, "leaves": 0, "types": {}, "bytes": 0, "maxBytes": 0, "sizes": {}}
+			self.keyPaths[keyPath] = entry
+		entry["count"] += 1
+		if isLeaf:
+			entry["leaves"] += 1
+		entry["types"][typeName] = entry["types"].get(typeName, 0) + 1
+		entry["bytes"] += size
+		if size > entry["maxBytes"]:
+			entry["maxBytes"] = size
+		# bucket n holds the sizes from 2^(n-1) to 2^n - 1 bytes
+		bucket = size.bit_length()
+		entry["sizes"][bucket] = entry["sizes"].get(bucket, 0) + 1
+
+	def merge(self, other):
+		"""Add the counters of `other` to this one."""
+		self.files += other.files
+		self.totalBytes += other.totalBytes
+		for keyPath, otherEntry in other.keyPaths.items():
+			entry = self.keyPaths.get(keyPath)
+			if entry is None:
+				self.keyPaths[keyPath] = dict(otherEntry, types=dict(otherEntry["types"]), sizes=dict(otherEntry["sizes"]))
+				continue
+			for key in ("count", "files", "leaves", "bytes"):
+				entry[key] += otherEntry[key]
+			entry["maxBytes"] = max(entry["maxBytes"], otherEntry["maxBytes"])
+			for key in ("types", "sizes"):
+				counter = entry[key]
+				for name, count in otherEntry[key].items():
+					counter[name] = counter.get(name, 0) + count
+		return self
+
+	def toDict(self):
+		return {"files": self.files, "totalBytes": self.totalBytes, "keyPaths": self.keyPaths}
+
+	@classmethod
+	def fromDict(cls, data):
+		stats = cls()
+		stats.files = data["files"]
+		stats.totalBytes = data["totalBytes"]
+		stats.keyPaths = json.loads(json.dumps(data["keyPaths"]), object_hook=_intKeys)
+		return stats
+
+	def sortedKeyPaths(self, sortBy="bytes"):
+		"""The key paths sorted by one of the counters, biggest first. sortBy="keyPath" sorts by name."""
+		if sortBy == "keyPath":
+			return sorted(self.keyPaths)
+		return sorted(self.keyPaths, key=lambda keyPath: (-self.keyPaths[keyPath][sortBy], keyPath))
+
+	def leafKeyPaths(self):
+		"""The sorted key paths that have a value somewhere, the paths iterKeyPaths yields (without the
+		paths of dicts and lists of dicts that are only walked into)."""
+		return sorted(keyPath for keyPath, entry in self.keyPaths.items() if entry["leaves"])
+
+	def compareWithSchema(self, validator, leafKeys=defaultLeafKeys, ignoreKeys=defaultIgnoreKeys):
+		"""Return (undeclared, unused): key paths found in the files but not in the schema, and the other way round.
+
+		Keys below objects that allow any key (e.g. userData) count as declared. Pass
+		the leafKeys and ignoreKeys the stats were collected with, the schema paths
+		below them are not reported as unused.
+		"""
+		declared, openKeyPaths = declaredKeyPaths(validator)
+		undeclared = []
+		for keyPath in sorted(self.keyPaths):
+			if keyPath in declared:
+				continue
+			parent = keyPath
+			while parent:
+				parent = parent.rsplit("/", 1)[0]
+				if parent in openKeyPaths:
+					break
+			else:
+				undeclared.append(keyPath)
+		leafKeys = set(leafKeys)
+		ignoreKeys = set(ignoreKeys)
+		unused = []
+		for keyPath in sorted(declared):
+			if keyPath in self.keyPaths:
+				continue
+			keys = keyPath.split("/")[1:]
+			if ignoreKeys.intersection(keys) or leafKeys.intersection(keys[:-1]):
+				continue
+			unused.append(keyPath)
+		return undeclared, unused
+
+	def printReport(self, sortBy="bytes", limit=None):
+		totalBytes = self.totalBytes or 1
+		print("%d files, %d bytes, %d key paths" % (self.files, self.totalBytes, len(self.keyPaths)))
+		print("%-52s %9s %6s %12s %6s  %s" % ("key path", "count", "files", "bytes", "%", "types"))
+		for keyPath in self.sortedKeyPaths(sortBy)[:limit]:
+			entry = self.keyPaths[keyPath]
+			types = ", ".join("%s %d" % item for item in sorted(entry["types"].items(), key=lambda item: -item[1]))
+			print("%-52s %9d %6d %12d %6.2f  %s" % (
+				keyPath, entry["count"], entry["files"], entry["bytes"], 100.0 * entry["bytes"] / totalBytes, types))
+
+
+def _intKeys(obj):
+	# JSON turns the histogram buckets into strings
+	if obj and all(key.isdigit() for key in obj):
+		return dict((int(key), value) for key, value in obj.items())
+	return obj
+
+
+class _FileWalker(object):
+
+	def __init__(self, stats, leafKeys, ignoreKeys):
+		self.stats = stats
+		self.leafKeys = frozenset(leafKeys)
+		self.ignoreKeys = frozenset(ignoreKeys)
+
+	def walkDict(self, events, keyPath):
+		# the START_DICT event is already consumed; each entry spans from its key to the next key
+		add = self.stats.add
+		entryPath = None
+		for event, key, offset in events:
+			if entryPath is not None:
+				add(entryPath, typeName, offset - entryStart, isLeaf)
+				entryPath = None
+			if event is END_DICT:
+				return
+			valueEvent, value, _ = next(events)
+			if key in self.ignoreKeys:
+				if valueEvent is not VALUE:
+					skipValue(events)
+				continue
+			entryPath = keyPath + "/" + key
+			entryStart = offset
+			typeName, isLeaf = self.walkValue(events, valueEvent, value, entryPath, key in self.leafKeys)
+		raise ParseError("Unexpected end of file")
+
+	def walkValue(self, events, event, value, keyPath, isLeaf):
+		# returns the type name and if the value is a leaf (not walked into)
+		if event is VALUE:
+			return _typeName(value), True
+		if event is START_DICT:
+			if isLeaf:
+				skipValue(events)
+			else:
+				self.walkDict(events, keyPath)
+			return "dict", isLeaf
+		if event is not START_LIST:
+			raise ParseError("Unexpected %s" % event)
+		if isLeaf:
+			skipValue(events)
+			return "list", True
+		# like in iterKeyPaths, only lists that start with a dict are walked into
+		event, value, _ = next(events)
+		if event is END_LIST:
+			return "list", True
+		if event is not START_DICT:
+			if event is not VALUE:
+				skipValue(events)
+			skipValue(events)
+			return "list", True
+		self.walkDict(events, keyPath)
+		for event, value, _ in events:
+			if event is END_LIST:
+				return "list", False
+			if event is START_DICT:
+				self.walkDict(events, keyPath)
+			elif event is START_LIST:
+				skipValue(events)
+		raise ParseError("Unexpected end of file")
+
+
+def collectFile(path, leafKeys=defaultLeafKeys, ignoreKeys=defaultIgnoreKeys, formatVersions=None):
+	"""Return the KeyPathStats of one file.
+
+	formatVersions: only count files with one of these format versions, e.g. (3,)
+	"""
+	stats = KeyPathStats()
+	if formatVersions is not None and formatVersion(path) not in formatVersions:
+		return stats
+	events = iterEvents(path)
+	event, value, _ = next(events)
+	if event is not START_DICT:
+		raise ParseError("The file needs to contain a dictionary")
+	_FileWalker(stats, leafKeys, ignoreKeys).walkDict(events, "")
+	stats.files = 1
+	stats.totalBytes = os.path.getsize(path)
+	return stats
+
+
+def collectCorpus(folder, skipFiles=(), processes=None, pattern="**/*.glyphs", formatVersions=(3,),
+		leafKeys=defaultLeafKeys, ignoreKeys=defaultIgnoreKeys):
+	"""Collect the stats of all files in `folder` in a process pool and return the merged KeyPathStats.
+
+	processes: number of worker processes, defaults to the number of CPUs; 1 reads the files in this process
+	"""
+	skipFiles = set(skipFiles)
+	paths = [path for path in sorted(str(path) for path in Path(folder).glob(pattern)) if path not in skipFiles]
+	collect = partial(collectFile, leafKeys=leafKeys, ignoreKeys=ignoreKeys, formatVersions=formatVersions)
+	stats = KeyPathStats()
+	if processes == 1 or len(paths) < 2:
+		for path in paths:
+			stats.merge(collect(path))
+	else:
+		with ProcessPoolExecutor(max_workers=processes) as executor:
+			for fileStats in executor.map(collect, paths):
+				stats.merge(fileStats)
+	return stats
+
+
+def declaredKeyPaths(validator):
+	"""Return (declared, open): the key paths declared in the schema of the SchemaValidator,
+	and the key paths of objects that accept any key.
+	"""
+	declared = set()
+	openKeyPaths = set()
+
+	def walk(schema, keyPath, active):
+		schema = validator.resolve(schema)
+		if not isinstance(schema, dict) or id(schema) in active:
+			return
+		active = active | set([id(schema)])
+		properties = schema.get("properties")
+		if isinstance(properties, dict):
+			for key, subschema in properties.items():
+				childPath = keyPath + "/" + key
+				declared.add(childPath)
+				walk(subschema, childPath, active)
+		if schema.get("patternProperties") or (not properties and schema.get("additionalProperties", True) is not False):
+			openKeyPaths.add(keyPath)
+		items = schema.get("items")
+		for subschema in items if isinstance(items, list) else [items]:
+			walk(subschema, keyPath, active)
+		for keyword in ("allOf", "anyOf", "oneOf"):
+			for subschema in schema.get(keyword, ()):
+				walk(subschema, keyPath, active)
+
+	walk(validator.schema, "", frozenset())
+	return declared, openKeyPaths
+
+
+if __name__ == '__main__':
+	import argparse
+	from schemaCompiler import SchemaValidator
+
+	parser = argparse.ArgumentParser(description="Key path statistics for a folder of .glyphs files")
+	parser.add_argument("folder")
+	parser.add_argument("--sort", default="bytes", choices=["bytes", "count", "files", "maxBytes", "keyPath"])
+	parser.add_argument("--limit", type=int, default=None)
+	parser.add_argument("--formatVersion", type=int, default=3)
+	parser.add_argument("--processes", type=int, default=None)
+	parser.add_argument("--json", help="also write the stats to this JSON file")
+	args = parser.parse_args()
+
+	stats = collectCorpus(args.folder, processes=args.processes, formatVersions=(args.formatVersion,))
+	stats.printReport(args.sort, args.limit)
+	if args.json:
+		with open(args.json, "w", encoding="utf-8") as f:
+			json.dump(stats.toDict(), f, ensure_ascii=False, indent=1, sort_keys=True)
+
+	schemaPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Glyphs%dFileSchema.json" % args.formatVersion)
+	if os.path.exists(schemaPath):
+		undeclared, unused = stats.compareWithSchema(SchemaValidator.fromFile(schemaPath))
+		print("\nnot in the schema (%d):" % len(undeclared))
+		for keyPath in undeclared:
+			print("\t" + keyPath)
+		print("\nin the schema, but not in the files (%d):" % len(unused))
+		for keyPath in unused:
+			print("\t" + keyPath)
@@ -0,0 +1,446 @@
+# encoding: utf-8
+
+"""Compile the JSON schemas into Python checker functions.
+
+jsonschema interprets the schema again for every node of the font. Here the
+schema is turned into nested closures once, each of them doing only the checks
+its part of the schema needs. All errors are collected with the key path of the
+offending value instead of stopping at the first one:
+
+	validator = SchemaValidator.fromFile("Glyphs3FileSchema.json")
+	for keyPath, message in validator.errors(data):
+		print(keyPath, message)
+
+The supported keywords are those of draft 6/7 that describe the structure of
+data: type, enum, const, the number, string, array and object keywords,
+allOf/anyOf/oneOf/not and $ref (JSON pointers and `$id` anchors like `#color`).
+Annotations, unknown keywords and malformed subschemas are ignored.
+"""
+
+from __future__ import print_function
+
+import json
+import re
+
+__all__ = ["SchemaValidator", "SchemaValidationError", "formatKeyPath"]
+
+
+class SchemaValidationError(ValueError):
+
+	def __init__(self, errors):
+		self.errors = errors
+		lines = ["%s: %s" % error for error in errors[:20]]
+		if len(errors) > 20:
+			lines.append("... and %d more errors" % (len(errors) - 20))
+		ValueError.__init__(self, "%d validation errors\n%s" % (len(errors), "\n".join(lines)))
+
+
+def formatKeyPath(path):
+	# paths are nested (parentPath, key) tuples, so that nothing needs to be built for valid values
+	keys = []
+	while path is not None:
+		path, key = path
+		keys.append(str(key))
+	keys.reverse()
+	return "/" + "/".join(keys)
+
+
+def _equal(first, second):
+	# True and 1 are different in JSON
+	if type(first) is bool or type(second) is bool:
+		return type(first) is type(second) and first == second
+	return first == second
+
+
+_pythonTypes = {
+	"string": (str,),
+	"integer": (int,),
+	"number": (int, float),
+	"boolean": (bool,),
+	"array": (list,),
+	"object": (dict,),
+	"null": (type(None),),
+}
+
+
+def _noCheck(value, path, errors):
+	pass
+
+
+class SchemaValidator(object):
+
+	def __init__(self, schema):
+		self.schema = schema
+		self._anchors = {}
+		self._refs = {}
+		self._collectAnchors(schema)
+		self._check = self._compile(schema)
+
+	@classmethod
+	def fromFile(cls, path):
+		with open(path, "r", encoding="utf-8") as f:
+			return cls(json.load(f))
+
+	def __repr__(self):
+		return "<SchemaValidator %s>" % self.schema.get("$id", self.schema.get("title", ""))
+
+	def errors(self, instance, path=None):
+		"""Return a list of (keyPath, message) for all errors in `instance`.
+
+		path: the key path of `instance` if it is part of a bigger document, as
+		nested (parentPath, key) tuples
+		"""
+		errors = []
+		self._check(instance, path, errors)
+		return [(formatKeyPath(errorPath), message) for errorPath, message in errors]
+
+	def isValid(self, instance):
+		errors = []
+		self._check(instance, None, errors)
+		return not errors
+
+	def validate(self, instance):
+		"""Raise SchemaValidationError listing all errors if `instance` is not valid."""
+		errors = self.errors(instance)
+		if errors:
+			raise SchemaValidationError(errors)
+
+	def subschemaValidator(self, pointer):
+		"""Return a validator for the part of the schema at the JSON pointer (e.g. `#/properties/glyphs/items`)."""
+		validator = SchemaValidator.__new__(SchemaValidator)
+		validator.schema = self.schema
+		validator._anchors = self._anchors
+		validator._refs = self._refs
+		validator._check = self._compileRef(pointer)
+		return validator
+
+	def resolve(self, schema):
+		"""Follow `$ref`s until the subschema that does the checking."""
+		while isinstance(schema, dict) and "$ref" in schema:
+			schema = self._resolve(schema["$ref"])
+		return schema
+
+	# compiling
+
+	def _collectAnchors(self, schema):
+		if isinstance(schema, dict):
+			for key in ("$id", "id"):
+				anchor = schema.get(key)
+				if isinstance(anchor, str) and anchor.startswith("#") and anchor not in self._anchors:
+					self._anchors[anchor] = schema
+			for key, value in schema.items():
+				if key not in ("enum", "const", "default", "examples"):
+					self._collectAnchors(value)
+		elif isinstance(schema, list):
+			for value in schema:
+				self._collectAnchors(value)
+
+	def _resolve(self, ref):
+		if not ref.startswith("#"):
+			raise ValueError("Only local references are supported: %s" % ref)
+		fragment = ref[1:].lstrip("/")
+		if not fragment:
+			return self.schema
+		anchor = self._anchors.get("#" + fragment)
+		if anchor is not None:
+			return anchor
+		node = self.schema
+		for part in fragment.split("/"):
+			part = part.replace("~1", "/").replace("~0", "~")
+			if isinstance(node, list):
+				node = node[int(part)]
+			else:
+				node = node[part]
+		return node
+
+	def _compileRef(self, ref):
+		check = self._refs.get(ref)
+		if check is not None:
+			return check
+		cell = []
+
+		def checkRef(value, path, errors):
+			# references are resolved when they are first used, like jsonschema does
+			if not cell:
+				cell.append(self._compile(self._resolve(ref)))
+			cell[0](value, path, errors)
+
+		self._refs[ref] = checkRef
+		return checkRef
+
+	def _compile(self, schema):
+		if schema is True:
+			return _noCheck
+		if schema is False:
+			def checkFalse(value, path, errors):
+				errors.append((path, "False schema does not allow %r" % (value,)))
+			return checkFalse
+		if not isinstance(schema, dict):
+			# broken parts of a schema (e.g. a string in `properties`) don't check anything
+			return _noCheck
+		if "$ref" in schema:
+			return self._compileRef(schema["$ref"])
+		checks = []
+		for compileKeyword in (
+			self._compileType, self._compileEnum, self._compileNumber, self._compileString,
+			self._compileArray, self._compileObject, self._compileCombinators,
+		):
+			check = compileKeyword(schema)
+			if check is not None:
+				checks.append(check)
+		if not checks:
+			return _noCheck
+		if len(checks) == 1:
+			return checks[0]
+		if len(checks) == 2:
+			first, second = checks
+
+			def checkBoth(value, path, errors):
+				first(value, path, errors)
+				second(value, path, errors)
+			return checkBoth
+
+		def checkAll(value, path, errors):
+			for check in checks:
+				check(value, path, errors)
+		return checkAll
+
+	def _compileType(self, schema):
+		types = schema.get("type")
+		if types is None:
+			return None
+		if isinstance(types, str):
+			types = [types]
+		typeNames = ", ".join(repr(name) for name in types)
+		pythonTypes = set()
+		for name in types:
+			pythonTypes.update(_pythonTypes[name])
+		# 1.0 is an integer, too
+		acceptsIntegralFloat = "integer" in types and "number" not in types
+		pythonTypes = frozenset(pythonTypes)
+
+		def checkType(value, path, errors):
+			valueType = type(value)
+			if valueType in pythonTypes:
+				return
+			if acceptsIntegralFloat and valueType is float and value.is_integer():
+				return
+			errors.append((path, "%r is not of type %s" % (value, typeNames)))
+		return checkType
+
+	def _compileEnum(self, schema):
+		checks = []
+		if "enum" in schema:
+			options = schema["enum"]
+
+			def checkEnum(value, path, errors):
+				for option in options:
+					if _equal(value, option):
+						return
+				errors.append((path, "%r is not one of %r" % (value, options)))
+			checks.append(checkEnum)
+		if "const" in schema:
+			constant = schema["const"]
+
+			def checkConst(value, path, errors):
+				if not _equal(value, constant):
+					errors.append((path, "%r was expected" % (constant,)))
+			checks.append(checkConst)
+		return self._combine(checks)
+
+	def _compileNumber(self, schema):
+		limits = []
+		for keyword, message, fails in (
+			("minimum", "less than the minimum of", lambda value, limit: value < limit),
+			("maximum", "greater than the maximum of", lambda value, limit: value > limit),
+			("exclusiveMinimum", "less than or equal to the minimum of", lambda value, limit: value <= limit),
+			("exclusiveMaximum", "greater than or equal to the maximum of", lambda value, limit: value >= limit),
+		):
+			limit = schema.get(keyword)
+			if isinstance(limit, (int, float)) and not isinstance(limit, bool):
+				limits.append((limit, message, fails))
+		multipleOf = schema.get("multipleOf")
+		if not limits and multipleOf is None:
+			return None
+
+		def checkNumber(value, path, errors):
+			if type(value) is not int and type(value) is not float:
+				return
+			for limit, message, fails in limits:
+				if fails(value, limit):
+					errors.append((path, "%r is %s %r" % (value, message, limit)))
+			if multipleOf is not None:
+				quotient = value / multipleOf
+				if quotient != int(quotient):
+					errors.append((path, "%r is not a multiple of %r" % (value, multipleOf)))
+		return checkNumber
+
+	def _compileString(self, schema):
+		minLength = schema.get("minLength")
+		maxLength = schema.get("maxLength")
+		pattern = schema.get("pattern")
+		if minLength is None and maxLength is None and pattern is None:
+			return None
+		search = re.compile(pattern).search if pattern is not None else None
+
+		def checkString(value, path, errors):
+			if type(value) is not str:
+				return
+			if minLength is not None and len(value) < minLength:
+				errors.append((path, "%r is too short" % value))
+			if maxLength is not None and len(value) > maxLength:
+				errors.append((path, "%r is too long" % value))
+			if search is not None and not search(value):
+				errors.append((path, "%r does not match %r" % (value, pattern)))
+		return checkString
+
+	def _compileArray(self, schema):
+		items = schema.get("items")
+		additionalItems = schema.get("additionalItems", True)
+		minItems = schema.get("minItems")
+		maxItems = schema.get("maxItems")
+		uniqueItems = schema.get("uniqueItems", False)
+		contains = schema.get("contains")
+		if items is None and minItems is None and maxItems is None and not uniqueItems and contains is None:
+			return None
+		itemCheck = None
+		tupleChecks = None
+		additionalCheck = None
+		if isinstance(items, list):
+			tupleChecks = [self._compile(item) for item in items]
+			if additionalItems is not True:
+				additionalCheck = self._compile(additionalItems)
+		elif items is not None:
+			itemCheck = self._compile(items)
+			if itemCheck is _noCheck:
+				itemCheck = None
+		containsCheck = self._compile(contains) if contains is not None else None
+
+		def checkArray(value, path, errors):
+			if type(value) is not list:
+				return
+			if itemCheck is not None:
+				for index, item in enumerate(value):
+					itemCheck(item, (path, index), errors)
+			elif tupleChecks is not None:
+				for index, item in enumerate(value):
+					if index < len(tupleChecks):
+						tupleChecks[index](item, (path, index), errors)
+					elif additionalCheck is not None:
+						additionalCheck(item, (path, index), errors)
+			if minItems is not None and len(value) < minItems:
+				errors.append((path, "%r is too short" % (value,)))
+			if maxItems is not None and len(value) > maxItems:
+				errors.append((path, "%r is too long" % (value,)))
+			if uniqueItems:
+				seen = []
+				for item in value:
+					if item in seen:
+						errors.append((path, "%r has non-unique elements" % (value,)))
+						break
+					seen.append(item)
+			if containsCheck is not None:
+				for item in value:
+					itemErrors = []
+					containsCheck(item, path, itemErrors)
+					if not itemErrors:
+						break
+				else:
+					errors.append((path, "%r does not contain items matching the given schema" % (value,)))
+		return checkArray
+
+	def _compileObject(self, schema):
+		properties = schema.get("properties")
+		patternProperties = schema.get("patternProperties")
+		additionalProperties = schema.get("additionalProperties", True)
+		required = schema.get("required")
+		minProperties = schema.get("minProperties")
+		maxProperties = schema.get("maxProperties")
+		if properties is None and patternProperties is None and additionalProperties is True and not required \
+				and minProperties is None and maxProperties is None:
+			return None
+		propertyChecks = dict((key, self._compile(subschema)) for key, subschema in (properties or {}).items())
+		patternChecks = [(re.compile(pattern).search, self._compile(subschema)) for pattern, subschema in (patternProperties or {}).items()]
+		additionalCheck = None
+		forbidAdditional = additionalProperties is False
+		if not forbidAdditional and additionalProperties is not True:
+			additionalCheck = self._compile(additionalProperties)
+		required = list(required or [])
+
+		def checkObject(value, path, errors):
+			if type(value) is not dict:
+				return
+			for key, item in value.items():
+				check = propertyChecks.get(key)
+				matched = check is not None
+				if matched:
+					check(item, (path, key), errors)
+				for search, patternCheck in patternChecks:
+					if search(key):
+						matched = True
+						patternCheck(item, (path, key), errors)
+				if not matched:
+					if forbidAdditional:
+						errors.append((path, "Additional properties are not allowed (%r was unexpected)" % key))
+					elif additionalCheck is not None:
+						additionalCheck(item, (path, key), errors)
+			for key in required:
+				if key not in value:
+					errors.append((path, "%r is a required property" % key))
+			if minProperties is not None and len(value) < minProperties:
+				errors.append((path, "%r does not have enough properties" % (value,)))
+			if maxProperties is not None and len(value) > maxProperties:
+				errors.append((path, "%r has too many properties" % (value,)))
+		return checkObject
+
+	def _compileCombinators(self, schema):
+		checks = []
+		if "allOf" in schema:
+			checks.extend(self._compile(subschema) for subschema in schema["allOf"])
+		if "anyOf" in schema:
+			anyChecks = [self._compile(subschema) for subschema in schema["anyOf"]]
+
+			def checkAnyOf(value, path, errors):
+				for check in anyChecks:
+					subErrors = []
+					check(value, path, subErrors)
+					if not subErrors:
+						return
+				errors.append((path, "%r is not valid under any of the given schemas" % (value,)))
+			checks.append(checkAnyOf)
+		if "oneOf" in schema:
+			oneChecks = [self._compile(subschema) for subschema in schema["oneOf"]]
+
+			def checkOneOf(value, path, errors):
+				matches = 0
+				for check in oneChecks:
+					subErrors = []
+					check(value, path, subErrors)
+					if not subErrors:
+						matches += 1
+				if matches == 0:
+					errors.append((path, "%r is not valid under any of the given schemas" % (value,)))
+				elif matches > 1:
+					errors.append((path, "%r is valid under each of the given schemas" % (value,)))
+			checks.append(checkOneOf)
+		if "not" in schema:
+			notCheck = self._compile(schema["not"])
+
+			def checkNot(value, path, errors):
+				subErrors = []
+				notCheck(value, path, subErrors)
+				if not subErrors:
+					errors.append((path, "%r should not be valid under %r" % (value, schema["not"])))
+			checks.append(checkNot)
+		return self._combine(checks)
+
+	def _combine(self, checks):
+		if not checks:
+			return None
+		if len(checks) == 1:
+			return checks[0]
+
+		def checkAll(value, path, errors):
+			for check in checks:
+				check(value, path, errors)
+		return checkAll
@@ -0,0 +1,182 @@
+# encoding: utf-8
+
+"""Validate a .glyphs file while it is parsed, without loading the whole font.
+
+The validator follows the parser events through the schema. Along the key paths
+in `streamPaths` dicts and lists are not built, their children are checked one
+by one as soon as they are complete and are then thrown away. Everything else
+is built and checked with the compiled schema like SchemaValidator does. With
+the default paths each layer is built on its own, so the memory needed is
+bounded by the biggest layer (or the biggest kerning table of one master), not
+by the size of the font:
+
+	validator = StreamingValidator.fromFile("Glyphs3FileSchema.json")
+	for keyPath, message in validator.streamErrors("Font.glyphs"):
+		print(keyPath, message)
+
+The errors are the same as SchemaValidator.errors() reports for the loaded file.
+Parts of the schema that need the complete value (anyOf, enum, minItems and the
+like) are built and checked as a whole, even if they are on a stream path.
+"""
+
+from __future__ import print_function
+
+import re
+
+from glyphsParser import START_DICT, END_DICT, START_LIST, END_LIST, VALUE, ParseError, buildValue, iterEvents, skipValue, defaultChunkSize
+from schemaCompiler import SchemaValidator, formatKeyPath
+
+__all__ = ["StreamingValidator", "defaultStreamPaths"]
+
+# the values along these key paths are validated piece by piece
+defaultStreamPaths = (
+	"/glyphs/layers",
+	"/fontMaster",
+	"/kerning",
+	"/kerningLTR",
+	"/kerningRTL",
+	"/kerningVertical",
+	"/vertKerning",
+)
+
+# keywords whose checks need the complete value
+_wholeValueKeywords = frozenset([
+	"allOf", "anyOf", "oneOf", "not", "enum", "const",
+	"minProperties", "maxProperties", "minItems", "maxItems", "uniqueItems", "contains",
+])
+
+
+class StreamingValidator(SchemaValidator):
+
+	def __init__(self, schema, streamPaths=defaultStreamPaths):
+		SchemaValidator.__init__(self, schema)
+		self.streamPaths = tuple(streamPaths)
+		# containers at these key paths are streamed, list items only if something below them is
+		self._streamedPaths = set([""])
+		self._parentPaths = set([""])
+		for keyPath in self.streamPaths:
+			keys = [key for key in keyPath.split("/") if key]
+			for index in range(1, len(keys) + 1):
+				self._streamedPaths.add("/" + "/".join(keys[:index]))
+				if index < len(keys):
+					self._parentPaths.add("/" + "/".join(keys[:index]))
+		self._checks = {}
+		self._objectParts = {}
+
+	def __repr__(self):
+		return "<StreamingValidator %s>" % self.schema.get("$id", self.schema.get("title", ""))
+
+	def streamErrors(self, fp, chunkSize=defaultChunkSize):
+		"""Parse the file (a path or a binary file object) and return a list of (keyPath, message)."""
+		errors = []
+		events = iterEvents(fp, chunkSize)
+		event, value, _ = next(events)
+		self._streamValue(event, value, events, self.schema, "", None, False, errors)
+		for event, value, offset in events:
+			raise ParseError("Unexpected %s after the end of the file" % event, offset)
+		return [(formatKeyPath(errorPath), message) for errorPath, message in errors]
+
+	def isStreamValid(self, fp, chunkSize=defaultChunkSize):
+		return not self.streamErrors(fp, chunkSize)
+
+	def _checker(self, schema):
+		# compiled once per subschema, not once per glyph
+		key = id(schema)
+		check = self._checks.get(key)
+		if check is None:
+			check = self._compile(schema)
+			self._checks[key] = check
+		return check
+
+	def _streamableSchema(self, schema, typeName):
+		schema = self.resolve(schema)
+		if not isinstance(schema, dict):
+			return None
+		types = schema.get("type")
+		if types is not None:
+			if isinstance(types, str):
+				types = [types]
+			if typeName not in types:
+				# the type error shows the complete value
+				return None
+		for keyword in _wholeValueKeywords:
+			if keyword in schema:
+				return None
+		return schema
+
+	def _streamValue(self, event, value, events, schema, keyPath, path, isItem, errors):
+		if event is not VALUE:
+			if keyPath in (self._parentPaths if isItem else self._streamedPaths):
+				if event is START_DICT:
+					streamable = self._streamableSchema(schema, "object")
+					if streamable is not None:
+						self._streamDict(events, streamable, keyPath, path, errors)
+						return
+				elif event is START_LIST:
+					streamable = self._streamableSchema(schema, "array")
+					if streamable is not None:
+						self._streamList(events, streamable, keyPath, path, errors)
+						return
+		self._checker(schema)(buildValue(event, value, events), path, errors)
+
+	def _getObjectParts(self, schema):
+		parts = self._objectParts.get(id(schema))
+		if parts is None:
+			additionalProperties = schema.get("additionalProperties", True)
+			parts = (
+				schema.get("properties") or {},
+				[(re.compile(pattern).search, subschema) for pattern, subschema in (schema.get("patternProperties") or {}).items()],
+				additionalProperties,
+				list(schema.get("required") or []),
+			)
+			self._objectParts[id(schema)] = parts
+		return parts
+
+	def _streamDict(self, events, schema, keyPath, path, errors):
+		properties, patterns, additionalProperties, required = self._getObjectParts(schema)
+		seen = set()
+		for event, key, _ in events:
+			if event is END_DICT:
+				break
+			seen.add(key)
+			valueEvent, data, _ = next(events)
+			subschemas = []
+			if key in properties:
+				subschemas.append(properties[key])
+			for search, subschema in patterns:
+				if search(key):
+					subschemas.append(subschema)
+			if not subschemas:
+				if additionalProperties is False:
+					errors.append((path, "Additional properties are not allowed (%r was unexpected)" % key))
+				elif additionalProperties is not True:
+					subschemas.append(additionalProperties)
+			if len(subschemas) == 1:
+				self._streamValue(valueEvent, data, events, subschemas[0], keyPath + "/" + key, (path, key), False, errors)
+			elif subschemas:
+				item = buildValue(valueEvent, data, events)
+				for subschema in subschemas:
+					self._checker(subschema)(item, (path, key), errors)
+			elif valueEvent is not VALUE:
+				skipValue(events)
+		for key in required:
+			if key not in seen:
+				errors.append((path, "%r is a required property" % key))
+
+	def _streamList(self, events, schema, keyPath, path, errors):
+		items = schema.get("items")
+		additionalItems = schema.get("additionalItems", True)
+		index = 0
+		for event, value, _ in events:
+			if event is END_LIST:
+				return
+			if isinstance(items, list):
+				itemSchema = items[index] if index < len(items) else additionalItems
+			else:
+				itemSchema = items
+			if itemSchema is None or itemSchema is True:
+				if event is not VALUE:
+					skipValue(events)
+			else:
+				self._streamValue(event, value, events, itemSchema, keyPath, (path, index), True, errors)
+			index += 1
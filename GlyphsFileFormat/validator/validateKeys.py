@@ -1,5 +1,7 @@
 
 from Find_all_key_paths import keysFromFile
+from keyPathStats import collectFile
+from schemaCompiler import SchemaValidator
 
 allKeys = [
 	"/.appVersion",
@@ -262,3 +264,9 @@ if len(missingKeys) > 0:
 	print("\n%s from %s" % (len(missingKeys), len(allKeys)))
 else:
 	print("\nfound all %s keys" % len(allKeys))
+
+# compare the keys of the sample file with the properties declared in the schema
+stats = collectFile("../GlyphsFileFormatv3.glyphs")
+undeclared, unused = stats.compareWithSchema(SchemaValidator.fromFile("Glyphs3FileSchema.json"))
+print("\nnot in the schema: %s" % (", ".join(undeclared) or "-"))
+print("%s schema key paths not used in the sample file" % len(unused))
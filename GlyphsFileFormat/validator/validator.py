@@ -1,22 +1,18 @@
-import json
-from jsonschema import validate, Draft7Validator
-from glyphsLib.parser import Parser
+from glyphsParser import load
+from schemaCompiler import SchemaValidator
 
-f = open("Glyphs3FileSchema.json",)
-schema = json.load(f)
 
-p = Parser()
-fp = open("../GlyphsFileFormatv3.glyphs", "r", encoding="utf-8")
-data = p.parse(fp.read())
+def printErrors(errors):
+	for keyPath, message in errors:
+		print("%s: %s" % (keyPath, message))
+	print("%d errors" % len(errors))
 
-validate(instance=data, schema=schema)
 
-print("----- validate 2")
-f = open("Glyphs2FileSchema.json",) 
-schema = json.load(f) 
+validator = SchemaValidator.fromFile("Glyphs3FileSchema.json")
+data = load("../GlyphsFileFormatv3.glyphs")
+printErrors(validator.errors(data))
 
-p = Parser()
-fp = open("../GlyphsFileFormatv2.glyphs", "r", encoding="utf-8")
-data = p.parse(fp.read())
-validator = Draft7Validator(schema)
-validator.validate(instance=data)
+print("----- validate 2")
+validator = SchemaValidator.fromFile("Glyphs2FileSchema.json")
+data = load("../GlyphsFileFormatv2.glyphs")
+printErrors(validator.errors(data))
@@ -12,6 +12,9 @@ import traceback
 import copy
 import datetime
 
+from array import array
+from collections import OrderedDict
+
 from Foundation import NSObject, NSString, NSArray, NSMutableArray, NSMutableDictionary, NSDictionary, NSNumber, NSConcreteValue, \
 	NSClassFromString, NSUserDefaults, NSURL, NSNotificationCenter, NSMakePoint, NSNotFound, NSAttributedString, \
 	NSMutableAttributedString, NSLog, NSBundle, NSAffineTransform, NSAffineTransformStruct, NSPoint, NSRect, NSRange, NSUserNotification, \
@@ -135,7 +138,7 @@ __all__ = [
 	"divideCurve", "distance", "addPoints", "subtractPoints", "GetFolder", "GetSaveFile", "GetOpenFile", "Message", "AskString", "PickGlyphs", "LogToConsole", "LogError", "removeOverlap", "subtractPaths", "intersectPaths", "scalePoint",
 
 	# Classes
-	"GSSmartComponentAxis",
+	"GSSmartComponentAxis", "KerningBatch",
 
 	# Menus
 	"APP_MENU", "FILE_MENU", "EDIT_MENU", "GLYPH_MENU", "PATH_MENU", "FILTER_MENU", "VIEW_MENU", "SCRIPT_MENU", "WINDOW_MENU", "HELP_MENU",
@@ -426,8 +429,235 @@ def __GSObject__new__(typ, *args, **kwargs):
 	return typ.alloc().init()
 
 
+class PropertyCache(object):
+	"""Keeps the values of some properties that are expensive to read (see Glyphs.propertyCache).
+
+	Every value is stored with a version of the object it belongs to and is only used again while that
+	version is the same. The versions don't depend on the undo managers: the names in font.glyphs.keys()
+	are versioned with the number of glyphs and a key value observer that counts the changes of the glyphs
+	of the font and of their names (see _KeyValueChangeCounter), Glyphs.fonts with the documents that were
+	opened or closed. changed() marks values as outdated by hand. The entries are keyed by the address of the
+	Objective-C object together with a weak reference to it, so the cache doesn't keep the objects alive and
+	a reused address is noticed. The entries of a font are dropped when its document is closed. Values of
+	fonts that are not open in a document are not cached.
+	"""
+
+	def __init__(self, maxSize=10000):
+		self._enabled = False
+		self._observer = None
+		self.maxSize = maxSize
+		self.hits = 0
+		self.misses = 0
+		# all only ever go up
+		self.changes = 0
+		self.documentChanges = 0
+		self._fontChanges = {}
+		# (name, object address): (weak reference to the object, font address, version, value), the least recently used first
+		self._values = OrderedDict()
+		# (object address, list key): (weak reference to the object, font address, _KeyValueChangeCounter)
+		self._counters = {}
+
+	def __repr__(self):
+		return "<PropertyCache %s, %d values, %d hits, %d misses>" % (
+			"enabled" if self._enabled else "disabled", len(self._values), self.hits, self.misses)
+
+	def _setEnabled(self, enabled):
+		enabled = bool(enabled)
+		if enabled == self._enabled:
+			return
+		# changes are only seen while the cache is enabled
+		self.clear()
+		center = NSNotificationCenter.defaultCenter()
+		if enabled:
+			self._observer = _PropertyCacheObserver.alloc().init()
+			for name in _propertyCacheDocumentNotifications:
+				center.addObserver_selector_name_object_(self._observer, objc.selector(self._observer.documentChanged_, signature=b"v@:@"), name, objc.nil)
+		else:
+			center.removeObserver_(self._observer)
+			self._observer = None
+		self._enabled = enabled
+
+	enabled = property(lambda self: self._enabled, _setEnabled)
+
+	def get(self, name, obj, version, compute, font=None):
+		"""The value `name` of `obj`, from compute() if it isn't cached for the current version. `version` is a
+		function that returns the version of the object, or None if the value should not be cached. The value
+		is dropped when the document of `font` is closed."""
+		if not self._enabled:
+			return compute()
+		version = version()
+		if version is None:
+			return compute()
+		values = self._values
+		key = (name, objc.pyobjc_id(obj)) if obj is not None else (name,)
+		entry = values.pop(key, None)
+		if entry is not None and entry[2] == version and (entry[0] is None or entry[0]() is not None):
+			values[key] = entry
+			self.hits += 1
+			return entry[3]
+		self.misses += 1
+		value = compute()
+		values[key] = (objc.WeakRef(obj) if obj is not None else None, objc.pyobjc_id(font) if font is not None else None, version, value)
+		while len(values) > self.maxSize:
+			values.popitem(last=False)
+		return value
+
+	def fontVersion(self, font):
+		"""The changes marked with changed() for all fonts and for `font`."""
+		return (self.changes, self._fontChanges.get(objc.pyobjc_id(font), 0))
+
+	def changeCounter(self, obj, listKey, itemKeys, font):
+		"""The _KeyValueChangeCounter for `listKey` of `obj` and `itemKeys` of its items. It observes them until
+		the document of `font` is closed or the cache is disabled."""
+		key = (objc.pyobjc_id(obj), listKey)
+		entry = self._counters.get(key)
+		if entry is None or entry[0]() is None:
+			if entry is not None:
+				entry[2].stop()
+			entry = (objc.WeakRef(obj), objc.pyobjc_id(font), _KeyValueChangeCounter.alloc().init().observe(obj, listKey, itemKeys))
+			self._counters[key] = entry
+		return entry[2]
+
+	def changed(self, font=None):
+		"""Marks the cached values of `font` as outdated, of all fonts if it is None."""
+		if font is None:
+			self.changes += 1
+		else:
+			fontId = objc.pyobjc_id(font)
+			self._fontChanges[fontId] = self._fontChanges.get(fontId, 0) + 1
+
+	def documentsChanged(self):
+		"""A document was opened or closed, Glyphs.fonts is read again."""
+		self.documentChanges += 1
+		# the list of fonts is the only value that refers to the objects
+		self._values.pop(("fonts",), None)
+
+	def clearFont(self, font):
+		"""Drops the values of `font` and stops observing it."""
+		fontId = objc.pyobjc_id(font)
+		values = self._values
+		for key in [key for key, entry in values.items() if entry[1] == fontId]:
+			del values[key]
+		for key in [key for key, entry in self._counters.items() if entry[1] == fontId]:
+			self._counters.pop(key)[2].stop()
+		self._fontChanges.pop(fontId, None)
+
+	def clear(self):
+		self._values.clear()
+		for entry in self._counters.values():
+			entry[2].stop()
+		self._counters.clear()
+
+	def resetStatistics(self):
+		self.hits = 0
+		self.misses = 0
+
+	def statistics(self):
+		return {"hits": self.hits, "misses": self.misses, "size": len(self._values), "maxSize": self.maxSize}
+
+
+_propertyCacheDocumentNotifications = (DOCUMENTOPENED, DOCUMENTACTIVATED, DOCUMENTWILLCLOSE, DOCUMENTDIDCLOSE)
+
+
+class _PropertyCacheObserver(NSObject):
+
+	def documentChanged_(self, notification):
+		propertyCache.documentsChanged()
+		document = notification.object()
+		if isinstance(document, GSDocument) and document.font is not None and notification.name() in (DOCUMENTWILLCLOSE, DOCUMENTDIDCLOSE):
+			propertyCache.clearFont(document.font)
+
+
+class _KeyValueChangeCounter(NSObject):
+	# counts the key value observing notifications for `listKey` of an object and for `itemKeys` of the
+	# objects in that list, e.g. the glyphs of a font and their names. Only weak references are kept,
+	# the items are observed again when the list changes.
+
+	@python_method
+	def observe(self, obj, listKey, itemKeys):
+		self.changes = 0
+		self._object = objc.WeakRef(obj)
+		self._listKey = listKey
+		self._itemKeys = itemKeys
+		self._items = []
+		self._itemsChanged = False
+		obj.addObserver_forKeyPath_options_context_(self, listKey, 0, None)
+		self._observeItems(obj)
+		return self
+
+	def observeValueForKeyPath_ofObject_change_context_(self, keyPath, obj, change, context):
+		self.changes += 1
+		if keyPath == self._listKey:
+			self._itemsChanged = True
+
+	@python_method
+	def _observeItems(self, obj):
+		self._stopObservingItems()
+		items = obj.valueForKey_(self._listKey)
+		if not items:
+			return
+		indexes = NSIndexSet.indexSetWithIndexesInRange_(NSRange(0, items.count()))
+		for key in self._itemKeys:
+			items.addObserver_toObjectsAtIndexes_forKeyPath_options_context_(self, indexes, key, 0, None)
+		self._items = [objc.WeakRef(item) for item in items]
+
+	@python_method
+	def _stopObservingItems(self):
+		items = [item for item in (ref() for ref in self._items) if item is not None]
+		self._items = []
+		if not items:
+			return
+		items = NSArray.arrayWithArray_(items)
+		indexes = NSIndexSet.indexSetWithIndexesInRange_(NSRange(0, items.count()))
+		for key in self._itemKeys:
+			items.removeObserver_fromObjectsAtIndexes_forKeyPath_(self, indexes, key)
+
+	@python_method
+	def changeCount(self):
+		# NSObject already has a version method
+		if self._itemsChanged and self._object is not None:
+			self._itemsChanged = False
+			obj = self._object()
+			if obj is not None:
+				self._observeItems(obj)
+		return self.changes
+
+	@python_method
+	def stop(self):
+		if self._object is None:
+			return
+		self._stopObservingItems()
+		obj = self._object()
+		if obj is not None:
+			obj.removeObserver_forKeyPath_(self, self._listKey)
+		self._object = None
+
+
+propertyCache = PropertyCache()
+
+
+def _fontVersion(font):
+	# the changes marked for the font, None if the font isn't open in a document
+	if font is None or font.parent is None:
+		return None
+	return propertyCache.fontVersion(font)
+
+
+def _glyphNamesVersion(font):
+	# the number of glyphs and the changes of the glyphs and their names
+	version = _fontVersion(font)
+	if version is None:
+		return None
+	counter = propertyCache.changeCounter(font, "glyphs", ("name",), font)
+	return version + (font.pyobjc_instanceMethods.glyphs().count(), counter.changeCount())
+
+
 class Proxy(object):
 	_owner = None
+	# removeMany(), clear() and extend() go through the setter of the collection. Collections where
+	# removing or adding an item also changes other objects (like the layers of a removed master) set
+	# this to False and change the items one by one, still as one undo step.
+	_bulkChanges = True
 
 	def __init__(self, owner):
 		self._owner = owner
@@ -463,8 +693,7 @@ class Proxy(object):
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 			return
 		elif isinstance(key, int):
 			idx = self._validate_idx(key)
@@ -500,8 +729,15 @@ class Proxy(object):
 		return key in self.values()
 
 	def clear(self):
-		for i in range(len(self) - 1, -1, -1):
-			self.__delitem__(i)
+		if self._canReplaceAll():
+			self._replaceAll([])
+			return
+		undoManager = self._beginUndo()
+		try:
+			for i in range(len(self) - 1, -1, -1):
+				self.__delitem__(i)
+		finally:
+			self._endUndo(undoManager)
 
 	def __add__(self, value):
 		return list(self).__add__(list(value))
@@ -526,8 +762,91 @@ class Proxy(object):
 		return self
 
 	def extend(self, value):
-		for e in value:
-			self.append(e)
+		undoManager = self._beginUndo()
+		try:
+			for e in value:
+				self.append(e)
+		finally:
+			self._endUndo(undoManager)
+
+	def _canReplaceAll(self):
+		if not self._bulkChanges:
+			return False
+		if type(self).setter is not Proxy.setter:
+			return True
+		try:
+			self.setterMethod()
+		except AttributeError:
+			return False
+		return True
+
+	def _beginUndo(self):
+		undoManager = getattr(self._owner, "undoManager", None)
+		if undoManager is not None:
+			undoManager = undoManager()
+		if undoManager is not None:
+			undoManager.beginUndoGrouping()
+		return undoManager
+
+	def _endUndo(self, undoManager):
+		if undoManager is not None:
+			undoManager.endUndoGrouping()
+		if isinstance(self._owner, GSFont):
+			propertyCache.changed(self._owner)
+
+	def _replaceAll(self, values):
+		# one call to the setter, as one undo step
+		undoManager = self._beginUndo()
+		try:
+			self.setter(values)
+		finally:
+			self._endUndo(undoManager)
+
+	def _extendAll(self, values):
+		# for extend() of collections where append() only adds the item
+		if not self._canReplaceAll():
+			for value in values:
+				self.append(value)
+			return
+		self._replaceAll(list(self) + list(values))
+
+	def replaceAll(self, values):
+		"""Replace all items with one change and one undo step."""
+		self._replaceAll(list(values) if values is not None else [])
+
+	def removeMany(self, items):
+		"""Remove items, given as objects or indexes, with one change and one undo step.
+		Objects that are not in the collection are ignored."""
+		values = list(self)
+		count = len(values)
+		indexes = set()
+		objects = set()
+		strings = set()
+		for item in items:
+			if isinstance(item, int):
+				idx = item + count if item < 0 else item
+				if not 0 <= idx < count:
+					raise IndexError("list index %s out of range %s" % (item, count))
+				indexes.add(idx)
+			elif isString(item):
+				strings.add(item)
+			else:
+				# by identity, the same object always has the same Python proxy
+				objects.add(id(item))
+		for idx, value in enumerate(values):
+			if id(value) in objects or (strings and isString(value) and value in strings):
+				indexes.add(idx)
+		if not indexes:
+			return
+		if self._canReplaceAll():
+			self._replaceAll([value for idx, value in enumerate(values) if idx not in indexes])
+			return
+		undoManager = self._beginUndo()
+		try:
+			for idx in sorted(indexes, reverse=True):
+				self.__delitem__(idx)
+		finally:
+			self._endUndo(undoManager)
 
 	def __eq__(self, other):
 		""" Support comparison to other proxies, NSArrays or lists"""
@@ -757,6 +1076,27 @@ GSApplication.fonts = property(lambda self: AppFontProxy(self))
 			Glyphs.fonts.append(font)
 '''
 
+GSApplication.propertyCache = property(lambda self: propertyCache)
+'''
+	.. attribute:: propertyCache
+		An opt-in cache for properties that are read often: :attr:`fonts <GSApplication.fonts>` and the names in ``font.glyphs.keys()``.
+
+		A value is only used again while the object it belongs to didn't change. ``Glyphs.fonts`` is computed again when a document is opened, activated or closed (the order follows the last used font). The glyph names are computed again when the number of glyphs changes or when a key value observer sees a change of the glyphs of the font or of a glyph name, also for changes that are not undoable. ``changed(font)`` (or ``changed()`` for all fonts) marks the values as outdated by hand. Properties like :attr:`layer.bounds <GSLayer.bounds>` and :attr:`master.blueValues <GSFontMaster.blueValues>` are not cached, checking if they changed costs as much as reading them. The cache doesn't keep the objects alive, and the values of a font are dropped when its document is closed. Fonts without a document are not cached. The least recently used values are dropped when there are more than ``maxSize``.
+
+		:type: PropertyCache
+
+		.. code-block:: python
+			cache = Glyphs.propertyCache
+			cache.enabled = True
+			cache.maxSize = 50000
+			# ... a script that reads the same values many times
+			print(cache.statistics())  # {'hits': ..., 'misses': ..., 'size': ..., 'maxSize': ...}
+			cache.clear()
+			cache.enabled = False
+
+		.. versionadded:: 3.2
+'''
+
 GSApplication.reporters = property(lambda self: GSCallbackHandler.reporterInstances().allValues())
 '''
 	.. attribute:: reporters
@@ -1322,6 +1662,7 @@ NSURL.__new__ = staticmethod(__NSURL__new__)
 def __GSApp_OpenFont__(self, Path, showInterface=True):
 	URL = NSURL.fileURLWithPath_(Path)
 	Doc = self.openDocumentWithContentsOfURL_display_(URL, showInterface)
+	propertyCache.documentsChanged()
 	if Doc is not None:
 		return Doc.font
 	return None
@@ -1845,14 +2186,15 @@ class AppFontProxy(Proxy):
 		return self.values().__getitem__(key)
 
 	def values(self):
-		fonts = []
-		for doc in self._owner.fontDocuments():
-			fonts.append(doc.font)
-		return fonts
+		return list(propertyCache.get("fonts", None, lambda: propertyCache.documentChanges, self._fonts))
+
+	def _fonts(self):
+		return [doc.font for doc in self._owner.fontDocuments()]
 
 	def append(self, font):
 		doc = Glyphs.documentController().openUntitledDocumentAndDisplay_error_(True, None)[0]
 		doc.setFont_(font)
+		propertyCache.documentsChanged()
 
 
 '''
@@ -1908,6 +2250,9 @@ class FontGlyphsProxy(Proxy):
 		for glyph in Font.glyphs:
 		    ...
 	"""
+	# removeGlyph_ does the bookkeeping for a removed glyph (like its kerning and the
+	# glyph order) that setGlyphs_ doesn't
+	_bulkChanges = False
 
 	def __getitem__(self, key):
 		if isinstance(key, slice):
@@ -1918,11 +2263,14 @@ class FontGlyphsProxy(Proxy):
 			return self._owner.glyphAtIndex_(idx)
 		if isString(key):
 			# by glyph name
-			if self._owner.glyphForName_(key):
-				return self._owner.glyphForName_(key)
+			glyph = self._owner.glyphForName_(key)
+			if glyph is not None:
+				return glyph
 			# by string representation as 'ä'
-			elif len(key) == 1 and self._owner.glyphForCharacter_(ord(key)):
-				return self._owner.glyphForCharacter_(ord(key))
+			if len(key) == 1:
+				glyph = self._owner.glyphForCharacter_(ord(key))
+				if glyph is not None:
+					return glyph
 			# by unicode
 			return self._owner.glyphForUnicode_(key.upper())
 		raise TypeError("key for glyphs must be int or str, not %s" % type(key).__name__)
@@ -1934,6 +2282,7 @@ class FontGlyphsProxy(Proxy):
 			idx = self._validate_idx(key)
 			self._owner.removeGlyph_(self._owner.glyphAtIndex_(idx))
 			self._owner.addGlyph_(glyph)
+			propertyCache.changed(self._owner)
 		elif isString(key):
 			self._owner.removeGlyph_(self._owner.glyphForName_(key))
 
@@ -1946,13 +2295,13 @@ class FontGlyphsProxy(Proxy):
 			if glyph.name != key:
 				glyph.name = key
 			self._owner.addGlyph_(glyph)
+			propertyCache.changed(self._owner)
 		else:
 			raise TypeError("key for glyphs must be int or str, not %s" % type(key).__name__)
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 			return
 		elif isinstance(key, int):
 			idx = self._validate_idx(key)
@@ -1961,6 +2310,7 @@ class FontGlyphsProxy(Proxy):
 			self._owner.removeGlyph_(self._owner.glyphForName_(key))
 		else:
 			raise TypeError("key for glyphs must be int or str, not %s" % type(key).__name__)
+		propertyCache.changed(self._owner)
 
 	def __contains__(self, item):
 		if isString(item):
@@ -1968,7 +2318,9 @@ class FontGlyphsProxy(Proxy):
 		return self._owner.indexOfGlyph_(item) < NSNotFound  # indexOfGlyph_ returns NSNotFound which is some very big number
 
 	def keys(self):
-		return self._owner.pyobjc_instanceMethods.glyphs().valueForKey_("name")
+		font = self._owner
+		return propertyCache.get("glyphNames", font, lambda: _glyphNamesVersion(font),
+			lambda: font.pyobjc_instanceMethods.glyphs().valueForKey_("name"), font)
 
 	def values(self):
 		return self._owner.pyobjc_instanceMethods.glyphs()
@@ -1983,16 +2335,38 @@ class FontGlyphsProxy(Proxy):
 			raise TypeError("Cannot add %s, not a Glyph" % Glyph)
 		if Glyph.name not in self:
 			self._owner.addGlyph_(Glyph)
+			propertyCache.changed(self._owner)
 		else:
 			raise NameError('There is a glyph with the name \"%s\" already in the font.' % Glyph.name)
 
 	def extend(self, objects):
+		objects = list(objects)
+		# all names of the font with one call instead of one lookup per glyph
+		names = set(self.keys())
 		for glyph in objects:
 			if not isinstance(glyph, GSGlyph):
 				raise TypeError("Cannot add %s, not a Glyph" % glyph)
-			if glyph.name in self:
-				raise NameError('There is a glyph with the name \"%s\" already in the font.' % glyph.name)
-		self._owner.addGlyphsFromArray_(list(objects))
+			name = glyph.name
+			if name in names:
+				raise NameError('There is a glyph with the name \"%s\" already in the font.' % name)
+			names.add(name)
+		self._owner.addGlyphsFromArray_(objects)
+		propertyCache.changed(self._owner)
+
+	def removeMany(self, items):
+		"""Remove glyphs, given as glyphs, names or indexes, one by one as one undo step."""
+		resolved = []
+		missing = []
+		for item in items:
+			if isString(item):
+				glyph = self._owner.glyphForName_(item)
+				if glyph is None:
+					missing.append(item)
+				item = glyph
+			resolved.append(item)
+		if missing:
+			raise KeyError("Glyphs with name: %s not found" % ", ".join(missing))
+		Proxy.removeMany(self, resolved)
 
 	def __len__(self):
 		return self._owner.count()
@@ -2002,6 +2376,8 @@ class FontGlyphsProxy(Proxy):
 
 
 class FontFontMasterProxy(Proxy):
+	# removing a master also removes its layers
+	_bulkChanges = False
 
 	def __getitem__(self, key):
 		if isinstance(key, slice):
@@ -2028,8 +2404,7 @@ class FontFontMasterProxy(Proxy):
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 			return
 		elif isinstance(key, int):
 			idx = self._validate_idx(key)
@@ -2100,8 +2475,7 @@ class FontInstancesProxy(Proxy):
 		self._owner.addInstance_(instance)
 
 	def extend(self, instances):
-		for instance in instances:
-			self._owner.addInstance_(instance)
+		self._extendAll(instances)
 
 	def remove(self, instance):
 		self._owner.removeInstance_(instance)
@@ -2124,6 +2498,8 @@ class FontInstancesProxy(Proxy):
 
 
 class FontAxesProxy(Proxy):
+	# adding or removing an axis also changes the masters and instances
+	_bulkChanges = False
 
 	def __getitem__(self, idx):
 		if isinstance(idx, slice):
@@ -2279,6 +2655,8 @@ class ExternalAxesProxy(Proxy):
 
 
 class FontStemsProxy(Proxy):
+	# the stems of the masters follow the font stems
+	_bulkChanges = False
 
 	def _stemForKey(self, key):
 		stem = None
@@ -2321,8 +2699,7 @@ class FontStemsProxy(Proxy):
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 		else:
 			stem = self._stemForKey(key)
 			self._owner.removeObjectFromStems_(stem)
@@ -2390,6 +2767,8 @@ class MasterStemsProxy(Proxy):
 
 
 class FontNumbersProxy(Proxy):
+	# the numbers of the masters follow the font numbers
+	_bulkChanges = False
 
 	def _numberForKey(self, key):
 		number = None
@@ -2432,8 +2811,7 @@ class FontNumbersProxy(Proxy):
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 		else:
 			number = self._numberForKey(key)
 			self._owner.removeObjectFromNumbers_(number)
@@ -2523,8 +2901,7 @@ class CustomParametersProxy(Proxy):
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 		elif isinstance(key, int):
 			idx = self._validate_idx(key)
 			self._owner.removeObjectFromCustomParametersAtIndex_(idx)
@@ -2546,8 +2923,7 @@ class CustomParametersProxy(Proxy):
 		self._owner.addCustomParameter_(parameter)
 
 	def extend(self, parameters):
-		for parameter in parameters:
-			self._owner.addCustomParameter_(parameter)
+		self._extendAll(parameters)
 
 	def remove(self, parameter):
 		self._owner.removeObjectFromCustomParametersForKey_(parameter.name)
@@ -2588,8 +2964,7 @@ class FontClassesProxy(Proxy):
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 		elif isinstance(key, int):
 			idx = self._validate_idx(key)
 			return self._owner.removeObjectFromClassesAtIndex_(idx)
@@ -2608,8 +2983,7 @@ class FontClassesProxy(Proxy):
 		self._owner.addClass_(Class)
 
 	def extend(self, Classes):
-		for Class in Classes:
-			self._owner.addClass_(Class)
+		self._extendAll(Classes)
 
 	def remove(self, Class):
 		self._owner.removeClass_(Class)
@@ -2646,8 +3020,7 @@ class FontFeaturesProxy(Proxy):
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 		elif isinstance(key, int):
 			idx = self._validate_idx(key)
 			return self._owner.removeObjectFromFeaturesAtIndex_(idx)
@@ -2666,8 +3039,7 @@ class FontFeaturesProxy(Proxy):
 		self._owner.addFeature_(feature)
 
 	def extend(self, features):
-		for feature in features:
-			self._owner.addFeature_(feature)
+		self._extendAll(features)
 
 	def remove(self, Class):
 		self._owner.removeFeature_(Class)
@@ -2719,8 +3091,7 @@ class FontFeaturePrefixesProxy(Proxy):
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 		elif isinstance(key, int):
 			idx = self._validate_idx(key)
 			return self._owner.removeObjectFromFeaturePrefixesAtIndex_(idx)
@@ -2735,8 +3106,7 @@ class FontFeaturePrefixesProxy(Proxy):
 		self._owner.addFeaturePrefix_(featurePrefix)
 
 	def extend(self, FeaturePrefixes):
-		for featurePrefix in FeaturePrefixes:
-			self._owner.addFeaturePrefix_(featurePrefix)
+		self._extendAll(FeaturePrefixes)
 
 	def remove(self, featurePrefix):
 		self._owner.removeFeaturePrefix_(featurePrefix)
@@ -3026,11 +3396,69 @@ class SmartComponentValuesProxy(Proxy):
 		return self._owner.pieceSettings().items()
 
 
+# objc.pyobjc_id(glyph): (weak reference to the glyph, version, weak references to the layers that are not master
+# layers). Only weak references are kept, so the index doesn't keep glyphs or removed layers alive, and the
+# reference to the glyph tells if the address was reused by another glyph.
+_layerOrders = OrderedDict()
+_layerOrdersMaxSize = 1000
+
+
+def _layerOrderVersion(glyph):
+	# cheap checks for changes of the layers: the number of layers and masters and the last change of the glyph
+	lastChange = glyph.pyobjc_instanceMethods.lastChange()
+	return (glyph.countOfLayers(), glyph.parent.countOfFontMasters(), lastChange.timeIntervalSinceReferenceDate() if lastChange is not None else None)
+
+
+def _layerOrder(glyph):
+	# (number of masters, weak references to the other layers in the order of the glyph). Built once per glyph
+	# and checked with _layerOrderVersion() on every access, so glyph.layers[i] is O(1) per step
+	key = objc.pyobjc_id(glyph)
+	version = _layerOrderVersion(glyph)
+	entry = _layerOrders.pop(key, None)
+	if entry is None or entry[1] != version or entry[0]() is None:
+		extraLayers = []
+		for idx in range(version[0]):
+			layer = glyph.objectInLayersAtIndex_(idx)
+			if not layer.isMasterLayer:
+				extraLayers.append(objc.WeakRef(layer))
+		entry = (objc.WeakRef(glyph), version, extraLayers)
+	_layerOrders[key] = entry
+	while len(_layerOrders) > _layerOrdersMaxSize:
+		_layerOrders.popitem(last=False)
+	return version[1], entry[2]
+
+
+def _layersChanged(glyph):
+	if glyph is not None:
+		_layerOrders.pop(objc.pyobjc_id(glyph), None)
+
+
+def _extraLayer(glyph, idx):
+	# the idx-th layer that isn't a master layer
+	layer = _layerOrder(glyph)[1][idx]()
+	if layer is None:
+		# replaced without a change of the version
+		_layersChanged(glyph)
+		extraLayers = _layerOrder(glyph)[1]
+		layer = extraLayers[idx]() if idx < len(extraLayers) else None
+	return layer
+
+
+def _orderedLayers(glyph):
+	# master layers in the order of the masters, followed by all other layers
+	font = glyph.parent
+	masterCount, extraLayers = _layerOrder(glyph)
+	layers = [glyph.layerForId_(font.fontMasterAtIndex_(idx).id) for idx in range(masterCount)]
+	layers.extend(_extraLayer(glyph, idx) for idx in range(len(extraLayers)))
+	return layers
+
+
 class LayersIterator:
 
 	def __init__(self, owner):
 		self.curInd = 0
 		self._owner = owner
+		self._layers = _orderedLayers(owner) if owner.parent else None
 
 	def __iter__(self):
 		return self
@@ -3039,22 +3467,10 @@ class LayersIterator:
 		return self.__next__()
 
 	def __next__(self):
-		if self._owner.parent:
-			if self.curInd < self._owner.parent.countOfFontMasters():
-				FontMaster = self._owner.parent.fontMasterAtIndex_(self.curInd)
-				Item = self._owner.layerForId_(FontMaster.id)
-			else:
-				if self.curInd >= self._owner.countOfLayers():
-					raise StopIteration
-				ExtraLayerIndex = self.curInd - self._owner.parent.countOfFontMasters()
-				idx = 0
-				ExtraLayer = None
-				while ExtraLayerIndex >= 0:
-					ExtraLayer = self._owner.objectInLayersAtIndex_(idx)
-					if not ExtraLayer.isMasterLayer:
-						ExtraLayerIndex -= 1
-					idx += 1
-				Item = ExtraLayer
+		if self._layers is not None:
+			if self.curInd >= len(self._layers):
+				raise StopIteration
+			Item = self._layers[self.curInd]
 			self.curInd += 1
 			return Item
 		else:
@@ -3067,30 +3483,24 @@ class LayersIterator:
 
 
 class GlyphLayerProxy(Proxy):
+	# the master layers are read by the index of the master, the other layers from the layer order
+	# of the glyph (see _layerOrder()), so len() and indexes count the same layers
 
 	def __getitem__(self, key):
 		if isinstance(key, slice):
 			return self.values().__getitem__(key)
 		elif isinstance(key, int):
 			if self._owner.parent:
-				count = max(self._owner.countOfLayers(), self._owner.parent.countOfFontMasters())
+				masterCount, extraLayers = _layerOrder(self._owner)
+				count = masterCount + len(extraLayers)
 				if key < 0:
 					key += count
-				if key >= count:
+				if not 0 <= key < count:
 					raise IndexError("list index %s out of range %s" % (key, count))
-				if key < self._owner.parent.countOfFontMasters():
+				if key < masterCount:
 					FontMaster = self._owner.parent.fontMasterAtIndex_(key)
 					return self._owner.layerForId_(FontMaster.id)
-				else:
-					ExtraLayerIndex = key - len(self._owner.parent.masters)
-					idx = 0
-					ExtraLayer = None
-					while ExtraLayerIndex >= 0:
-						ExtraLayer = self._owner.objectInLayersAtIndex_(idx)
-						if not ExtraLayer.isMasterLayer:
-							ExtraLayerIndex -= 1
-						idx += 1
-					return ExtraLayer
+				return _extraLayer(self._owner, key - masterCount)
 			else:
 				key = self._validate_idx(key)
 				return self._owner.objectInLayersAtIndex_(key)
@@ -3109,12 +3519,12 @@ class GlyphLayerProxy(Proxy):
 			key = FontMaster.id
 		if not isString(key):
 			raise TypeError("keys must be integers or strings, not %s" % type(key).__name__)
+		_layersChanged(self._owner)
 		return self._owner.setLayer_forId_(Layer, key)
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 			return
 		elif isinstance(key, int) and self._owner.parent:
 			idx = self._validate_idx(key)
@@ -3122,12 +3532,16 @@ class GlyphLayerProxy(Proxy):
 			key = Layer.layerId
 		elif not isString(key):
 			raise TypeError("keys must be integers or strings, not %s" % type(key).__name__)
+		_layersChanged(self._owner)
 		return self._owner.removeLayerForId_(key)
 
 	def __iter__(self):
 		return LayersIterator(self._owner)
 
 	def __len__(self):
+		if self._owner.parent:
+			masterCount, extraLayers = _layerOrder(self._owner)
+			return masterCount + len(extraLayers)
 		return self._owner.countOfLayers()
 
 	def values(self):
@@ -3136,9 +3550,11 @@ class GlyphLayerProxy(Proxy):
 	def append(self, Layer):
 		if not Layer.associatedMasterId:
 			Layer.associatedMasterId = self._owner.parent.masters[0].id
+		_layersChanged(self._owner)
 		self._owner.setLayer_forId_(Layer, NSString.UUID())
 
 	def remove(self, Layer):
+		_layersChanged(self._owner)
 		return self._owner.removeLayerForId_(Layer.layerId)
 
 	def insert(self, idx, Layer):
@@ -3156,10 +3572,13 @@ class GlyphLayerProxy(Proxy):
 				newLayers[key] = layer
 		else:
 			raise TypeError
+		_layersChanged(self._owner)
 		self._owner.setLayers_(newLayers)
 
 
 class GlyphSmartComponentAxesProxy(Proxy):
+	# the layers keep values for the axes
+	_bulkChanges = False
 
 	def __getitem__(self, key):
 		if isinstance(key, slice):
@@ -3188,8 +3607,7 @@ class GlyphSmartComponentAxesProxy(Proxy):
 
 	def __delitem__(self, key):
 		if isinstance(key, slice):
-			for i in sorted(range(*key.indices(self.__len__())), reverse=True):
-				self.__delitem__(i)
+			self.removeMany(range(*key.indices(self.__len__())))
 		elif isinstance(key, int):
 			key = self._validate_idx(key)
 		elif isString(key):
@@ -3252,8 +3670,10 @@ class GlyphsTagsProxy(Proxy):
 		self._owner.addTag_(tag)
 
 	def extend(self, tags):
+		tags = list(tags)
 		for tag in tags:
-			self._owner.addTag_(tag)
+			self._validate_value(tag)
+		self._extendAll(tags)
 
 	def insert(self, idx, tag):
 		idx = self._validate_idx(idx, offset=1)
@@ -3304,8 +3724,7 @@ class LayerGuidesProxy(Proxy):
 		self._owner.addGuide_(Guide)
 
 	def extend(self, Guides):
-		for Guide in Guides:
-			self._owner.addGuide_(Guide)
+		self._extendAll(Guides)
 
 	def insert(self, idx, guide):
 		idx = self._validate_idx(idx, offset=1)
@@ -3342,8 +3761,7 @@ class LayerAnnotationProxy(Proxy):
 		self._owner.addAnnotation_(Annotation)
 
 	def extend(self, Annotations):
-		for Annotation in Annotations:
-			self._owner.addAnnotation_(Annotation)
+		self._extendAll(Annotations)
 
 	def insert(self, idx, Annotation):
 		annotations = self.values()
@@ -3381,8 +3799,7 @@ class LayerHintsProxy(Proxy):
 		self._owner.addHint_(hint)
 
 	def extend(self, hints):
-		for hint in hints:
-			self._owner.addHint_(hint)
+		self._extendAll(hints)
 
 	def insert(self, idx, hint):
 		idx = self._validate_idx(idx, offset=1)
@@ -3511,13 +3928,14 @@ class LayerShapesProxy(Proxy):
 
 	def extend(self, Shapes):
 		if isinstance(Shapes, type(self)):
-			for path in Shapes.values():
-				self._owner.addShape_(path)
+			Shapes = list(Shapes.values())
 		elif isinstance(Shapes, (list, tuple, NSArray)):
 			for Shape in Shapes:
-				self.append(Shape)
+				if not isinstance(Shape, GSShape):
+					raise TypeError("only GSShape objects are accepted, not %s" % type(Shape).__name__)
 		else:
 			raise TypeError
+		self._extendAll(Shapes)
 
 	def remove(self, Shape):
 		self._owner.removeShape_(Shape)
@@ -3739,8 +4157,7 @@ class GradientColorsProxy(Proxy):
 		self._owner.addColor_(color)
 
 	def extend(self, colors):
-		for color in colors:
-			self._owner.addAxis_(color)
+		self._extendAll(colors)
 
 	def remove(self, color):
 		self._owner.removeObjectFromColors_(color)
@@ -3925,6 +4342,8 @@ Also, the :class:`glyphs <GSGlyph>` are attached to the Font object right here,
 		kerningForPair()
 		setKerningForPair()
 		removeKerningForPair()
+		kerningBatch()
+		snapshot()
 		newTab()
 		updateFeatures()
 		compileFeatures()
@@ -5086,6 +5505,8 @@ def __GSFont__close__(self, ignoreChanges=True):
 	if self.parent:
 		if ignoreChanges:
 			self.parent.close()
+			propertyCache.documentsChanged()
+			propertyCache.clearFont(self)
 		else:
 			self.parent.canCloseDocumentWithDelegate_shouldCloseSelector_contextInfo_(None, None, None)
 
@@ -5257,6 +5678,277 @@ GSFont.removeKerningForPair = python_method(removeKerningForPair)
 '''
 
 
+class KerningBatch(object):
+	'''
+	.. class:: KerningBatch(font, fontMasterId [, direction=GSLTR])
+
+		Collects kerning changes for one master of a font and applies them together, see :meth:`GSFont.kerningBatch()`. Set pairs with `batch[leftKey, rightKey] = value` and remove them with `del batch[leftKey, rightKey]`.
+
+		The keys are glyph names or kerning group keys (@MMK_X_XX). Like in :meth:`GSFont.setKerningForPair()`, a key that is not a glyph name is looked up with `font.glyphs[key]`, so characters and unicodes work too. A key that is not a non empty string raises a KeyError right away, a glyph that isn't found raises a KeyError in apply() before anything is changed.
+
+		Functions
+
+		.. autosummary::
+
+			update()
+			apply()
+
+	.. function:: update(pairs)
+
+		Adds many changes at once.
+
+		:param pairs: a dict of {(leftKey, rightKey): value} or {leftKey: {rightKey: value}}. A value of None removes the pair.
+
+	.. function:: apply()
+
+		Applies the collected changes as one undo step and empties the batch. Called at the end of the `with` block.
+	'''
+
+	def __init__(self, font, FontMasterID, direction=GSLTR):
+		self.font = font
+		self.masterId = FontMasterID
+		self.direction = direction
+		# (leftKey, rightKey): value, None to remove the pair
+		self._changes = {}
+
+	def __repr__(self):
+		return "<KerningBatch %s %d changes>" % (self.masterId, len(self._changes))
+
+	def __len__(self):
+		return len(self._changes)
+
+	@staticmethod
+	def _pair(leftKey, rightKey):
+		for key in (leftKey, rightKey):
+			if not (isString(key) and key):
+				raise KeyError("Invalid kerning key: %r" % (key,))
+		return (leftKey, rightKey)
+
+	def __setitem__(self, pair, value):
+		leftKey, rightKey = pair
+		self._changes[self._pair(leftKey, rightKey)] = value
+
+	def __delitem__(self, pair):
+		leftKey, rightKey = pair
+		self._changes[self._pair(leftKey, rightKey)] = None
+
+	def update(self, pairs):
+		changes = {}
+		for key, value in pairs.items():
+			if isinstance(value, dict):
+				for rightKey, rightValue in value.items():
+					changes[self._pair(key, rightKey)] = rightValue
+			else:
+				leftKey, rightKey = key
+				changes[self._pair(leftKey, rightKey)] = value
+		# all or nothing, an invalid key doesn't leave half of the pairs in the batch
+		self._changes.update(changes)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exceptionType, exceptionValue, traceback):
+		if exceptionType is None:
+			self.apply()
+		else:
+			self._changes = {}
+		return False
+
+	def apply(self):
+		changes = self._changes
+		self._changes = {}
+		if not changes:
+			return
+		font = self.font
+		# resolve all glyph names at once, like snapshot() does
+		glyphs = font.pyobjc_instanceMethods.glyphs()
+		glyphIds = dict(zip(glyphs.valueForKey_("name"), glyphs.valueForKey_("id")))
+		missing = set()
+		for pair in changes:
+			for key in pair:
+				if key[0] != '@' and key not in glyphIds:
+					# characters and unicodes, like setKerningForPair()
+					glyph = font.glyphs[key]
+					if glyph is not None:
+						glyphIds[key] = glyph.id
+					else:
+						missing.add(key)
+		if missing:
+			raise KeyError("Glyphs with name: %s not found" % ", ".join(sorted(missing)))
+		undoManager = font.parent.undoManager() if font.parent else None
+		font.disableUpdateInterface()
+		if undoManager is not None:
+			undoManager.beginUndoGrouping()
+		try:
+			for (leftKey, rightKey), value in changes.items():
+				if leftKey[0] != '@':
+					leftKey = glyphIds[leftKey]
+				if rightKey[0] != '@':
+					rightKey = glyphIds[rightKey]
+				if value is None:
+					font.removeKerningForFontMasterID_leftKey_rightKey_direction_(self.masterId, leftKey, rightKey, self.direction)
+				else:
+					font.setKerningForFontMasterID_leftKey_rightKey_value_direction_(self.masterId, leftKey, rightKey, value, self.direction)
+		finally:
+			if undoManager is not None:
+				undoManager.endUndoGrouping()
+			font.enableUpdateInterface()
+
+
+def __GSFont_kerningBatch__(self, FontMasterID, direction=GSLTR):
+	return KerningBatch(self, FontMasterID, direction)
+
+
+GSFont.kerningBatch = python_method(__GSFont_kerningBatch__)
+'''
+	.. function:: kerningBatch(fontMasterId [, direction=GSLTR])
+
+		Collects many kerning changes for one master and applies them together when the `with` block ends. The glyph names are resolved at once, the interface is not updated while the changes are applied and they are undone as one step. If the block raises an exception, nothing is changed. The keys are resolved like in :meth:`setKerningForPair()`, see :class:`KerningBatch`.
+
+		:param fontMasterId: The id of the FontMaster
+		:type fontMasterId: str
+		:param direction: optional writing direction (see Constants). Default is GSLTR.
+		:type direction: int
+		:return: A KerningBatch object
+		:rtype: KerningBatch
+
+		.. code-block:: python
+			with font.kerningBatch(font.selectedFontMaster.id) as batch:
+			    batch['T', 'o'] = -40
+			    batch['@MMK_L_T', '@MMK_R_A'] = -75
+			    # a dict of {(leftKey, rightKey): value} or {leftKey: {rightKey: value}}
+			    batch.update(generatedPairs)
+			    # remove a pair
+			    del batch['T', 'a']
+
+		.. versionadded:: 3.2
+'''
+
+
+def _snapshotColor(value):
+	if value is None or value > 20 or value < 0:
+		return None
+	return value
+
+
+# field: (key for valueForKey_, conversion of the values or None)
+_snapshotGlyphFields = {
+	"name": ("name", None),
+	"unicode": ("unicode", None),
+	"string": ("charString", None),
+	"id": ("id", str),
+	"productionName": ("production", None),
+	"category": ("category", None),
+	"subCategory": ("subCategory", None),
+	"case": ("case", None),
+	"script": ("script", None),
+	"leftKerningGroup": ("leftKerningGroup", None),
+	"rightKerningGroup": ("rightKerningGroup", None),
+	"topKerningGroup": ("topKerningGroup", None),
+	"bottomKerningGroup": ("bottomKerningGroup", None),
+	"leftMetricsKey": ("leftMetricsKey", None),
+	"rightMetricsKey": ("rightMetricsKey", None),
+	"widthMetricsKey": ("widthMetricsKey", None),
+	"export": ("export", bool),
+	"locked": ("locked", bool),
+	"color": ("colorIndex", _snapshotColor),
+	"note": ("note", None),
+	"mastersCompatible": ("mastersCompatible", bool),
+}
+
+_snapshotLayerFields = ("width", "LSB", "RSB", "TSB", "BSB", "vertWidth", "vertOrigin")
+
+
+def _snapshotValues(objects, key, conversion):
+	values = []
+	null = NSNull.null()
+	for value in objects.valueForKey_(key):
+		if value is null:
+			values.append(None)
+		elif conversion is not None:
+			values.append(conversion(value))
+		else:
+			values.append(value)
+	return values
+
+
+def _snapshotMasterId(font, master):
+	if master is None:
+		if not font.countOfFontMasters():
+			raise ValueError("the font has no masters")
+		return font.fontMasterAtIndex_(0).id
+	if isString(master):
+		if font.fontMasterForId_(master) is not None:
+			return master
+		for idx in range(font.countOfFontMasters()):
+			fontMaster = font.fontMasterAtIndex_(idx)
+			if fontMaster.name == master:
+				return fontMaster.id
+		raise KeyError("no master with id or name: %s" % master)
+	return master.id
+
+
+def __GSFont_snapshot__(self, fields, master=None, records=False):
+	fields = list(fields)
+	unknown = [field for field in fields if field not in _snapshotGlyphFields and field not in _snapshotLayerFields]
+	if unknown:
+		raise KeyError("unknown snapshot fields: %s" % ", ".join(unknown))
+	if records:
+		import numpy
+	glyphs = self.pyobjc_instanceMethods.glyphs()
+	columns = {}
+	for field in fields:
+		if field in _snapshotGlyphFields:
+			key, conversion = _snapshotGlyphFields[field]
+			columns[field] = _snapshotValues(glyphs, key, conversion)
+	layerFields = [field for field in fields if field in _snapshotLayerFields]
+	if layerFields:
+		masterId = _snapshotMasterId(self, master)
+		# one call per glyph to find the layers, then one call per field for all of them
+		layers = [glyph.layerForId_(masterId) for glyph in glyphs]
+		existing = NSArray.arrayWithArray_([layer for layer in layers if layer is not None])
+		nan = float("nan")
+		for field in layerFields:
+			values = iter(_snapshotValues(existing, field, float))
+			column = array("d")
+			for layer in layers:
+				value = next(values) if layer is not None else None
+				column.append(nan if value is None else value)
+			columns[field] = column
+	if records:
+		return numpy.rec.fromarrays(
+			[numpy.asarray(columns[field], dtype=float if field in _snapshotLayerFields else object) for field in fields],
+			names=fields)
+	return dict((field, columns[field]) for field in fields)
+
+
+GSFont.snapshot = python_method(__GSFont_snapshot__)
+'''
+	.. function:: snapshot(fields [, master=None, records=False])
+
+		Reads attributes of all glyphs at once. Each field is read for all glyphs with a single call into the app, which is much faster than reading the properties glyph by glyph.
+
+		Glyph fields: name, unicode, string, id, productionName, category, subCategory, case, script, leftKerningGroup, rightKerningGroup, topKerningGroup, bottomKerningGroup, leftMetricsKey, rightMetricsKey, widthMetricsKey, export, locked, color, note, mastersCompatible
+
+		Layer fields, read from the layer of the master: width, LSB, RSB, TSB, BSB, vertWidth, vertOrigin
+
+		:param fields: a list of field names
+		:type fields: list
+		:param master: a GSFontMaster, or the id or name of a master. Default is the first master.
+		:param records: return a NumPy record array with one row per glyph
+		:type records: bool
+		:return: A dict of {field: column}, in the order of the glyphs. Layer fields are array('d') with NaN for glyphs without a layer for the master, all other fields are lists.
+		:rtype: dict
+
+		.. code-block:: python
+			columns = font.snapshot(["name", "category", "width", "LSB", "RSB"])
+			for name, width in zip(columns["name"], columns["width"]):
+			    print(name, width)
+
+		.. versionadded:: 3.2
+'''
+
+
 def __GSFont__addTab__(self, tabText=""):
 	if self.parent:
 		if isString(tabText):
@@ -7779,6 +8471,8 @@ def GSGlyph_setName(self, name):
 		pass
 	elif (self.parent and name not in self.parent.glyphs) or not self.parent:
 		self.setName_changeName_update_validate_(name, False, True, True)
+		if self.parent:
+			propertyCache.changed(self.parent)
 	else:
 		raise NameError('The glyph name \"%s\" already exists in the font.' % name)
 
@@ -8631,8 +9325,15 @@ GSLayer.master = property(lambda self: self.associatedFontMaster())
 		:type: GSFontMaster
 '''
 
+
+def __GSLayer_setAssociatedMasterId__(self, value):
+	self.setAssociatedMasterId_(value)
+	# may turn a master layer into another layer and back
+	_layersChanged(self.parent)
+
+
 GSLayer.associatedMasterId = property(lambda self: self.pyobjc_instanceMethods.associatedMasterId(),
-									  lambda self, value: self.setAssociatedMasterId_(value))
+									  lambda self, value: __GSLayer_setAssociatedMasterId__(self, value))
 '''
 	.. attribute:: associatedMasterId
 		The ID of the :class:`fontMaster <GSFontMaster>` this layer belongs to, in case this isn't a master layer. Every layer that isn't a master layer needs to be attached to one master layer.
@@ -8649,8 +9350,14 @@ GSLayer.associatedMasterId = property(lambda self: self.pyobjc_instanceMethods.a
 		:type: str
 '''
 
+
+def __GSLayer_setLayerId__(self, value):
+	self.setLayerId_(value)
+	_layersChanged(self.parent)
+
+
 GSLayer.layerId = property(lambda self: self.pyobjc_instanceMethods.layerId(),
-						   lambda self, value: self.setLayerId_(value))
+						   lambda self, value: __GSLayer_setLayerId__(self, value))
 '''
 	.. attribute:: layerId
 		The unique layer ID is used to access the layer in the :class:`glyphs <GSGlyph>` layer dictionary.
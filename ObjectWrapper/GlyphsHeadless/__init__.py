@@ -0,0 +1,37 @@
+# encoding: utf-8
+
+"""A pure Python version of the GlyphsApp object model that runs without Glyphs.
+
+	from GlyphsHeadless import GSFont
+	font = GSFont("Font.glyphs")
+	print(font.glyphs["A"].layers[font.masters[0].id].shapes[0].nodes)
+
+The file format tools in GlyphsFileFormat/validator are used to read and write
+the files; they are found relative to this folder.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+
+_validatorFolder = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "GlyphsFileFormat", "validator")
+if _validatorFolder not in sys.path:
+	sys.path.append(_validatorFolder)
+
+from .constants import *  # noqa: E402,F401,F403
+from .constants import __all__ as _constants  # noqa: E402
+from .objects import *  # noqa: E402,F401,F403
+from .objects import __all__ as _objects  # noqa: E402
+from .interpolation import *  # noqa: E402,F401,F403
+from .interpolation import __all__ as _interpolation  # noqa: E402
+from .kerning import *  # noqa: E402,F401,F403
+from .kerning import __all__ as _kerning  # noqa: E402
+from .geometry import *  # noqa: E402,F401,F403
+from .geometry import __all__ as _geometry  # noqa: E402
+from .pathOperations import *  # noqa: E402,F401,F403
+from .pathOperations import __all__ as _pathOperations  # noqa: E402
+from .cleanup import *  # noqa: E402,F401,F403
+from .cleanup import __all__ as _cleanup  # noqa: E402
+
+__all__ = _constants + _objects + _interpolation + _kerning + _geometry + _pathOperations + _cleanup
@@ -0,0 +1,441 @@
+# encoding: utf-8
+
+"""Outline cleanup for whole fonts: nodes at extremes, collinear nodes and path direction.
+
+GSPath.addNodesAtExtremes(), GSLayer.addNodesAtExtremes() and
+GSLayer.correctPathDirection() are added to the objects, and cleanUpFont()
+does all of it for every layer of a font:
+
+	result = cleanUpFont(font)
+	print(result["nodesAdded"], result["nodesRemoved"], result["pathsReversed"])
+	result = cleanUpFont(font, processes=None)  # in a process pool, one CPU per worker
+
+The extremes of all curves are computed in one call of geometry.curveExtrema()
+(with NumPy in one vectorized pass). With `processes` the glyphs are split into
+chunks that are cleaned up in worker processes; the results are the same.
+
+Layers are cleaned up independently of each other. With keepCompatible (the
+default) the changes of a glyph are undone if its layers were compatible before
+and are not anymore, and its name is reported in "incompatibleGlyphs".
+"""
+
+from __future__ import print_function
+
+import math
+import os
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from .constants import CURVE, LINE, OFFCURVE
+from .objects import GSLayer, GSPath, GSShape, _bytesForTypes, _flattenSegment, _segmentsFromPoints, _smoothFlag, _typeMask
+from .geometry import curveExtrema, _blossomPoint
+
+__all__ = ["cleanUpFont", "addNodesAtExtremes", "removeCollinearNodes", "correctPathDirection"]
+
+# an extremum closer than this to a node (or to another extremum) is not added unless `force` is set
+minimumSegmentLength = 1.0
+# a node that is less than this away from the line between its neighbours is collinear
+collinearTolerance = 0.01
+# below this number of glyphs the work is not worth starting worker processes
+parallelThreshold = 200
+
+_curveByte = _bytesForTypes[CURVE]
+_lineByte = _bytesForTypes[LINE]
+_offCurveByte = _bytesForTypes[OFFCURVE]
+
+
+##################################################################################
+#
+#
+#
+#           EXTREMES
+#
+#
+#
+##################################################################################
+
+
+def _cubicSegments(path):
+	# (indexes of the start, both handles and the end node) of the cubic segments of the path
+	types = path._types
+	count = len(types)
+	segments = []
+	for index in range(count):
+		if types[index] & _typeMask != _curveByte:
+			continue
+		if index < 3 and not path.closed:
+			continue
+		indexes = [(index - offset) % count for offset in (3, 2, 1)]
+		if types[indexes[0]] & _typeMask == _offCurveByte or any(types[handle] & _typeMask != _offCurveByte for handle in indexes[1:]):
+			continue
+		segments.append((indexes[0], indexes[1], indexes[2], index))
+	return segments
+
+
+def _usableExtrema(curve, ts, force):
+	# the t values at which nodes are added
+	if force:
+		result = []
+		for t in ts:
+			if not result or t - result[-1] > 1e-6:
+				result.append(t)
+		return [t for t in result if 1e-6 < t < 1 - 1e-6]
+	result = []
+	previous = curve[0]
+	for t in ts:
+		point = _blossomPoint(curve, t, t, t)
+		if math.hypot(point[0] - previous[0], point[1] - previous[1]) < minimumSegmentLength:
+			continue
+		if math.hypot(point[0] - curve[3][0], point[1] - curve[3][1]) < minimumSegmentLength:
+			continue
+		result.append(t)
+		previous = point
+	return result
+
+
+def _splitCubic(curve, ts):
+	"""The nodes that replace the handles of a cubic segment split at `ts`: (x, y, byte) of the handles and the new nodes."""
+	nodes = []
+	starts = [0.0] + ts
+	ends = ts + [1.0]
+	for a, b in zip(starts, ends):
+		nodes.append(_blossomPoint(curve, a, a, b))
+		nodes.append(_blossomPoint(curve, a, b, b))
+		if b < 1:
+			nodes.append(_blossomPoint(curve, b, b, b))
+	# the handles of a node at an extremum are exactly horizontal or vertical
+	for position, t in enumerate(ts):
+		nodeIndex = 3 * position + 2
+		# the direction of the curve at t is the line between the two handles
+		dx = nodes[nodeIndex + 1][0] - nodes[nodeIndex - 1][0]
+		dy = nodes[nodeIndex + 1][1] - nodes[nodeIndex - 1][1]
+		if dx == dy == 0:
+			continue
+		coordinate = 0 if abs(dx) < abs(dy) else 1
+		value = nodes[nodeIndex][coordinate]
+		for handleIndex in (nodeIndex - 1, nodeIndex + 1):
+			handle = list(nodes[handleIndex])
+			handle[coordinate] = value
+			nodes[handleIndex] = tuple(handle)
+	result = []
+	for index, (x, y) in enumerate(nodes):
+		result.append((x, y, _curveByte | _smoothFlag if index % 3 == 2 else _offCurveByte))
+	return result
+
+
+def _replaceNodes(path, replacements):
+	# replacements: {node index: [(x, y, byte), ...]} that take the place of the node
+	coordinates = path._coordinates
+	newCoordinates = array("d")
+	newTypes = bytearray()
+	newIndexes = {}
+	for index, byte in enumerate(path._types):
+		newIndexes[index] = len(newTypes)
+		nodes = replacements.get(index)
+		if nodes is None:
+			newCoordinates.append(coordinates[2 * index])
+			newCoordinates.append(coordinates[2 * index + 1])
+			newTypes.append(byte)
+			continue
+		for x, y, newByte in nodes:
+			newCoordinates.append(x)
+			newCoordinates.append(y)
+			newTypes.append(newByte)
+	if path._nodeUserData:
+		path._nodeUserData = dict((newIndexes[index], userData) for index, userData in path._nodeUserData.items())
+	path._coordinates = newCoordinates
+	path._types = newTypes
+	path._structureChanged()
+
+
+def addNodesAtExtremes(paths, force=False):
+	"""Add nodes at the horizontal and vertical extremes of the cubic curves of all `paths`.
+
+	The extremes of the curves of all paths are computed at once. Without `force`, extremes closer than
+	minimumSegmentLength to a node are left out, they would only add tiny segments.
+	Returns the number of added nodes."""
+	segments = []
+	curves = []
+	for path in paths:
+		coordinates = path._coordinates
+		for indexes in _cubicSegments(path):
+			segments.append((path, indexes))
+			curves.append(tuple((coordinates[2 * index], coordinates[2 * index + 1]) for index in indexes))
+	if not curves:
+		return 0
+	replacementsForPaths = {}
+	added = 0
+	for (path, indexes), curve, ts in zip(segments, curves, curveExtrema(curves)):
+		if not ts:
+			continue
+		ts = _usableExtrema(curve, ts, force)
+		if not ts:
+			continue
+		nodes = _splitCubic(curve, ts)
+		replacements = replacementsForPaths.setdefault(id(path), (path, {}))[1]
+		# the first handle is replaced by the first handle of the first piece, the second handle by everything else
+		replacements[indexes[1]] = nodes[:1]
+		replacements[indexes[2]] = nodes[1:]
+		added += len(ts)
+	for path, replacements in replacementsForPaths.values():
+		_replaceNodes(path, replacements)
+	return added
+
+
+##################################################################################
+#
+#
+#
+#           COLLINEAR NODES
+#
+#
+#
+##################################################################################
+
+
+def _removableNode(previous, point, following):
+	ax, ay = point[0] - previous[0], point[1] - previous[1]
+	bx, by = following[0] - point[0], following[1] - point[1]
+	if (ax, ay) == (0, 0) or (bx, by) == (0, 0):
+		# on top of a neighbour
+		return True
+	length = math.hypot(following[0] - previous[0], following[1] - previous[1])
+	if not length:
+		return False
+	# between the neighbours and less than collinearTolerance away from the line through them
+	return ax * bx + ay * by > 0 and abs(ax * by - ay * bx) / length <= collinearTolerance
+
+
+def _collinearNodes(path):
+	# indexes of line nodes between two lines that can be removed without changing the outline
+	types = path._types
+	count = len(types)
+	closed = path.closed
+	coordinates = path._coordinates
+	userData = path._nodeUserData
+	onCurveCount = sum(1 for byte in types if byte & _typeMask != _offCurveByte)
+	removed = set()
+	changed = True
+	while changed:
+		changed = False
+		for index in range(count):
+			if index in removed or types[index] & _typeMask != _lineByte or index in userData:
+				continue
+			if onCurveCount - len(removed) <= (3 if closed else 2):
+				return removed
+			if not closed and (index == 0 or index == count - 1):
+				continue
+			previous = (index - 1) % count
+			while previous in removed:
+				previous = (previous - 1) % count
+			following = (index + 1) % count
+			while following in removed:
+				following = (following + 1) % count
+			# the segments on both sides have to be lines: the neighbours are on curve points, the next one a line
+			if types[previous] & _typeMask == _offCurveByte or types[following] & _typeMask != _lineByte:
+				continue
+			if _removableNode(
+				(coordinates[2 * previous], coordinates[2 * previous + 1]),
+				(coordinates[2 * index], coordinates[2 * index + 1]),
+				(coordinates[2 * following], coordinates[2 * following + 1]),
+			):
+				removed.add(index)
+				changed = True
+	return removed
+
+
+def removeCollinearNodes(paths):
+	"""Remove line nodes that are on the line between their neighbours (or on top of one of them).
+	Nodes with a name or userData are kept. Returns the number of removed nodes."""
+	total = 0
+	for path in paths:
+		removed = _collinearNodes(path)
+		if removed:
+			_replaceNodes(path, dict((index, []) for index in removed))
+			total += len(removed)
+	return total
+
+
+##################################################################################
+#
+#
+#
+#           PATH DIRECTION
+#
+#
+#
+##################################################################################
+
+
+def _flattenedPath(path):
+	points, types = path._points()
+	flat = []
+	for segment in _segmentsFromPoints(points, types, True):
+		flat.extend(_flattenSegment(segment)[:-1])
+	return flat
+
+
+def _windingNumber(polygon, x, y):
+	winding = 0
+	for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]):
+		if (y0 <= y < y1) or (y1 <= y < y0):
+			if x0 + (y - y0) * (x1 - x0) / (y1 - y0) < x:
+				winding += 1 if y1 > y0 else -1
+	return winding
+
+
+def _polygonArea(polygon):
+	area = 0
+	for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]):
+		area += x0 * y1 - x1 * y0
+	return area / 2
+
+
+def correctPathDirection(paths):
+	"""Outer paths counter clockwise, the paths inside them clockwise, the paths inside those counter clockwise again.
+	Open paths are not changed. Returns the number of reversed paths."""
+	infos = []
+	for path in paths:
+		if not path.closed or len(path._types) < 2:
+			continue
+		polygon = _flattenedPath(path)
+		if not polygon:
+			continue
+		xs = [x for x, y in polygon]
+		ys = [y for x, y in polygon]
+		infos.append((path, polygon, (min(xs), min(ys), max(xs), max(ys)), _polygonArea(polygon)))
+	reversedCount = 0
+	for path, polygon, bounds, area in infos:
+		x, y = polygon[0]
+		depth = 0
+		for other, otherPolygon, otherBounds, otherArea in infos:
+			if other is path or abs(otherArea) < abs(area):
+				continue
+			if otherBounds[0] > bounds[0] or otherBounds[1] > bounds[1] or otherBounds[2] < bounds[2] or otherBounds[3] < bounds[3]:
+				continue
+			if _windingNumber(otherPolygon, x, y):
+				depth += 1
+		if (area > 0) != (depth % 2 == 0):
+			path.reverse()
+			reversedCount += 1
+	return reversedCount
+
+
+##################################################################################
+#
+#
+#
+#           FONTS
+#
+#
+#
+##################################################################################
+
+
+def _cleanUpPathLists(pathLists, extremes, collinear, direction, force):
+	# the paths of each layer in one list; the extremes of all are done at once
+	counts = {"nodesAdded": 0, "nodesRemoved": 0, "pathsReversed": 0}
+	allPaths = [path for paths in pathLists for path in paths]
+	if collinear:
+		counts["nodesRemoved"] = removeCollinearNodes(allPaths)
+	if extremes:
+		counts["nodesAdded"] = addNodesAtExtremes(allPaths, force)
+	if direction:
+		counts["pathsReversed"] = sum(correctPathDirection(paths) for paths in pathLists)
+	return counts
+
+
+def _cleanUpShapeData(job):
+	# runs in a worker process: the path dicts of many layers in, the cleaned up path dicts out
+	shapeLists, options = job
+	pathLists = [[GSShape._fromDict(data) for data in shapes] for shapes in shapeLists]
+	counts = _cleanUpPathLists(pathLists, *options)
+	return [[path._toDict() for path in paths] for paths in pathLists], counts
+
+
+def _layerPaths(layer):
+	return [shape for shape in layer._shapes if isinstance(shape, GSPath)]
+
+
+def cleanUpFont(font, extremes=True, collinear=True, direction=True, force=False, keepCompatible=True, glyphNames=None, processes=1):
+	"""Add nodes at extremes, remove collinear nodes and correct the path direction in all layers of the font.
+
+	glyphNames: only these glyphs, all by default
+	processes: the number of worker processes, None for one per CPU; 1 does everything in this process
+
+	Returns a dict with the number of "nodesAdded", "nodesRemoved", "pathsReversed" (including the
+	changes that were undone) and the names of the glyphs that were left alone because of keepCompatible
+	in "incompatibleGlyphs".
+	"""
+	if glyphNames is None:
+		glyphs = list(font._glyphs)
+	else:
+		glyphs = [font.glyphs[name] for name in glyphNames]
+		if None in glyphs:
+			raise KeyError("Glyphs with name: %s not found" % glyphNames[glyphs.index(None)])
+	options = (extremes, collinear, direction, force)
+	# per glyph: the layers with paths
+	jobs = [(glyph, [layer for layer in glyph._layers if _layerPaths(layer)]) for glyph in glyphs]
+	jobs = [(glyph, layers) for glyph, layers in jobs if layers]
+	compatible = dict((glyph.name, not glyph.incompatibleLayers()) for glyph, _ in jobs) if keepCompatible else {}
+
+	# the new paths of every layer; the old ones are kept to undo the changes of a glyph
+	newPaths = {}
+	counts = {"nodesAdded": 0, "nodesRemoved": 0, "pathsReversed": 0}
+	if processes == 1 or len(jobs) < parallelThreshold:
+		pathLists = []
+		for _, layers in jobs:
+			for layer in layers:
+				paths = [path.copy() for path in _layerPaths(layer)]
+				newPaths[id(layer)] = paths
+				pathLists.append(paths)
+		counts.update(_cleanUpPathLists(pathLists, *options))
+	else:
+		workers = processes or os.cpu_count() or 1
+		chunkSize = max(1, len(jobs) // (workers * 8))
+		chunks = [jobs[start:start + chunkSize] for start in range(0, len(jobs), chunkSize)]
+		work = [([[path._toDict() for path in _layerPaths(layer)] for _, layers in chunk for layer in layers], options) for chunk in chunks]
+		with ProcessPoolExecutor(max_workers=processes) as executor:
+			for chunk, (shapeLists, chunkCounts) in zip(chunks, executor.map(_cleanUpShapeData, work)):
+				layers = [layer for _, layers in chunk for layer in layers]
+				for layer, shapes in zip(layers, shapeLists):
+					newPaths[id(layer)] = [GSShape._fromDict(data) for data in shapes]
+				for key, value in chunkCounts.items():
+					counts[key] += value
+
+	incompatibleGlyphs = []
+	for glyph, layers in jobs:
+		oldShapes = [list(layer._shapes) for layer in layers]
+		for layer in layers:
+			paths = iter(newPaths[id(layer)])
+			layer.shapes = [next(paths) if isinstance(shape, GSPath) else shape for shape in layer._shapes]
+		if compatible.get(glyph.name) and glyph.incompatibleLayers():
+			for layer, shapes in zip(layers, oldShapes):
+				layer.shapes = shapes
+			incompatibleGlyphs.append(glyph.name)
+	counts["incompatibleGlyphs"] = incompatibleGlyphs
+	return counts
+
+
+def __GSPath_addNodesAtExtremes__(self, force=False, checkSelection=False):
+	"""Add nodes at the extremes of the path. The headless objects have no selection, `checkSelection` is ignored."""
+	addNodesAtExtremes([self], force)
+
+
+GSPath.addNodesAtExtremes = __GSPath_addNodesAtExtremes__
+
+
+def Layer_addNodesAtExtremes(self, force=False, checkSelection=False):
+	"""Add nodes at the extremes of all paths of the layer. `checkSelection` is ignored."""
+	addNodesAtExtremes(_layerPaths(self), force)
+
+
+GSLayer.addNodesAtExtremes = Layer_addNodesAtExtremes
+
+
+def __GSLayer_correctPathDirection__(self):
+	correctPathDirection(_layerPaths(self))
+
+
+GSLayer.correctPathDirection = __GSLayer_correctPathDirection__
@@ -0,0 +1,84 @@
+# encoding: utf-8
+
+"""The constants of the GlyphsApp module that make sense without the app."""
+
+GSFormatVersion1 = 1
+GSFormatVersion3 = 3
+GSFormatVersionCurrent = 3
+
+GSPackageFlatFile = 1
+GSPackageBundle = 2
+
+GSShapeTypePath = 1 << 1
+GSShapeTypeComponent = 1 << 2
+
+GSSHARP = 0
+GSSMOOTH = 100
+
+GSMOVE = "move"
+GSLINE = "line"
+GSCURVE = "curve"
+GSQCURVE = "qcurve"
+GSOFFCURVE = "offcurve"
+GSHOBBYCURVE = "hobbycurve"
+
+MOVE = "move"
+LINE = "line"
+CURVE = "curve"
+QCURVE = "qcurve"
+OFFCURVE = "offcurve"
+HOBBYCURVE = "hobbycurve"
+
+# Path Attributes
+FILL = "fill"
+FILLCOLOR = "fillColor"
+STROKECOLOR = "strokeColor"
+STROKEPOSITION = "strokePos"
+STROKEWIDTH = "strokeWidth"
+STROKEHEIGHT = "strokeHeight"
+MASK = "mask"
+
+# instance type
+INSTANCETYPESINGLE = 0
+INSTANCETYPEVARIABLE = 1
+
+GSMetricsKeyAscender = "ascender"
+GSMetricsKeyCapHeight = "cap height"
+GSMetricsKeySlantHeight = "slant height"
+GSMetricsKeyxHeight = "x-height"
+GSMetricsKeyTopHeight = "topHeight"
+GSMetricsKeyDescender = "descender"
+GSMetricsKeyBaseline = "baseline"
+GSMetricsKeyItalicAngle = "italic angle"
+
+GSNoCase = 0
+GSUppercase = 1
+GSLowercase = 2
+GSSmallcaps = 3
+GSMinor = 4
+GSOtherCase = 5
+
+# Writing direction
+GSBIDI = 1
+GSLTR = 0
+GSRTL = 2
+GSVertical = 4
+GSVerticalToRight = 8
+
+# compatibility
+BIDI = 1
+LTR = 0
+RTL = 2
+LTRTTB = 4
+RTLTTB = 8
+
+# the node types as they are stored in the file
+nodeTypeCodes = {
+	LINE: "l",
+	CURVE: "c",
+	OFFCURVE: "o",
+	QCURVE: "q",
+}
+nodeTypesForCodes = dict((code, nodeType) for nodeType, code in nodeTypeCodes.items())
+
+__all__ = [name for name in dir() if name.isupper() or name.startswith("GS")]
@@ -0,0 +1,420 @@
+# encoding: utf-8
+
+"""Bézier geometry on many curves at once.
+
+divideCurve(), distance(), addPoints(), subtractPoints() and scalePoint() work
+like the functions of the GlyphsApp module. The other functions take many
+cubic curves (P0, P1, P2, P3) or points at once:
+
+	curves = curvesForPaths(path for glyph in font.glyphs for layer in glyph.layers for path in layer.paths)
+	lengths = curveLengths(curves)
+	halves = divideCurves(curves, 0.5)
+	pieces = splitCurves(curves, (0.25, 0.5, 0.75))
+
+With NumPy the curves are an array of the shape (curves, 4, 2) and the results
+are arrays too. Without it the curves are lists of four (x, y) tuples, results
+are lists of tuples and numbers are returned as array("d").
+
+Lines and quadratic curves are raised to cubic curves by curvesForPaths(), so
+they have the same shape and give the same lengths and bounds.
+"""
+
+from __future__ import print_function
+
+import math
+
+from array import array
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from .objects import GSPath, NSMakePoint, _segmentsFromPoints
+
+__all__ = [
+	"divideCurve", "distance", "addPoints", "subtractPoints", "scalePoint",
+	"curvesForPaths", "pointsOnCurves", "divideCurves", "splitCurves", "curveBounds", "curveExtrema", "curveLengths",
+	"distances", "addPointArrays", "subtractPointArrays", "scalePointArray",
+]
+
+
+##################################################################################
+#
+#
+#
+#           SINGLE POINTS AND CURVES
+#
+#
+#
+##################################################################################
+
+
+def divideCurve(P0, P1, P2, P3, t):
+	"""Divides the curve using the De Casteljau’s algorithm.
+
+	Returns the points of both curves (Q0, Q1, Q2, Q3, R1, R2, R3), the middle point only once."""
+	Q0x = P0[0] + ((P1[0] - P0[0]) * t)
+	Q0y = P0[1] + ((P1[1] - P0[1]) * t)
+	Q1x = P1[0] + ((P2[0] - P1[0]) * t)
+	Q1y = P1[1] + ((P2[1] - P1[1]) * t)
+	Q2x = P2[0] + ((P3[0] - P2[0]) * t)
+	Q2y = P2[1] + ((P3[1] - P2[1]) * t)
+	R0x = Q0x + ((Q1x - Q0x) * t)
+	R0y = Q0y + ((Q1y - Q0y) * t)
+	R1x = Q1x + ((Q2x - Q1x) * t)
+	R1y = Q1y + ((Q2y - Q1y) * t)
+
+	Sx = R0x + ((R1x - R0x) * t)
+	Sy = R0y + ((R1y - R0y) * t)
+	return (P0, NSMakePoint(Q0x, Q0y), NSMakePoint(R0x, R0y), NSMakePoint(Sx, Sy), NSMakePoint(R1x, R1y), NSMakePoint(Q2x, Q2y), P3)
+
+
+def distance(P1, P2):
+	"""The distance between two points."""
+	return math.hypot(P1[0] - P2[0], P1[1] - P2[1])
+
+
+def addPoints(P1, P2):
+	return NSMakePoint(P1[0] + P2[0], P1[1] + P2[1])
+
+
+def subtractPoints(P1, P2):
+	return NSMakePoint(P1[0] - P2[0], P1[1] - P2[1])
+
+
+def scalePoint(P, scalar):
+	return NSMakePoint(P[0] * scalar, P[1] * scalar)
+
+
+##################################################################################
+#
+#
+#
+#           MANY CURVES
+#
+#
+#
+##################################################################################
+
+
+def _asCurves(curves):
+	if numpy is not None:
+		return numpy.asarray(curves, dtype=float).reshape(-1, 4, 2)
+	return [tuple((float(x), float(y)) for x, y in curve) for curve in curves]
+
+
+def _cubicFromSegment(segment):
+	if len(segment) == 2:
+		(x0, y0), (x3, y3) = segment
+		return ((x0, y0), (x0 + (x3 - x0) / 3, y0 + (y3 - y0) / 3), (x0 + 2 * (x3 - x0) / 3, y0 + 2 * (y3 - y0) / 3), (x3, y3))
+	if len(segment) == 3:
+		(x0, y0), (x1, y1), (x2, y2) = segment
+		return ((x0, y0), (x0 + 2 * (x1 - x0) / 3, y0 + 2 * (y1 - y0) / 3), (x2 + 2 * (x1 - x2) / 3, y2 + 2 * (y1 - y2) / 3), (x2, y2))
+	return tuple(tuple(point) for point in segment)
+
+
+def curvesForPaths(paths):
+	"""The segments of the paths as cubic curves, lines and quadratic curves raised to cubic ones."""
+	curves = []
+	for path in paths:
+		if not isinstance(path, GSPath):
+			continue
+		points, types = path._points()
+		curves.extend(_cubicFromSegment(segment) for segment in _segmentsFromPoints(points, types, path.closed))
+	if numpy is not None:
+		return numpy.array(curves, dtype=float).reshape(-1, 4, 2)
+	return curves
+
+
+def _blossom(curves, u1, u2, u3):
+	# the polar form of the curves: De Casteljau with a different t on each level.
+	# _blossom(curves, t, t, t) is the point at t; the arguments broadcast against the curves
+	P0, P1, P2, P3 = curves[..., 0, :], curves[..., 1, :], curves[..., 2, :], curves[..., 3, :]
+	Q0 = P0 + (P1 - P0) * u1
+	Q1 = P1 + (P2 - P1) * u1
+	Q2 = P2 + (P3 - P2) * u1
+	R0 = Q0 + (Q1 - Q0) * u2
+	R1 = Q1 + (Q2 - Q1) * u2
+	return R0 + (R1 - R0) * u3
+
+
+def _blossomPoint(curve, u1, u2, u3):
+	(x0, y0), (x1, y1), (x2, y2), (x3, y3) = curve
+	qx0, qy0 = x0 + (x1 - x0) * u1, y0 + (y1 - y0) * u1
+	qx1, qy1 = x1 + (x2 - x1) * u1, y1 + (y2 - y1) * u1
+	qx2, qy2 = x2 + (x3 - x2) * u1, y2 + (y3 - y2) * u1
+	rx0, ry0 = qx0 + (qx1 - qx0) * u2, qy0 + (qy1 - qy0) * u2
+	rx1, ry1 = qx1 + (qx2 - qx1) * u2, qy1 + (qy2 - qy1) * u2
+	return (rx0 + (rx1 - rx0) * u3, ry0 + (ry1 - ry0) * u3)
+
+
+def _times(ts, count):
+	# one t for all curves or one per curve
+	if isinstance(ts, (int, float)):
+		return [float(ts)] * count
+	ts = [float(t) for t in ts]
+	if len(ts) != count:
+		raise ValueError("Expected %d t values, got %d" % (count, len(ts)))
+	return ts
+
+
+def pointsOnCurves(curves, ts):
+	"""The points at each of the t values `ts` on each curve.
+
+	Returns an array of the shape (curves, len(ts), 2), without NumPy a list of lists of (x, y)."""
+	curves = _asCurves(curves)
+	if numpy is not None:
+		ts = numpy.asarray(ts, dtype=float).reshape(1, -1, 1)
+		return _blossom(curves[:, None], ts, ts, ts)
+	ts = [float(t) for t in ts]
+	return [[_blossomPoint(curve, t, t, t) for t in ts] for curve in curves]
+
+
+def divideCurves(curves, t):
+	"""divideCurve() for many curves. `t` is one value for all curves or one per curve.
+
+	Returns the seven points (Q0, Q1, Q2, Q3, R1, R2, R3) of each curve, as array of the
+	shape (curves, 7, 2) or, without NumPy, a list of tuples of (x, y)."""
+	curves = _asCurves(curves)
+	if numpy is not None:
+		t = numpy.asarray(t, dtype=float).reshape(-1, 1)
+		if t.shape[0] not in (1, len(curves)):
+			raise ValueError("Expected %d t values, got %d" % (len(curves), t.shape[0]))
+		P0, P1, P2, P3 = curves[:, 0], curves[:, 1], curves[:, 2], curves[:, 3]
+		Q0 = P0 + (P1 - P0) * t
+		Q1 = P1 + (P2 - P1) * t
+		Q2 = P2 + (P3 - P2) * t
+		R0 = Q0 + (Q1 - Q0) * t
+		R1 = Q1 + (Q2 - Q1) * t
+		S = R0 + (R1 - R0) * t
+		return numpy.stack((P0, Q0, R0, S, R1, Q2, P3), axis=1)
+	result = []
+	for curve, t in zip(curves, _times(t, len(curves))):
+		result.append(tuple(tuple(point) for point in divideCurve(curve[0], curve[1], curve[2], curve[3], t)))
+	return result
+
+
+def splitCurves(curves, ts):
+	"""Split every curve at all of the t values in `ts` (increasing, between 0 and 1).
+
+	Returns the len(ts) + 1 pieces of each curve, as array of the shape (curves, pieces, 4, 2) or,
+	without NumPy, a list of lists of curves. The pieces are computed independently of each other
+	from the polar form of the curve, not by dividing the rest of the curve again and again."""
+	curves = _asCurves(curves)
+	ts = [float(t) for t in ts]
+	if any(second < first for first, second in zip(ts, ts[1:])):
+		raise ValueError("The t values need to be increasing")
+	starts = [0.0] + ts
+	ends = ts + [1.0]
+	if numpy is not None:
+		a = numpy.asarray(starts).reshape(1, -1, 1)
+		b = numpy.asarray(ends).reshape(1, -1, 1)
+		curves = curves[:, None]
+		return numpy.stack((_blossom(curves, a, a, a), _blossom(curves, a, a, b), _blossom(curves, a, b, b), _blossom(curves, b, b, b)), axis=2)
+	result = []
+	for curve in curves:
+		result.append([
+			(_blossomPoint(curve, a, a, a), _blossomPoint(curve, a, a, b), _blossomPoint(curve, a, b, b), _blossomPoint(curve, b, b, b))
+			for a, b in zip(starts, ends)
+		])
+	return result
+
+
+def _derivativeRoots(p0, p1, p2, p3):
+	# the t values in (0, 1) where the derivative of one coordinate is zero
+	a = -p0 + 3 * p1 - 3 * p2 + p3
+	b = 2 * (p0 - 2 * p1 + p2)
+	c = p1 - p0
+	if abs(a) < 1e-12:
+		if abs(b) < 1e-12:
+			return []
+		roots = [-c / b]
+	else:
+		discriminant = b * b - 4 * a * c
+		if discriminant < 0:
+			return []
+		root = math.sqrt(discriminant)
+		roots = [(-b + root) / (2 * a), (-b - root) / (2 * a)]
+	return [t for t in roots if 0 < t < 1]
+
+
+def _derivativeRootArray(p0, p1, p2, p3):
+	# _derivativeRoots() for arrays of coordinates: an array of the shape (curves, 2), nan where there is no root
+	a = -p0 + 3 * p1 - 3 * p2 + p3
+	b = 2 * (p0 - 2 * p1 + p2)
+	c = p1 - p0
+	with numpy.errstate(divide="ignore", invalid="ignore"):
+		quadratic = numpy.abs(a) >= 1e-12
+		root = numpy.sqrt(b * b - 4 * a * c)
+		first = numpy.where(quadratic, (-b + root) / (2 * a), numpy.where(numpy.abs(b) >= 1e-12, -c / b, numpy.nan))
+		second = numpy.where(quadratic, (-b - root) / (2 * a), numpy.nan)
+		roots = numpy.stack((first, second), axis=1)
+		roots[~((roots > 0) & (roots < 1))] = numpy.nan
+	return roots
+
+
+def _extremaArray(curves):
+	# (curves, 4) t values of the x and y extrema, nan where there is none
+	x = curves[:, :, 0]
+	y = curves[:, :, 1]
+	return numpy.concatenate((_derivativeRootArray(x[:, 0], x[:, 1], x[:, 2], x[:, 3]), _derivativeRootArray(y[:, 0], y[:, 1], y[:, 2], y[:, 3])), axis=1)
+
+
+def curveExtrema(curves):
+	"""The t values of the horizontal and vertical extrema inside each curve, a sorted list per curve."""
+	curves = _asCurves(curves)
+	if numpy is not None:
+		return [sorted(set(t for t in row if t == t)) for row in _extremaArray(curves).tolist()]
+	result = []
+	for (x0, y0), (x1, y1), (x2, y2), (x3, y3) in curves:
+		result.append(sorted(set(_derivativeRoots(x0, x1, x2, x3) + _derivativeRoots(y0, y1, y2, y3))))
+	return result
+
+
+def _cubicValues(p0, p1, p2, p3, t):
+	mt = 1 - t
+	return mt * mt * mt * p0 + 3 * mt * mt * t * p1 + 3 * mt * t * t * p2 + t * t * t * p3
+
+
+def curveBounds(curves):
+	"""The bounds (xMin, yMin, xMax, yMax) of each curve, including the extrema.
+
+	Returns an array of the shape (curves, 4), without NumPy a list of tuples."""
+	curves = _asCurves(curves)
+	if numpy is not None:
+		minima = []
+		maxima = []
+		for coordinate in (0, 1):
+			p0, p1, p2, p3 = (numpy.ascontiguousarray(curves[:, index, coordinate]) for index in range(4))
+			# t = 0 where there is no extremum, that is the start point that is included anyway
+			roots = numpy.nan_to_num(_derivativeRootArray(p0, p1, p2, p3), nan=0.0)
+			values = [p0, p3] + [_cubicValues(p0, p1, p2, p3, roots[:, index]) for index in (0, 1)]
+			minima.append(numpy.minimum.reduce(values))
+			maxima.append(numpy.maximum.reduce(values))
+		return numpy.stack(minima + maxima, axis=1)
+	result = []
+	for curve in curves:
+		(x0, y0), (x1, y1), (x2, y2), (x3, y3) = curve
+		xs = [x0, x3] + [_blossomPoint(curve, t, t, t)[0] for t in _derivativeRoots(x0, x1, x2, x3)]
+		ys = [y0, y3] + [_blossomPoint(curve, t, t, t)[1] for t in _derivativeRoots(y0, y1, y2, y3)]
+		result.append((min(xs), min(ys), max(xs), max(ys)))
+	return result
+
+
+_gaussLegendreCache = {}
+
+
+def _gaussLegendre(order):
+	# nodes and weights of the Gauss-Legendre quadrature on [0, 1]
+	cached = _gaussLegendreCache.get(order)
+	if cached is not None:
+		return cached
+	nodes = []
+	weights = []
+	for i in range(1, order + 1):
+		x = math.cos(math.pi * (i - 0.25) / (order + 0.5))
+		for _ in range(100):
+			# Newton steps on the Legendre polynomial of the order
+			p0, p1 = 1.0, x
+			for k in range(2, order + 1):
+				p0, p1 = p1, ((2 * k - 1) * x * p1 - (k - 1) * p0) / k
+			derivative = order * (x * p1 - p0) / (x * x - 1)
+			step = p1 / derivative
+			x -= step
+			if abs(step) < 1e-15:
+				break
+		nodes.append((1 - x) / 2)
+		weights.append(1 / ((1 - x * x) * derivative * derivative))
+	cached = _gaussLegendreCache[order] = (nodes, weights)
+	return cached
+
+
+def curveLengths(curves, order=16):
+	"""The arc length of each curve, by Gauss-Legendre quadrature with `order` samples per curve.
+
+	The default is exact to far below a unit for the curves of glyph outlines; curves with sharp
+	turns (almost cusps) need a higher order. Returns an array, without NumPy array("d")."""
+	curves = _asCurves(curves)
+	nodes, weights = _gaussLegendre(order)
+	if numpy is not None:
+		t = numpy.asarray(nodes).reshape(1, -1, 1)
+		mt = 1 - t
+		P0, P1, P2, P3 = (curves[:, None, index] for index in range(4))
+		derivative = 3 * (mt * mt * (P1 - P0) + 2 * mt * t * (P2 - P1) + t * t * (P3 - P2))
+		return numpy.hypot(derivative[..., 0], derivative[..., 1]).dot(numpy.asarray(weights))
+	samples = [(t, 1 - t, weight) for t, weight in zip(nodes, weights)]
+	result = array("d")
+	for (x0, y0), (x1, y1), (x2, y2), (x3, y3) in curves:
+		ax, ay = x1 - x0, y1 - y0
+		bx, by = x2 - x1, y2 - y1
+		cx, cy = x3 - x2, y3 - y2
+		length = 0
+		for t, mt, weight in samples:
+			dx = mt * mt * ax + 2 * mt * t * bx + t * t * cx
+			dy = mt * mt * ay + 2 * mt * t * by + t * t * cy
+			length += weight * math.hypot(dx, dy)
+		result.append(3 * length)
+	return result
+
+
+##################################################################################
+#
+#
+#
+#           MANY POINTS
+#
+#
+#
+##################################################################################
+
+
+def _asPoints(points):
+	if numpy is not None:
+		return numpy.asarray(points, dtype=float).reshape(-1, 2)
+	return [(float(x), float(y)) for x, y in points]
+
+
+def _otherPoints(points, count):
+	# the second argument of the point functions: one point or one per point of the first
+	if len(points) == 2 and not isinstance(points[0], (list, tuple)):
+		return [points] * count
+	if len(points) != count:
+		raise ValueError("Expected the same number of points, got %d and %d" % (count, len(points)))
+	return points
+
+
+def distances(points1, points2):
+	"""distance() between the points of two lists of the same length."""
+	points1 = _asPoints(points1)
+	points2 = _asPoints(points2)
+	if len(points1) != len(points2):
+		raise ValueError("Expected the same number of points, got %d and %d" % (len(points1), len(points2)))
+	if numpy is not None:
+		difference = points1 - points2
+		return numpy.hypot(difference[:, 0], difference[:, 1])
+	return array("d", [math.hypot(x1 - x2, y1 - y2) for (x1, y1), (x2, y2) in zip(points1, points2)])
+
+
+def addPointArrays(points1, points2):
+	"""addPoints() for the points of two lists of the same length; `points2` can be one point for all."""
+	points1 = _asPoints(points1)
+	if numpy is not None:
+		return points1 + numpy.asarray(points2, dtype=float)
+	return [(x1 + x2, y1 + y2) for (x1, y1), (x2, y2) in zip(points1, _otherPoints(points2, len(points1)))]
+
+
+def subtractPointArrays(points1, points2):
+	"""subtractPoints() for the points of two lists of the same length; `points2` can be one point for all."""
+	points1 = _asPoints(points1)
+	if numpy is not None:
+		return points1 - numpy.asarray(points2, dtype=float)
+	return [(x1 - x2, y1 - y2) for (x1, y1), (x2, y2) in zip(points1, _otherPoints(points2, len(points1)))]
+
+
+def scalePointArray(points, scalar):
+	"""scalePoint() for many points."""
+	points = _asPoints(points)
+	if numpy is not None:
+		return points * scalar
+	return [(x * scalar, y * scalar) for x, y in points]
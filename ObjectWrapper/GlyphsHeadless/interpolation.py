@@ -0,0 +1,231 @@
+# encoding: utf-8
+
+"""Linear combinations of compatible layers.
+
+The layers are flattened into one row of numbers each (node coordinates,
+component position, scale and rotation, anchor positions and the width), so a
+combination of any number of layers is a single matrix product:
+
+	matrix = LayerMatrix(glyph.layers[master.id] for master in font.masters)
+	layer = matrix.interpolatedLayer((0.25, 0.75))
+	layers = matrix.interpolatedLayers([(1, 0), (0.5, 0.5), (0, 1)])
+
+NumPy is used if it is installed, otherwise the sums are done in Python.
+
+Importing this module also adds `+` and `*` to GSLayer (like the GlyphsApp
+module does), built on the same flattened values:
+
+	middle = (layer1 + layer2) * 0.5
+"""
+
+from __future__ import print_function
+
+from array import array
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from .objects import GSLayer, GSPath, NSPoint, _signatureDifference
+
+__all__ = ["LayerMatrix", "InterpolationCache", "layerValues"]
+
+
+def layerValues(layer):
+	"""The numbers of the layer that change between compatible layers, as array("d")."""
+	values = array("d")
+	for shape in layer._shapes:
+		if isinstance(shape, GSPath):
+			values.extend(shape._coordinates)
+		else:
+			x, y = shape.position
+			scaleX, scaleY = shape.scale
+			values.extend((x, y, scaleX, scaleY, shape.rotation))
+	for anchor in sorted(layer._anchors, key=lambda anchor: anchor.name):
+		values.extend(anchor.position)
+	values.append(layer.width)
+	return values
+
+
+def _valuesVersion(layer):
+	# changes when layerValues(layer) changes, without reading the node coordinates
+	version = []
+	for shape in layer._shapes:
+		if isinstance(shape, GSPath):
+			version.append(shape._coordinatesVersion)
+		else:
+			version.append((tuple(shape.position), tuple(shape.scale), shape.rotation))
+	version.extend(tuple(anchor.position) for anchor in layer._anchors)
+	version.append(layer.width)
+	return version
+
+
+def _setLayerValues(layer, values):
+	# the inverse of layerValues()
+	offset = 0
+	for shape in layer._shapes:
+		if isinstance(shape, GSPath):
+			count = len(shape._coordinates)
+			shape._coordinates = values[offset:offset + count]
+			shape._coordinatesChanged()
+			offset += count
+		else:
+			shape.position = values[offset:offset + 2]
+			shape.scale = values[offset + 2:offset + 4]
+			shape.rotation = values[offset + 4]
+			offset += 5
+	for anchor in sorted(layer._anchors, key=lambda anchor: anchor.name):
+		anchor.position = values[offset:offset + 2]
+		offset += 2
+	layer.width = values[offset]
+
+
+class LayerMatrix(object):
+	"""The values of compatible layers, one row per layer."""
+
+	def __init__(self, layers):
+		layers = list(layers)
+		if not layers:
+			raise ValueError("At least one layer is needed")
+		self.structure = layers[0].compatibilitySignature
+		for layer in layers[1:]:
+			if layer.compatibilitySignature != self.structure:
+				raise ValueError("Layers are not compatible: %s" % _signatureDifference(self.structure, layer.compatibilitySignature))
+		self.layers = layers
+		self._versions = [_valuesVersion(layer) for layer in layers]
+		rows = [layerValues(layer) for layer in layers]
+		if numpy is not None:
+			self._matrix = numpy.vstack([numpy.frombuffer(row) for row in rows])
+		else:
+			self._matrix = rows
+
+	def reload(self):
+		"""Read the values of the layers that changed since they were read, e.g. after moving nodes.
+		The structure isn't checked again."""
+		for index, layer in enumerate(self.layers):
+			version = _valuesVersion(layer)
+			if version != self._versions[index]:
+				self._versions[index] = version
+				row = layerValues(layer)
+				self._matrix[index] = numpy.frombuffer(row) if numpy is not None else row
+
+	def __repr__(self):
+		return "<LayerMatrix %d layers, %d values>" % (len(self.layers), len(self._matrix[0]))
+
+	def __len__(self):
+		return len(self.layers)
+
+	def _checkWeights(self, weights):
+		weights = [float(weight) for weight in weights]
+		if len(weights) != len(self.layers):
+			raise ValueError("Expected %d weights, got %d" % (len(self.layers), len(weights)))
+		return weights
+
+	def combine(self, weights):
+		"""The sum of the layer values multiplied by `weights` (one per layer), as array("d")."""
+		weights = self._checkWeights(weights)
+		if numpy is not None:
+			return _toArray(numpy.dot(weights, self._matrix))
+		result = None
+		for weight, row in zip(weights, self._matrix):
+			if result is None:
+				result = [weight * value for value in row]
+			elif weight:
+				result = [total + weight * value for total, value in zip(result, row)]
+		return array("d", result)
+
+	def combineMany(self, weightRows):
+		"""combine() for many sets of weights; with NumPy in one matrix product."""
+		weightRows = [self._checkWeights(weights) for weights in weightRows]
+		if numpy is not None and weightRows:
+			return [_toArray(row) for row in numpy.dot(weightRows, self._matrix)]
+		return [self.combine(weights) for weights in weightRows]
+
+	def interpolatedLayer(self, weights):
+		"""A copy of the first layer with the combined values."""
+		return self._layerWithValues(self.combine(weights))
+
+	def interpolatedLayers(self, weightRows):
+		return [self._layerWithValues(values) for values in self.combineMany(weightRows)]
+
+	def _layerWithValues(self, values):
+		layer = self.layers[0].copy()
+		_setLayerValues(layer, values)
+		return layer
+
+	def deviation(self, weights, layer):
+		"""The biggest difference between the combined values and the values of `layer`, e.g. to check
+		how far a brace layer is from the interpolation of the masters. None if `layer` isn't compatible."""
+		if layer.compatibilitySignature != self.structure:
+			return None
+		values = layerValues(layer)
+		combined = self.combine(weights)
+		if numpy is not None:
+			return float(numpy.max(numpy.abs(numpy.frombuffer(combined) - numpy.frombuffer(values))))
+		return max(abs(first - second) for first, second in zip(combined, values))
+
+
+def _toArray(values):
+	result = array("d")
+	result.frombytes(numpy.ascontiguousarray(values, dtype=float).tobytes())
+	return result
+
+
+class InterpolationCache(object):
+	"""LayerMatrix objects for the master layers of the glyphs of a font.
+
+	The master layers of a glyph are checked and flattened the first time it is
+	interpolated. The check is reused as long as the compatibilitySignature of the
+	layers doesn't change, and only layers whose values changed since then (moved
+	nodes, components, anchors or a new width) are read again.
+	"""
+
+	def __init__(self, font):
+		self.font = font
+		self._matrices = {}
+
+	def clear(self):
+		self._matrices.clear()
+
+	def matrix(self, glyph):
+		layers = [glyph._layerForId(master.id) for master in self.font._masters]
+		if None in layers:
+			raise ValueError("%s has no layer for every master" % glyph)
+		structure = tuple(layer.compatibilitySignature for layer in layers)
+		cached = self._matrices.get(glyph.name)
+		if cached is not None and cached[0] == structure and cached[1].layers == layers:
+			cached[1].reload()
+			return cached[1]
+		matrix = LayerMatrix(layers)
+		self._matrices[glyph.name] = (structure, matrix)
+		return matrix
+
+	def interpolatedLayer(self, glyph, weights):
+		"""Combine the master layers of `glyph` with `weights`, one per master."""
+		return self.matrix(glyph).interpolatedLayer(weights)
+
+
+def __GSLayer__add__(self, summand):
+	if isinstance(summand, (NSPoint, tuple)):
+		newLayer = self.copy()
+		newLayer.applyTransform((1, 0, 0, 1, summand[0], summand[1]))
+		return newLayer
+	elif isinstance(summand, GSLayer):
+		return LayerMatrix([self, summand]).interpolatedLayer((1, 1))
+	else:
+		raise TypeError("unsupported operand type(s) for +: '%s' and '%s'" % (type(self).__name__, type(summand).__name__))
+
+
+GSLayer.__add__ = __GSLayer__add__
+
+
+def __GSLayer__mul__(self, factor):
+	if isinstance(factor, (int, float)):
+		return LayerMatrix([self]).interpolatedLayer((factor,))
+	else:
+		raise TypeError("unsupported operand type(s) for *: '%s' and '%s'" % (type(self).__name__, type(factor).__name__))
+
+
+GSLayer.__mul__ = __GSLayer__mul__
+GSLayer.__rmul__ = __GSLayer__mul__
@@ -0,0 +1,487 @@
+# encoding: utf-8
+
+"""Group aware kerning lookups.
+
+The kerning of a font is stored per master as {first key: {second key: value}},
+where a key is a glyph name or a kerning group key like "@MMK_L_T". The value
+that applies to a pair of glyphs is the most specific one:
+
+	glyph, glyph > glyph, group > group, glyph > group, group
+
+KerningIndex keeps the pairs of each master in one flat dict together with the
+kerning groups of every glyph, so the value for a pair of glyph names is found
+with at most four dict lookups:
+
+	index = font.kerningIndex()
+	index.kerningForPair(master.id, "T", "o")
+	firstNames, secondNames, matrix = index.matrix(master.id)
+
+The index is kept up to date by GSFont.setKerningForPair(), removeKerningForPair()
+and kerningBatch(), and is rebuilt when glyphs or kerning groups change. Changes made directly to
+the kerning dicts are not seen; assign the dict again (font.kerningLTR = ...) after that.
+
+CompactKerning does the same lookups on a read only copy that needs much less
+memory, and finds pairs that can be removed without changing the kerning.
+"""
+
+from __future__ import print_function
+
+from array import array
+from bisect import bisect_left
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from .constants import GSLTR, GSRTL, GSVertical, GSVerticalToRight
+
+__all__ = ["KerningIndex", "KerningBatch", "CompactKerning", "kerningGroupKeys"]
+
+# per direction: (prefix of the group key of the first glyph, the glyph property with its group,
+# prefix of the group key of the second glyph, the glyph property with its group)
+kerningGroupKeys = {
+	GSLTR: ("@MMK_L_", "rightKerningGroup", "@MMK_R_", "leftKerningGroup"),
+	GSRTL: ("@MMK_R_", "leftKerningGroup", "@MMK_L_", "rightKerningGroup"),
+	GSVertical: ("@MMK_T_", "bottomKerningGroup", "@MMK_B_", "topKerningGroup"),
+}
+kerningGroupKeys[GSVerticalToRight] = kerningGroupKeys[GSVertical]
+
+
+def _isGroupKey(key):
+	return key.startswith("@")
+
+
+class KerningIndex(object):
+	"""The kerning of one direction of a font, indexed for lookups by glyph name."""
+
+	def __init__(self, font, direction=GSLTR):
+		if direction not in kerningGroupKeys:
+			raise ValueError("Unknown direction: %s" % direction)
+		self.direction = direction
+		firstPrefix, firstAttribute, secondPrefix, secondAttribute = kerningGroupKeys[direction]
+		self.glyphNames = []
+		# glyph name: group key (or None)
+		self._firstGroups = {}
+		self._secondGroups = {}
+		for glyph in font._glyphs:
+			name = glyph.name
+			self.glyphNames.append(name)
+			group = getattr(glyph, firstAttribute)
+			self._firstGroups[name] = firstPrefix + group if group else None
+			group = getattr(glyph, secondAttribute)
+			self._secondGroups[name] = secondPrefix + group if group else None
+		# master id: {(first key, second key): value}
+		self._pairs = {}
+		for masterId, masterKerning in (font._kerningDict(direction) or {}).items():
+			self._pairs[masterId] = self._readPairs(masterKerning)
+
+	def _readPairs(self, masterKerning):
+		pairs = {}
+		for first, seconds in masterKerning.items():
+			for second, value in seconds.items():
+				pairs[(first, second)] = value
+		return pairs
+
+	def __repr__(self):
+		return "<KerningIndex %d glyphs, %d masters>" % (len(self.glyphNames), len(self._pairs))
+
+	def _setValue(self, masterId, first, second, value):
+		self._pairs.setdefault(masterId, {})[(first, second)] = value
+
+	def _removeValue(self, masterId, first, second):
+		self._pairs.get(masterId, {}).pop((first, second), None)
+
+	def _updateValues(self, masterId, changes):
+		# changes: {(first, second): value or None to remove}
+		pairs = self._pairs.setdefault(masterId, {})
+		for key, value in changes.items():
+			if value is None:
+				pairs.pop(key, None)
+			else:
+				pairs[key] = value
+
+	def _keys(self, first, second):
+		# the keys to try, most specific first
+		try:
+			firstGroup = self._firstGroups[first]
+		except KeyError:
+			raise KeyError("Glyphs with name: %s not found" % first)
+		try:
+			secondGroup = self._secondGroups[second]
+		except KeyError:
+			raise KeyError("Glyphs with name: %s not found" % second)
+		keys = [(first, second)]
+		if secondGroup:
+			keys.append((first, secondGroup))
+		if firstGroup:
+			keys.append((firstGroup, second))
+			if secondGroup:
+				keys.append((firstGroup, secondGroup))
+		return keys
+
+	def groupKeys(self, glyphName):
+		"""The group keys of the glyph as (first, second), None for no group."""
+		return self._firstGroups[glyphName], self._secondGroups[glyphName]
+
+	def kerningForPair(self, masterId, first, second):
+		"""The kerning that applies between the glyphs `first` and `second`, None if there is none."""
+		pairs = self._pairs.get(masterId)
+		if not pairs:
+			return None
+		for key in self._keys(first, second):
+			value = pairs.get(key)
+			if value is not None:
+				return value
+		return None
+
+	def sourceForPair(self, masterId, first, second):
+		"""The (first key, second key) of the kerning value that applies between the two glyphs, None if there is none.
+		A glyph name instead of a group key shows an exception."""
+		pairs = self._pairs.get(masterId)
+		if not pairs:
+			return None
+		for key in self._keys(first, second):
+			if key in pairs:
+				return key
+		return None
+
+	def matrix(self, masterId, firstNames=None, secondNames=None, missing=0):
+		"""The kerning of all pairs of `firstNames` × `secondNames` (all glyphs by default).
+
+		Returns (firstNames, secondNames, matrix). With NumPy the matrix is a 2D array, without
+		it a list of array("d") rows. Pairs without kerning get `missing`.
+		"""
+		firstNames = list(self.glyphNames if firstNames is None else firstNames)
+		secondNames = list(firstNames if secondNames is None else secondNames)
+		for name in firstNames + secondNames:
+			if name not in self._firstGroups:
+				raise KeyError("Glyphs with name: %s not found" % name)
+		pairs = self._pairs.get(masterId) or {}
+
+		# rows and columns for each group key and glyph name
+		rowsForKeys = {}
+		for row, name in enumerate(firstNames):
+			rowsForKeys.setdefault(name, []).append(row)
+			group = self._firstGroups[name]
+			if group:
+				rowsForKeys.setdefault(group, []).append(row)
+		columnsForKeys = {}
+		for column, name in enumerate(secondNames):
+			columnsForKeys.setdefault(name, []).append(column)
+			group = self._secondGroups[name]
+			if group:
+				columnsForKeys.setdefault(group, []).append(column)
+
+		# the less specific values first, so the exceptions overwrite them
+		levels = ([], [], [], [])
+		for (first, second), value in pairs.items():
+			rows = rowsForKeys.get(first)
+			columns = columnsForKeys.get(second)
+			if rows is None or columns is None:
+				continue
+			levels[(0 if _isGroupKey(first) else 2) + (0 if _isGroupKey(second) else 1)].append((rows, columns, value))
+
+		if numpy is not None:
+			matrix = numpy.full((len(firstNames), len(secondNames)), missing, dtype=float)
+			for level in levels:
+				for rows, columns, value in level:
+					matrix[numpy.ix_(rows, columns)] = value
+		else:
+			matrix = [array("d", [missing]) * len(secondNames) for _ in firstNames]
+			for level in levels:
+				for rows, columns, value in level:
+					for row in rows:
+						matrixRow = matrix[row]
+						for column in columns:
+							matrixRow[column] = value
+		return firstNames, secondNames, matrix
+
+
+class KerningBatch(object):
+	"""Collects kerning changes for one master and applies them at once:
+
+		with font.kerningBatch(master.id) as batch:
+			batch["T", "o"] = -40
+			batch["@MMK_L_T", "@MMK_R_A"] = -75
+			batch.update(generatedPairs)  # {(first, second): value} or {first: {second: value}}
+			del batch["T", "a"]
+
+	The glyph names of all changes are checked in one pass when the batch is
+	applied. If the block raises an exception, nothing is changed. Keys that are
+	not non empty strings raise a KeyError when they are added.
+	"""
+
+	def __init__(self, font, masterId, direction=GSLTR):
+		self.font = font
+		self.masterId = masterId
+		self.direction = direction
+		# (first, second): value, None to remove the pair
+		self._changes = {}
+
+	def __repr__(self):
+		return "<KerningBatch %s %d changes>" % (self.masterId, len(self._changes))
+
+	def __len__(self):
+		return len(self._changes)
+
+	@staticmethod
+	def _pair(first, second):
+		for key in (first, second):
+			if not (isinstance(key, str) and key):
+				raise KeyError("Invalid kerning key: %r" % (key,))
+		return (first, second)
+
+	def __setitem__(self, pair, value):
+		first, second = pair
+		self._changes[self._pair(first, second)] = value
+
+	def __delitem__(self, pair):
+		first, second = pair
+		self._changes[self._pair(first, second)] = None
+
+	def update(self, pairs):
+		"""Add the pairs of a {(first, second): value} or {first: {second: value}} dict. None removes a pair."""
+		changes = {}
+		for key, value in pairs.items():
+			if isinstance(value, dict):
+				for second, secondValue in value.items():
+					changes[self._pair(key, second)] = secondValue
+			else:
+				first, second = key
+				changes[self._pair(first, second)] = value
+		# all or nothing, an invalid key doesn't leave half of the pairs in the batch
+		self._changes.update(changes)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exceptionType, exceptionValue, traceback):
+		if exceptionType is None:
+			self.apply()
+		else:
+			self._changes = {}
+		return False
+
+	def apply(self):
+		"""Apply the collected changes. Called at the end of the with block."""
+		changes = self._changes
+		self._changes = {}
+		if changes:
+			self.font._applyKerningChanges(self.masterId, changes, self.direction)
+
+
+class _PairTable(object):
+	"""The pairs of one master in compressed sparse rows: the second keys and values of all
+	rows in two arrays, in the order of the file. Keys are indexes into CompactKerning.keys.
+	For lookups, the second keys of each row are also kept sorted, with their positions."""
+	__slots__ = ("_keyIndexes", "_keys", "rowKeys", "rowStarts", "columns", "values", "_rows", "_sortedColumns", "_sortedPositions")
+
+	def __init__(self, masterKerning, keyIndexes, keys):
+		self._keyIndexes = keyIndexes
+		self._keys = keys
+		self.rowKeys = array("i")
+		self.rowStarts = array("i", [0])
+		self.columns = array("i")
+		self.values = array("d")
+		for first, seconds in masterKerning.items():
+			self.rowKeys.append(_intern(first, keyIndexes, keys))
+			for second, value in seconds.items():
+				self.columns.append(_intern(second, keyIndexes, keys))
+				self.values.append(value)
+			self.rowStarts.append(len(self.columns))
+		# first key index: row
+		self._rows = dict((key, row) for row, key in enumerate(self.rowKeys))
+		self._sortedColumns = array("i")
+		self._sortedPositions = array("i")
+		columns = self.columns
+		for row in range(len(self.rowKeys)):
+			positions = sorted(range(self.rowStarts[row], self.rowStarts[row + 1]), key=columns.__getitem__)
+			self._sortedPositions.extend(positions)
+			self._sortedColumns.extend(columns[position] for position in positions)
+
+	def __len__(self):
+		return len(self.columns)
+
+	def _position(self, key):
+		first, second = key
+		row = self._rows.get(self._keyIndexes.get(first))
+		column = self._keyIndexes.get(second)
+		if row is None or column is None:
+			return None
+		stop = self.rowStarts[row + 1]
+		index = bisect_left(self._sortedColumns, column, self.rowStarts[row], stop)
+		if index < stop and self._sortedColumns[index] == column:
+			return self._sortedPositions[index]
+		return None
+
+	def get(self, key, default=None):
+		position = self._position(key)
+		if position is None:
+			return default
+		return _number(self.values[position])
+
+	def __contains__(self, key):
+		return self._position(key) is not None
+
+	def items(self):
+		keys = self._keys
+		values = self.values
+		for row, first in enumerate(self.rowKeys):
+			first = keys[first]
+			for position in range(self.rowStarts[row], self.rowStarts[row + 1]):
+				yield (first, keys[self.columns[position]]), _number(values[position])
+
+	def toDict(self):
+		keys = self._keys
+		result = {}
+		for row, first in enumerate(self.rowKeys):
+			start, stop = self.rowStarts[row], self.rowStarts[row + 1]
+			result[keys[first]] = dict(
+				(keys[column], _number(value)) for column, value in zip(self.columns[start:stop], self.values[start:stop])
+			)
+		return result
+
+
+def _intern(key, keyIndexes, keys):
+	index = keyIndexes.get(key)
+	if index is None:
+		index = keyIndexes[key] = len(keys)
+		keys.append(key)
+	return index
+
+
+def _number(value):
+	# the values are stored as double, integral ones are given back as int
+	return int(value) if value.is_integer() else value
+
+
+class CompactKerning(KerningIndex):
+	"""The kerning of one direction of a font in a compact form.
+
+	Every key (glyph name or group key) is stored once in `keys`; the pairs of
+	each master are kept in compressed sparse rows of int and double arrays,
+	in the order of the file. Lookups work like in KerningIndex. It is read
+	only; the analysis functions find pairs that can be removed without
+	changing the kerning, and toKerningDict() gives the dict to store in the font:
+
+		compact = CompactKerning(font)
+		for masterId, pairs in compact.redundantPairs().items():
+			print(masterId, len(pairs))
+		font.kerningLTR = compact.toKerningDict(removeRedundant=True)
+	"""
+
+	def __init__(self, font, direction=GSLTR):
+		self.keys = []
+		self._keyIndexes = {}
+		KerningIndex.__init__(self, font, direction)
+		# the glyphs of each group key, to check group pairs
+		self._members = {}
+		for groups in (self._firstGroups, self._secondGroups):
+			for name, group in groups.items():
+				if group:
+					self._members.setdefault(group, []).append(name)
+
+	def __repr__(self):
+		return "<CompactKerning %d keys, %d pairs, %d masters>" % (len(self.keys), sum(len(table) for table in self._pairs.values()), len(self._pairs))
+
+	def _readPairs(self, masterKerning):
+		return _PairTable(masterKerning, self._keyIndexes, self.keys)
+
+	def _setValue(self, masterId, first, second, value):
+		raise TypeError("CompactKerning is read only")
+
+	_removeValue = _updateValues = _setValue
+
+	def toKerningDict(self, removeRedundant=False):
+		"""The kerning as {master id: {first key: {second key: value}}}, the layout of the file."""
+		redundant = self.redundantPairs() if removeRedundant else {}
+		result = {}
+		for masterId, table in self._pairs.items():
+			masterKerning = table.toDict()
+			for first, second in redundant.get(masterId, ()):
+				seconds = masterKerning[first]
+				del seconds[second]
+				if not seconds:
+					del masterKerning[first]
+			result[masterId] = masterKerning
+		return result
+
+	def zeroPairs(self, masterId=None):
+		"""{master id: [(first, second), ...]} for pairs with the value 0."""
+		masterIds = self._pairs if masterId is None else [masterId]
+		result = {}
+		for masterId in masterIds:
+			table = self._pairs[masterId]
+			result[masterId] = [key for key, value in table.items() if value == 0]
+		return result
+
+	def _fallbackKeys(self, first, second):
+		# the less specific pairs that apply to a pair of glyphs if (first, second) is removed
+		firstGroup = None if _isGroupKey(first) else self._firstGroups.get(first)
+		secondGroup = None if _isGroupKey(second) else self._secondGroups.get(second)
+		keys = []
+		if secondGroup:
+			keys.append((first, secondGroup))
+		if firstGroup:
+			keys.append((firstGroup, second))
+			if secondGroup:
+				keys.append((firstGroup, secondGroup))
+		return keys
+
+	def _effectiveValue(self, pairs, first, second, removed):
+		# the value for a glyph pair if the pairs in `removed` didn't exist
+		for key in [(first, second)] + self._fallbackKeys(first, second):
+			if key in removed:
+				continue
+			value = pairs.get(key)
+			if value is not None:
+				return value
+		return 0
+
+	def _affectedGlyphPairs(self, first, second):
+		# all pairs of glyph names that a pair of keys applies to
+		firsts = self._members.get(first, ()) if _isGroupKey(first) else (first,)
+		seconds = self._members.get(second, ()) if _isGroupKey(second) else (second,)
+		for firstName in firsts:
+			for secondName in seconds:
+				yield firstName, secondName
+
+	def redundantPairs(self, masterId=None):
+		"""{master id: [(first, second), ...]} for pairs that can be removed without changing the kerning of any
+		glyph pair: exceptions with the same value as the group kerning they override, and pairs with the value 0
+		that don't override anything. The pairs are checked from the most to the least specific, each one
+		as if the pairs found before were removed already, so all of them can be removed together.
+		Pairs of glyphs or groups that are not in the font are kept."""
+		masterIds = list(self._pairs) if masterId is None else [masterId]
+		result = {}
+		for masterId in masterIds:
+			pairs = self._pairs[masterId]
+			removed = set()
+			levels = ([], [], [], [])
+			for key, value in pairs.items():
+				first, second = key
+				levels[(0 if _isGroupKey(first) else 2) + (0 if _isGroupKey(second) else 1)].append((key, value))
+			for level in reversed(levels):
+				for key, value in level:
+					first, second = key
+					if not _isGroupKey(first) and first not in self._firstGroups:
+						continue
+					if not _isGroupKey(second) and second not in self._secondGroups:
+						continue
+					glyphPairs = list(self._affectedGlyphPairs(first, second))
+					if not glyphPairs:
+						continue
+					unchanged = True
+					for firstName, secondName in glyphPairs:
+						current = self._effectiveValue(pairs, firstName, secondName, removed)
+						removed.add(key)
+						after = self._effectiveValue(pairs, firstName, secondName, removed)
+						removed.discard(key)
+						if current != after:
+							unchanged = False
+							break
+					if unchanged:
+						removed.add(key)
+			result[masterId] = [key for key, value in pairs.items() if key in removed]
+		return result
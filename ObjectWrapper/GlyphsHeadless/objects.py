@@ -0,0 +1,2964 @@
+# encoding: utf-8
+
+"""The object model of the GlyphsApp module as plain Python objects.
+
+The classes have the same names and the same documented properties and
+methods as their counterparts inside the app (see ObjectWrapper/GlyphsApp), so
+scripts written against them run on any machine with Python 3:
+
+	font = GSFont("Font.glyphs")
+	for glyph in font.glyphs:
+		layer = glyph.layers[font.masters[0].id]
+		for path in layer.paths:
+			for node in path.nodes:
+				node.position = (node.position.x + 10, node.position.y)
+	font.save()
+
+Only version 3 files (and .glyphspackage bundles) can be read. Everything the
+objects don't model is kept as it was read and written back unchanged, so
+opening and saving a file doesn't change it.
+
+All classes use __slots__ to keep the memory footprint of big fonts small.
+"""
+
+from __future__ import print_function
+
+import copy
+import itertools
+import math
+import os
+import uuid
+
+from array import array
+from collections import namedtuple
+
+from glyphsParser import load
+from glyphsPackage import GlyphsPackageReader
+from glyphsWriter import writeFont, writePackage
+
+from .constants import (
+	LINE, CURVE, OFFCURVE, QCURVE, GSLTR, GSRTL, GSVertical, GSVerticalToRight, GSShapeTypePath, GSShapeTypeComponent,
+	GSMetricsKeyAscender, GSMetricsKeyCapHeight, GSMetricsKeyxHeight, GSMetricsKeyDescender, GSMetricsKeyItalicAngle,
+	nodeTypeCodes, nodeTypesForCodes,
+)
+from .kerning import KerningIndex, KerningBatch
+from .snapshot import fontSnapshot
+
+__all__ = [
+	"GSFont", "GSFontMaster", "GSAxis", "GSInstance", "GSCustomParameter", "GSGlyph", "GSLayer", "GSBackgroundLayer",
+	"GSShape", "GSPath", "GSNode", "GSComponent", "GSAnchor",
+	"NSPoint", "NSSize", "NSRect", "NSMakePoint", "NSMakeRect",
+	"Proxy",
+]
+
+NSPoint = namedtuple("NSPoint", "x y")
+NSSize = namedtuple("NSSize", "width height")
+NSRect = namedtuple("NSRect", "origin size")
+
+
+def NSMakePoint(x, y):
+	return NSPoint(x, y)
+
+
+def NSMakeRect(x, y, width, height):
+	return NSRect(NSPoint(x, y), NSSize(width, height))
+
+
+_emptyRect = NSMakeRect(0, 0, 0, 0)
+
+# shared by all paths, so a new path never gets the version of a path it replaces
+_coordinatesVersions = itertools.count()
+
+
+def isString(value):
+	return isinstance(value, str)
+
+
+def _number(value):
+	# keep integral values as int so they are written without decimals
+	if isinstance(value, float) and value.is_integer():
+		return int(value)
+	return value
+
+
+def _newId():
+	return str(uuid.uuid4()).upper()
+
+
+##################################################################################
+#
+#
+#
+#           GEOMETRY HELPERS
+#
+#
+#
+##################################################################################
+
+
+def _cubicExtrema(p0, p1, p2, p3):
+	# t values in (0, 1) where the derivative of one coordinate is zero
+	a = -p0 + 3 * p1 - 3 * p2 + p3
+	b = 2 * (p0 - 2 * p1 + p2)
+	c = p1 - p0
+	if abs(a) < 1e-12:
+		if abs(b) < 1e-12:
+			return []
+		return [t for t in (-c / b,) if 0 < t < 1]
+	discriminant = b * b - 4 * a * c
+	if discriminant < 0:
+		return []
+	root = math.sqrt(discriminant)
+	return [t for t in ((-b + root) / (2 * a), (-b - root) / (2 * a)) if 0 < t < 1]
+
+
+def _cubicPoint(p0, p1, p2, p3, t):
+	mt = 1 - t
+	return mt * mt * mt * p0 + 3 * mt * mt * t * p1 + 3 * mt * t * t * p2 + t * t * t * p3
+
+
+def _segmentBounds(segment):
+	xs = [segment[0][0], segment[-1][0]]
+	ys = [segment[0][1], segment[-1][1]]
+	if len(segment) == 3:
+		# quadratic, raised to cubic
+		(x0, y0), (x1, y1), (x2, y2) = segment
+		segment = ((x0, y0), (x0 + 2 * (x1 - x0) / 3, y0 + 2 * (y1 - y0) / 3), (x2 + 2 * (x1 - x2) / 3, y2 + 2 * (y1 - y2) / 3), (x2, y2))
+	if len(segment) == 4:
+		(x0, y0), (x1, y1), (x2, y2), (x3, y3) = segment
+		for t in _cubicExtrema(x0, x1, x2, x3):
+			xs.append(_cubicPoint(x0, x1, x2, x3, t))
+		for t in _cubicExtrema(y0, y1, y2, y3):
+			ys.append(_cubicPoint(y0, y1, y2, y3, t))
+	return min(xs), min(ys), max(xs), max(ys)
+
+
+def _unionBounds(bounds):
+	bounds = [box for box in bounds if box is not None]
+	if not bounds:
+		return None
+	return (min(box[0] for box in bounds), min(box[1] for box in bounds), max(box[2] for box in bounds), max(box[3] for box in bounds))
+
+
+def _rectFromBounds(bounds):
+	if bounds is None:
+		return _emptyRect
+	xMin, yMin, xMax, yMax = bounds
+	return NSMakeRect(xMin, yMin, xMax - xMin, yMax - yMin)
+
+
+def _transformPoint(transform, x, y):
+	a, b, c, d, tx, ty = transform
+	return a * x + c * y + tx, b * x + d * y + ty
+
+
+def _multiplyTransforms(first, second):
+	# apply `first`, then `second`
+	a1, b1, c1, d1, x1, y1 = first
+	a2, b2, c2, d2, x2, y2 = second
+	return (
+		a1 * a2 + b1 * c2, a1 * b2 + b1 * d2,
+		c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+		x1 * a2 + y1 * c2 + x2, x1 * b2 + y1 * d2 + y2,
+	)
+
+
+##################################################################################
+#
+#
+#
+#           PROXIES
+#
+#
+#
+##################################################################################
+
+
+class Proxy(object):
+	"""List-like access to the children of an object, like the proxies of the GlyphsApp module."""
+	__slots__ = ("_owner",)
+
+	def __init__(self, owner):
+		self._owner = owner
+
+	def __str__(self):
+		"""Return list-lookalike of representation string of objects"""
+		strings = [str(item) for item in self]
+		if len(strings) == 0:
+			return "()"
+		return "(\n\t%s\n)" % (',\n\t'.join(strings))
+
+	def __repr__(self):
+		return "(%s)" % ", ".join(repr(item) for item in self.values())
+
+	def __len__(self):
+		return len(self.values())
+
+	def pop(self, idx=-1):
+		if isinstance(idx, int):
+			node = self[idx]
+			del self[idx]
+			return node
+		else:
+			raise (KeyError)
+
+	def __delitem__(self, key):
+		if isinstance(key, slice):
+			self.removeMany(range(*key.indices(self.__len__())))
+			return
+		elif isinstance(key, int):
+			idx = self._validate_idx(key)
+			self.removeItemAtIndexMethod()(idx)
+		else:
+			raise TypeError("list indices must be integers, not %s" % type(key).__name__)
+
+	def __iter__(self):
+		return iter(self.values())
+
+	def values(self):
+		raise AttributeError("This collection does not support item iteration")
+
+	def index(self, value):
+		return self.values().index(value)
+
+	def __copy__(self):
+		return list(self)
+
+	def __deepcopy__(self, memo):
+		return [x.copy() for x in self.values()]
+
+	def copy(self):
+		return self.__copy__()
+
+	def count(self, value):
+		return list(self).count(value)
+
+	def __contains__(self, key):
+		return key in self.values()
+
+	def clear(self):
+		if self._canReplaceAll():
+			self.setter([])
+			return
+		for i in range(len(self) - 1, -1, -1):
+			self.__delitem__(i)
+
+	def __add__(self, value):
+		return list(self).__add__(list(value))
+
+	def __iadd__(self, value):
+		self.extend(value)
+		return self
+
+	def __mul__(self, value):
+		return list(self).__mul__(value)
+
+	def __imul__(self, value):
+		if not isinstance(value, int):
+			raise TypeError("can't multiply sequence by non-int of type %s" % type(value).__name__)
+		if value <= 0:
+			self.clear()
+		if value <= 1:
+			return self
+		old_values = self.copy()
+		for _ in range(value - 1):
+			self.extend([item.copy() for item in old_values])
+		return self
+
+	def extend(self, value):
+		for e in value:
+			self.append(e)
+
+	def _canReplaceAll(self):
+		if type(self).setter is not Proxy.setter:
+			return True
+		try:
+			self.setterMethod()
+		except AttributeError:
+			return False
+		return True
+
+	def _indexesForItems(self, items, values):
+		# indexes in `values` of the items, given as indexes, strings (compared by value) or objects (by identity)
+		count = len(values)
+		indexes = set()
+		objects = set()
+		strings = set()
+		for item in items:
+			if isinstance(item, int):
+				idx = item + count if item < 0 else item
+				if not 0 <= idx < count:
+					raise IndexError("list index %s out of range %s" % (item, count))
+				indexes.add(idx)
+			elif isString(item):
+				strings.add(item)
+			else:
+				objects.add(id(item))
+		if objects or strings:
+			for idx, value in enumerate(values):
+				if id(value) in objects or (strings and isString(value) and value in strings):
+					indexes.add(idx)
+		return indexes
+
+	def replaceAll(self, values):
+		"""Replace all items with one change."""
+		self.setter(list(values) if values is not None else [])
+
+	def removeMany(self, items):
+		"""Remove items, given as objects or indexes, with one change. Objects that are not in the collection are ignored."""
+		values = list(self)
+		indexes = self._indexesForItems(items, values)
+		if not indexes:
+			return
+		if self._canReplaceAll():
+			self.setter([value for idx, value in enumerate(values) if idx not in indexes])
+			return
+		for idx in sorted(indexes, reverse=True):
+			self.__delitem__(idx)
+
+	def __eq__(self, other):
+		return list(self).__eq__(list(other))
+
+	def __ne__(self, other):
+		return list(self).__ne__(list(other))
+
+	def _validate_idx(self, idx, offset=0):
+		"""Handle negative indices and check for IndexError
+		Use offset to adjust the valid range, e.g. for insert len(self) is
+		still a valid index.
+		"""
+		if not isinstance(idx, int):
+			raise TypeError("indices must be integers, not %s" % type(idx).__name__)
+		if idx < 0:
+			idx += self.__len__()
+		if not (0 <= idx < self.__len__() + offset):
+			raise IndexError("list index %s out of range %s" % (idx, self.__len__() + offset))
+		return idx
+
+	def removeItemAtIndexMethod(self):
+		raise AttributeError("This collection does not support removing items")
+
+	def setterMethod(self):
+		raise AttributeError("This collection cannot be directly overwritten")
+
+	def setter(self, values):
+		method = self.setterMethod()
+		if isinstance(values, (list, tuple, type(self))):
+			method(list(values))
+		elif values is None:
+			method([])
+		else:
+			raise TypeError("Cant set value of type %s" % type(values).__name__)
+
+
+class _ListProxy(Proxy):
+	# a proxy for a plain list of child objects stored in `_owner.<_attribute>`
+	__slots__ = ()
+	_attribute = None
+	_itemClass = None
+
+	def values(self):
+		return getattr(self._owner, self._attribute)
+
+	def __getitem__(self, idx):
+		if isinstance(idx, slice):
+			return self.values().__getitem__(idx)
+		elif isinstance(idx, int):
+			idx = self._validate_idx(idx)
+			return self.values()[idx]
+		raise TypeError("list indices must be integers or slices, not %s" % type(idx).__name__)
+
+	def __setitem__(self, idx, item):
+		self._check(item)
+		idx = self._validate_idx(idx)
+		values = self.values()
+		values[idx].parent = None
+		item.parent = self._owner
+		values[idx] = item
+		self._didChange()
+
+	def _didChange(self):
+		pass
+
+	def _check(self, item):
+		if self._itemClass is not None and not isinstance(item, self._itemClass):
+			raise TypeError("only %s objects are accepted, not %s" % (self._itemClass.__name__, type(item).__name__))
+
+	def _removeAtIndex(self, idx):
+		item = self.values().pop(idx)
+		item.parent = None
+		self._didChange()
+
+	def removeItemAtIndexMethod(self):
+		return self._removeAtIndex
+
+	def append(self, item):
+		self._check(item)
+		item.parent = self._owner
+		self.values().append(item)
+		self._didChange()
+
+	def extend(self, items):
+		self._setValues(self.values() + list(items))
+
+	def insert(self, idx, item):
+		self._check(item)
+		idx = self._validate_idx(idx, offset=1)
+		item.parent = self._owner
+		self.values().insert(idx, item)
+		self._didChange()
+
+	def remove(self, item):
+		self.values().remove(item)
+		item.parent = None
+		self._didChange()
+
+	def _setValues(self, values):
+		for item in values:
+			self._check(item)
+		for item in self.values():
+			item.parent = None
+		for item in values:
+			item.parent = self._owner
+		setattr(self._owner, self._attribute, list(values))
+		self._didChange()
+
+	def setterMethod(self):
+		return self._setValues
+
+
+class FontGlyphsProxy(Proxy):
+	"""The list of glyphs. You can access it with the idx or the glyph name.
+	Usage:
+		Font.glyphs[idx]
+		Font.glyphs[name]
+		for glyph in Font.glyphs:
+		    ...
+	"""
+	__slots__ = ()
+
+	def __getitem__(self, key):
+		if isinstance(key, slice):
+			return self.values().__getitem__(key)
+		# by idx
+		if isinstance(key, int):
+			idx = self._validate_idx(key)
+			return self._owner._glyphs[idx]
+		if isString(key):
+			return self._owner._glyphForKey(key)
+		raise TypeError("key for glyphs must be int or str, not %s" % type(key).__name__)
+
+	def __setitem__(self, key, glyph):
+		if not isinstance(glyph, GSGlyph):
+			raise TypeError("Cannot add %s, not a Glyph" % glyph)
+		if isinstance(key, int):
+			idx = self._validate_idx(key)
+			self._owner._removeGlyph(self._owner._glyphs[idx])
+			self._owner._addGlyph(glyph)
+		elif isString(key):
+			oldGlyph = self._owner._glyphsByName.get(key)
+			if oldGlyph is not None:
+				self._owner._removeGlyph(oldGlyph)
+			if glyph.name != key:
+				glyph.name = key
+			self._owner._addGlyph(glyph)
+		else:
+			raise TypeError("key for glyphs must be int or str, not %s" % type(key).__name__)
+
+	def __delitem__(self, key):
+		if isinstance(key, slice):
+			self.removeMany(range(*key.indices(self.__len__())))
+			return
+		elif isinstance(key, int):
+			idx = self._validate_idx(key)
+			self._owner._removeGlyph(self._owner._glyphs[idx])
+		elif isString(key):
+			glyph = self._owner._glyphsByName.get(key)
+			if glyph is not None:
+				self._owner._removeGlyph(glyph)
+		else:
+			raise TypeError("key for glyphs must be int or str, not %s" % type(key).__name__)
+
+	def __contains__(self, item):
+		if isString(item):
+			return item in self._owner._glyphsByName
+		return item.parent is self._owner and item in self._owner._glyphs
+
+	def keys(self):
+		return [glyph.name for glyph in self._owner._glyphs]
+
+	def values(self):
+		return self._owner._glyphs
+
+	def items(self):
+		for value in self._owner._glyphs:
+			yield (value.name, value)
+
+	def append(self, Glyph):
+		if not isinstance(Glyph, GSGlyph):
+			raise TypeError("Cannot add %s, not a Glyph" % Glyph)
+		if Glyph.name not in self:
+			self._owner._addGlyph(Glyph)
+		else:
+			raise NameError('There is a glyph with the name \"%s\" already in the font.' % Glyph.name)
+
+	def extend(self, objects):
+		objects = list(objects)
+		names = set()
+		for glyph in objects:
+			if not isinstance(glyph, GSGlyph):
+				raise TypeError("Cannot add %s, not a Glyph" % glyph)
+			if glyph.name in self or glyph.name in names:
+				raise NameError('There is a glyph with the name \"%s\" already in the font.' % glyph.name)
+			names.add(glyph.name)
+		for glyph in objects:
+			self._owner._addGlyph(glyph)
+
+	def remove(self, glyph):
+		self._owner._removeGlyph(glyph)
+
+	def removeMany(self, items):
+		"""Remove glyphs, given as glyphs, names or indexes, with one change."""
+		resolved = []
+		missing = []
+		for item in items:
+			if isString(item):
+				glyph = self._owner._glyphsByName.get(item)
+				if glyph is None:
+					missing.append(item)
+				item = glyph
+			resolved.append(item)
+		if missing:
+			raise KeyError("Glyphs with name: %s not found" % ", ".join(missing))
+		Proxy.removeMany(self, resolved)
+
+	def __len__(self):
+		return len(self._owner._glyphs)
+
+	def setterMethod(self):
+		return self._owner._setGlyphs
+
+
+class FontFontMasterProxy(_ListProxy):
+	__slots__ = ()
+	_attribute = "_masters"
+
+	def __getitem__(self, key):
+		if isString(key):
+			for master in self._owner._masters:
+				if master.id == key:
+					return master
+			for master in self._owner._masters:
+				if master.name == key:
+					return master
+			return None
+		return _ListProxy.__getitem__(self, key)
+
+
+class FontAxesProxy(_ListProxy):
+	__slots__ = ()
+	_attribute = "_axes"
+
+
+class FontInstancesProxy(_ListProxy):
+	__slots__ = ()
+	_attribute = "_instances"
+
+
+class CustomParametersProxy(_ListProxy):
+	"""Custom parameters by name or index: object.customParameters["trademark"]"""
+	__slots__ = ()
+	_attribute = "_customParameters"
+
+	def __getitem__(self, key):
+		if isString(key):
+			for parameter in self._owner._customParameters:
+				if parameter.name == key and parameter.active:
+					return parameter.value
+			return None
+		return _ListProxy.__getitem__(self, key)
+
+	def __setitem__(self, key, value):
+		if isString(key):
+			for parameter in self._owner._customParameters:
+				if parameter.name == key:
+					parameter.value = value
+					return
+			self.append(GSCustomParameter(key, value))
+			return
+		_ListProxy.__setitem__(self, key, value)
+
+	def __delitem__(self, key):
+		if isString(key):
+			for parameter in list(self._owner._customParameters):
+				if parameter.name == key:
+					self.remove(parameter)
+			return
+		_ListProxy.__delitem__(self, key)
+
+	def __contains__(self, key):
+		if isString(key):
+			return any(parameter.name == key for parameter in self._owner._customParameters)
+		return key in self._owner._customParameters
+
+
+class GlyphLayerProxy(Proxy):
+	__slots__ = ()
+
+	def __getitem__(self, key):
+		if isinstance(key, slice):
+			return self._owner._orderedLayers().__getitem__(key)
+		elif isinstance(key, int):
+			layers = self._owner._orderedLayers()
+			count = len(layers)
+			if key < 0:
+				key += count
+			if not 0 <= key < count:
+				raise IndexError("list index %s out of range %s" % (key, count))
+			return layers[key]
+		elif isString(key):
+			layer = self._owner._layerForId(key)
+			if layer is None:
+				for layer in self._owner._layers:
+					if layer.name == key:
+						return layer
+				return None
+			return layer
+		else:
+			raise TypeError("keys must be integers or strings, not %s" % type(key).__name__)
+
+	def __setitem__(self, key, Layer):
+		if isinstance(key, int) and self._owner.parent:
+			idx = self._validate_idx(key)
+			key = self._owner.parent._masters[idx].id
+		if not isString(key):
+			raise TypeError("keys must be integers or strings, not %s" % type(key).__name__)
+		self._owner._setLayerForId(Layer, key)
+
+	def __delitem__(self, key):
+		if isinstance(key, slice):
+			self.removeMany(range(*key.indices(self.__len__())))
+			return
+		elif isinstance(key, int):
+			idx = self._validate_idx(key)
+			key = self.__getitem__(idx).layerId
+		elif not isString(key):
+			raise TypeError("keys must be integers or strings, not %s" % type(key).__name__)
+		self._owner._removeLayerForId(key)
+
+	def __iter__(self):
+		return iter(self._owner._orderedLayers())
+
+	def __len__(self):
+		return len(self._owner._layers)
+
+	def values(self):
+		return self._owner._layers
+
+	def append(self, Layer):
+		if not Layer.associatedMasterId and self._owner.parent and self._owner.parent._masters:
+			Layer.associatedMasterId = self._owner.parent._masters[0].id
+		self._owner._setLayerForId(Layer, _newId())
+
+	def remove(self, Layer):
+		self._owner._removeLayerForId(Layer.layerId)
+
+	def removeMany(self, items):
+		# keep the order the other layers are stored in
+		indexes = self._indexesForItems(items, self._owner._orderedLayers())
+		if not indexes:
+			return
+		removed = set(id(layer) for idx, layer in enumerate(self._owner._orderedLayers()) if idx in indexes)
+		self._owner._setLayers([layer for layer in self._owner._layers if id(layer) not in removed])
+
+	def insert(self, idx, Layer):
+		idx = self._validate_idx(idx, offset=1)
+		self.append(Layer)
+
+	def setter(self, values):
+		if isinstance(values, (list, tuple, type(self))):
+			layers = list(values)
+		elif isinstance(values, dict):
+			layers = []
+			for (key, layer) in values.items():
+				layer.layerId = key
+				layers.append(layer)
+		else:
+			raise TypeError
+		self._owner._setLayers(layers)
+
+
+class LayerShapesProxy(_ListProxy):
+	__slots__ = ()
+	_attribute = "_shapes"
+
+	def _check(self, item):
+		if not isinstance(item, GSShape):
+			raise TypeError("only GSShape objects are accepted, not %s" % type(item).__name__)
+
+	def _didChange(self):
+		self._owner._structureChanged()
+
+
+class LayerAnchorsProxy(Proxy):
+	"""layer.anchors is a dict!!!"""
+	__slots__ = ()
+
+	def __getitem__(self, key):
+		if isString(key):
+			for anchor in self._owner._anchors:
+				if anchor.name == key:
+					return anchor
+			return None
+		if isinstance(key, int):
+			if -len(self._owner._anchors) <= key < len(self._owner._anchors):
+				return self._owner._anchors[key]
+			raise IndexError("anchor index out of range")
+		else:
+			raise TypeError("keys must be integers or strings, not %s" % type(key).__name__)
+
+	def __setitem__(self, key, Anchor):
+		if isString(key):
+			Anchor.name = key
+			self.append(Anchor)
+		else:
+			raise TypeError("keys must be strings, not %s" % type(key).__name__)
+
+	def __delitem__(self, key):
+		anchor = self.__getitem__(key)
+		if anchor is not None:
+			self.remove(anchor)
+
+	def items(self):
+		return [(anchor.name, anchor) for anchor in self._owner._anchors]
+
+	def values(self):
+		return self._owner._anchors
+
+	def keys(self):
+		return [anchor.name for anchor in self._owner._anchors]
+
+	def __contains__(self, key):
+		if isString(key):
+			return key in self.keys()
+		return key in self._owner._anchors
+
+	def append(self, Anchor):
+		# like in the app, an anchor replaces the one with the same name
+		old = self.__getitem__(Anchor.name)
+		if old is not None:
+			self.remove(old)
+		Anchor.parent = self._owner
+		self._owner._anchors.append(Anchor)
+		self._owner._structureChanged()
+
+	def remove(self, Anchor):
+		self._owner._anchors.remove(Anchor)
+		Anchor.parent = None
+		self._owner._structureChanged()
+
+	def insert(self, idx, Anchor):
+		self.append(Anchor)
+
+	def setter(self, values):
+		if isinstance(values, dict):
+			values = list(values.values())
+		elif values is None:
+			values = []
+		elif isinstance(values, (list, tuple, type(self))):
+			values = list(values)
+		else:
+			raise TypeError
+		for anchor in self._owner._anchors:
+			anchor.parent = None
+		self._owner._anchors = []
+		self._owner._structureChanged()
+		for anchor in values:
+			self.append(anchor)
+
+
+class PathNodesProxy(Proxy):
+	"""The nodes of a path. The nodes are stored in arrays in the path, the GSNode objects are views on them."""
+	__slots__ = ()
+
+	def __getitem__(self, idx):
+		if isinstance(idx, slice):
+			return [GSNode._view(self._owner, i) for i in range(*idx.indices(self.__len__()))]
+		elif isinstance(idx, int):
+			idx = self._validate_idx(idx)
+			return GSNode._view(self._owner, idx)
+		raise TypeError("list indices must be integers or slices, not %s" % type(idx).__name__)
+
+	def __setitem__(self, idx, node):
+		self._check(node)
+		idx = self._validate_idx(idx)
+		self._owner._setNode(idx, node)
+
+	def __len__(self):
+		return len(self._owner._types)
+
+	def __iter__(self):
+		path = self._owner
+		return (GSNode._view(path, idx) for idx in range(len(path._types)))
+
+	def values(self):
+		return list(self.__iter__())
+
+	def _check(self, item):
+		if not isinstance(item, GSNode):
+			raise TypeError("only GSNode objects are accepted, not %s" % type(item).__name__)
+
+	def index(self, node):
+		if node._path is self._owner and node._index < len(self._owner._types):
+			return node._index
+		raise ValueError("%s is not in list" % node)
+
+	def __contains__(self, node):
+		return isinstance(node, GSNode) and node._path is self._owner and node._index < len(self._owner._types)
+
+	def _removeAtIndex(self, idx):
+		self._owner._removeNodes(idx, idx + 1)
+
+	def removeItemAtIndexMethod(self):
+		return self._removeAtIndex
+
+	def pop(self, idx=-1):
+		if isinstance(idx, int):
+			idx = self._validate_idx(idx)
+			node = GSNode._view(self._owner, idx).copy()
+			self._removeAtIndex(idx)
+			return node
+		else:
+			raise (KeyError)
+
+	def __delitem__(self, key):
+		if isinstance(key, slice):
+			start, stop, step = key.indices(self.__len__())
+			if step == 1:
+				if start < stop:
+					self._owner._removeNodes(start, stop)
+				return
+		Proxy.__delitem__(self, key)
+
+	def append(self, node):
+		self.insert(self.__len__(), node)
+
+	def insert(self, idx, node):
+		self._check(node)
+		idx = self._validate_idx(idx, offset=1)
+		self._owner._insertNodes(idx, [node])
+		node._attach(self._owner, idx)
+
+	def extend(self, nodes):
+		nodes = list(nodes)
+		for node in nodes:
+			self._check(node)
+		start = self.__len__()
+		self._owner._insertNodes(start, nodes)
+		for idx, node in enumerate(nodes):
+			node._attach(self._owner, start + idx)
+
+	def remove(self, node):
+		self._removeAtIndex(self.index(node))
+
+	def removeMany(self, items):
+		# the nodes are views, so they are found by index
+		indexes = set()
+		for item in items:
+			indexes.add(self._validate_idx(item) if isinstance(item, int) else self.index(item))
+		if indexes:
+			self._owner._keepNodes([idx for idx in range(self.__len__()) if idx not in indexes])
+
+	def setterMethod(self):
+		return self._owner._setNodes
+
+##################################################################################
+#
+#
+#
+#           OBJECTS
+#
+#
+#
+##################################################################################
+
+
+class _GSObject(object):
+	"""Base of the model objects. Keys from the file that are not modeled are kept in `_extra`."""
+	__slots__ = ("_extra",)
+	# (key in the file, attribute) for values that are stored as they are
+	_fileKeys = ()
+
+	def _readKeys(self, data):
+		extra = dict(data)
+		for fileKey, name in self._fileKeys:
+			setattr(self, name, extra.pop(fileKey, None))
+		self._extra = extra
+		return extra
+
+	def _writeKeys(self, data):
+		for fileKey, name in self._fileKeys:
+			value = getattr(self, name)
+			if value is not None:
+				data[fileKey] = value
+		for key, value in self._extra.items():
+			data.setdefault(key, value)
+		return dict((key, data[key]) for key in sorted(data))
+
+	def _initKeys(self):
+		for _, name in self._fileKeys:
+			setattr(self, name, None)
+		self._extra = {}
+
+	def copy(self):
+		return copy.deepcopy(self)
+
+	def __deepcopy__(self, memo):
+		return type(self)._fromDict(self._toDict())
+
+
+class GSCustomParameter(_GSObject):
+	__slots__ = ("name", "value", "_disabled", "parent")
+	_fileKeys = (("name", "name"), ("value", "value"), ("disabled", "_disabled"))
+
+	def __init__(self, name=None, value=None):
+		self._initKeys()
+		self.name = name
+		self.value = value
+		self.parent = None
+
+	def __str__(self):
+		return "<GSCustomParameter %s: %s>" % (self.name, self.value)
+
+	__repr__ = __str__
+
+	@classmethod
+	def _fromDict(cls, data):
+		parameter = cls.__new__(cls)
+		parameter._readKeys(data)
+		parameter.parent = None
+		return parameter
+
+	def _toDict(self):
+		return self._writeKeys({})
+
+	@property
+	def active(self):
+		return not self._disabled
+
+	@active.setter
+	def active(self, value):
+		self._disabled = None if value else 1
+
+
+def _readCustomParameters(owner, extra):
+	owner._customParameters = []
+	for data in extra.pop("customParameters", None) or []:
+		parameter = GSCustomParameter._fromDict(data)
+		parameter.parent = owner
+		owner._customParameters.append(parameter)
+
+
+def _writeCustomParameters(owner, data):
+	if owner._customParameters:
+		data["customParameters"] = [parameter._toDict() for parameter in owner._customParameters]
+
+
+class GSAxis(_GSObject):
+	__slots__ = ("name", "axisTag", "_hidden", "parent")
+	_fileKeys = (("name", "name"), ("tag", "axisTag"), ("hidden", "_hidden"))
+
+	def __init__(self, name=None, tag=None):
+		self._initKeys()
+		self.name = name
+		self.axisTag = tag
+		self.parent = None
+
+	def __str__(self):
+		return "<GSAxis: \"%s\" (%s)>" % (self.name, self.axisTag)
+
+	__repr__ = __str__
+
+	@classmethod
+	def _fromDict(cls, data):
+		axis = cls.__new__(cls)
+		axis._readKeys(data)
+		axis.parent = None
+		return axis
+
+	def _toDict(self):
+		return self._writeKeys({})
+
+	@property
+	def hidden(self):
+		return bool(self._hidden)
+
+	@hidden.setter
+	def hidden(self, value):
+		self._hidden = 1 if value else None
+
+
+class GSFontMaster(_GSObject):
+	__slots__ = ("id", "name", "_axesValues", "iconName", "_visible", "userData", "_metricValues", "_customParameters", "parent")
+	_fileKeys = (
+		("id", "id"), ("name", "name"), ("axesValues", "_axesValues"), ("iconName", "iconName"),
+		("visible", "_visible"), ("userData", "userData"), ("metricValues", "_metricValues"),
+	)
+
+	def __init__(self, name=None):
+		self._initKeys()
+		self.id = _newId()
+		self.name = name
+		self._customParameters = []
+		self.parent = None
+
+	def __str__(self):
+		return "<GSFontMaster \"%s\" %s>" % (self.name, self.axes)
+
+	__repr__ = __str__
+
+	@classmethod
+	def _fromDict(cls, data):
+		master = cls.__new__(cls)
+		extra = master._readKeys(data)
+		_readCustomParameters(master, extra)
+		master.parent = None
+		return master
+
+	def _toDict(self):
+		data = {}
+		_writeCustomParameters(self, data)
+		return self._writeKeys(data)
+
+	@property
+	def font(self):
+		return self.parent
+
+	@property
+	def axes(self):
+		"""The axis coordinates of the master, in the order of font.axes."""
+		if self._axesValues is None:
+			self._axesValues = []
+		return self._axesValues
+
+	@axes.setter
+	def axes(self, values):
+		self._axesValues = [_number(value) for value in values]
+
+	@property
+	def visible(self):
+		return bool(self._visible)
+
+	@visible.setter
+	def visible(self, value):
+		self._visible = 1 if value else None
+
+	@property
+	def customParameters(self):
+		return CustomParametersProxy(self)
+
+	@customParameters.setter
+	def customParameters(self, value):
+		CustomParametersProxy(self).setter(value)
+
+	def _metricIndex(self, metricType):
+		if self.parent is None:
+			return None
+		for index, metric in enumerate(self.parent._metrics):
+			if metric.get("type") == metricType and not metric.get("filter"):
+				return index
+		return None
+
+	def _metricValue(self, metricType, key="pos"):
+		index = self._metricIndex(metricType)
+		if index is None or not self._metricValues or index >= len(self._metricValues):
+			return 0
+		return self._metricValues[index].get(key, 0)
+
+	def _setMetricValue(self, metricType, value, key="pos"):
+		index = self._metricIndex(metricType)
+		if index is None:
+			raise KeyError("The font has no %s metric" % metricType)
+		if self._metricValues is None:
+			self._metricValues = []
+		while len(self._metricValues) <= index:
+			self._metricValues.append({})
+		if value:
+			self._metricValues[index][key] = _number(value)
+		else:
+			self._metricValues[index].pop(key, None)
+
+	ascender = property(lambda self: self._metricValue(GSMetricsKeyAscender),
+						lambda self, value: self._setMetricValue(GSMetricsKeyAscender, value))
+	capHeight = property(lambda self: self._metricValue(GSMetricsKeyCapHeight),
+						 lambda self, value: self._setMetricValue(GSMetricsKeyCapHeight, value))
+	xHeight = property(lambda self: self._metricValue(GSMetricsKeyxHeight),
+					   lambda self, value: self._setMetricValue(GSMetricsKeyxHeight, value))
+	descender = property(lambda self: self._metricValue(GSMetricsKeyDescender),
+						 lambda self, value: self._setMetricValue(GSMetricsKeyDescender, value))
+	italicAngle = property(lambda self: self._metricValue(GSMetricsKeyItalicAngle),
+						   lambda self, value: self._setMetricValue(GSMetricsKeyItalicAngle, value))
+
+
+class GSInstance(_GSObject):
+	__slots__ = ("name", "_axesValues", "_exports", "userData", "_customParameters", "parent")
+	_fileKeys = (("name", "name"), ("axesValues", "_axesValues"), ("exports", "_exports"), ("userData", "userData"))
+
+	def __init__(self, name=None):
+		self._initKeys()
+		self.name = name
+		self._customParameters = []
+		self.parent = None
+
+	def __str__(self):
+		return "<GSInstance \"%s\" %s>" % (self.name, self.axes)
+
+	__repr__ = __str__
+
+	@classmethod
+	def _fromDict(cls, data):
+		instance = cls.__new__(cls)
+		extra = instance._readKeys(data)
+		_readCustomParameters(instance, extra)
+		instance.parent = None
+		return instance
+
+	def _toDict(self):
+		data = {}
+		_writeCustomParameters(self, data)
+		return self._writeKeys(data)
+
+	@property
+	def font(self):
+		return self.parent
+
+	@property
+	def axes(self):
+		if self._axesValues is None:
+			self._axesValues = []
+		return self._axesValues
+
+	@axes.setter
+	def axes(self, values):
+		self._axesValues = [_number(value) for value in values]
+
+	@property
+	def exports(self):
+		return self._exports is None or bool(self._exports)
+
+	@exports.setter
+	def exports(self, value):
+		self._exports = None if value else 0
+
+	active = exports
+
+	@property
+	def customParameters(self):
+		return CustomParametersProxy(self)
+
+	@customParameters.setter
+	def customParameters(self, value):
+		CustomParametersProxy(self).setter(value)
+
+
+# node types as stored in GSPath._types: the character code of the type in the file, plus _smoothFlag
+_smoothFlag = 0x80
+_typeMask = 0x7F
+_bytesForTypes = dict((nodeType, ord(code)) for nodeType, code in nodeTypeCodes.items())
+_typesForBytes = dict((byte, nodeType) for nodeType, byte in _bytesForTypes.items())
+_offCurveByte = _bytesForTypes[OFFCURVE]
+_lineByte = _bytesForTypes[LINE]
+# removes the smooth flag, for bytes.translate()
+_plainTypes = bytes(byte & _typeMask for byte in range(256))
+
+
+class GSNode(object):
+	"""A node. Nodes of a path are views on the arrays of the path (see GSPath); they are
+	created when they are accessed and are only valid until nodes are inserted or removed.
+	Nodes that are created with GSNode() keep their own values until they are added to a path."""
+	__slots__ = ("_path", "_index", "_x", "_y", "_byte", "_userData")
+
+	def __init__(self, pt=None, type=None, x=None, y=None, name=None, pointType=None):
+		if type is None and pointType is not None:
+			type = pointType
+		if pt is None:
+			pt = (x or 0, y or 0)
+		self._path = None
+		self._index = None
+		self._x = _number(pt[0])
+		self._y = _number(pt[1])
+		self._byte = _bytesForTypes[type or LINE]
+		self._userData = None
+		if name:
+			self.name = name
+
+	@classmethod
+	def _view(cls, path, index):
+		node = cls.__new__(cls)
+		node._path = path
+		node._index = index
+		return node
+
+	def _attach(self, path, index):
+		self._path = path
+		self._index = index
+		self._x = self._y = self._byte = self._userData = None
+
+	def __str__(self):
+		nodeType = self.type
+		if nodeType != OFFCURVE and self.smooth:
+			nodeType += " smooth"
+		return "<GSNode x=%s y=%s %s>" % (self.x, self.y, nodeType)
+
+	__repr__ = __str__
+
+	def __eq__(self, other):
+		if self._path is not None and isinstance(other, GSNode):
+			return self._path is other._path and self._index == other._index
+		return self is other
+
+	def __ne__(self, other):
+		return not self.__eq__(other)
+
+	def __hash__(self):
+		if self._path is not None:
+			return hash((id(self._path), self._index))
+		return id(self)
+
+	@classmethod
+	def _fromDict(cls, data):
+		# nodes are stored as (x, y, type[s], {userData})
+		return cls._fromValues(data[0], data[1], _nodeByte(data[2]), data[3] if len(data) > 3 else None)
+
+	@classmethod
+	def _fromValues(cls, x, y, byte, userData):
+		node = cls.__new__(cls)
+		node._path = None
+		node._index = None
+		node._x = x
+		node._y = y
+		node._byte = byte
+		node._userData = userData
+		return node
+
+	def _values(self):
+		# (x, y, type byte, userData)
+		if self._path is None:
+			return self._x, self._y, self._byte, self._userData
+		path = self._path
+		index = self._index
+		return _number(path._coordinates[2 * index]), _number(path._coordinates[2 * index + 1]), path._types[index], path._nodeUserData.get(index)
+
+	def _toDict(self):
+		x, y, byte, userData = self._values()
+		return _nodeData(x, y, byte, userData)
+
+	def copy(self):
+		x, y, byte, userData = self._values()
+		return GSNode._fromValues(x, y, byte, copy.deepcopy(userData))
+
+	def __copy__(self):
+		return self.copy()
+
+	def __deepcopy__(self, memo):
+		return self.copy()
+
+	@property
+	def parent(self):
+		return self._path
+
+	@property
+	def position(self):
+		return NSPoint(self.x, self.y)
+
+	@position.setter
+	def position(self, value):
+		self.x = value[0]
+		self.y = value[1]
+
+	@property
+	def x(self):
+		if self._path is None:
+			return self._x
+		return _number(self._path._coordinates[2 * self._index])
+
+	@x.setter
+	def x(self, value):
+		if self._path is None:
+			self._x = _number(value)
+		else:
+			self._path._coordinates[2 * self._index] = value
+			self._path._coordinatesChanged()
+
+	@property
+	def y(self):
+		if self._path is None:
+			return self._y
+		return _number(self._path._coordinates[2 * self._index + 1])
+
+	@y.setter
+	def y(self, value):
+		if self._path is None:
+			self._y = _number(value)
+		else:
+			self._path._coordinates[2 * self._index + 1] = value
+			self._path._coordinatesChanged()
+
+	def _getByte(self):
+		if self._path is None:
+			return self._byte
+		return self._path._types[self._index]
+
+	def _setByte(self, byte):
+		if self._path is None:
+			self._byte = byte
+		else:
+			path = self._path
+			changed = (path._types[self._index] ^ byte) & _typeMask
+			path._types[self._index] = byte
+			if changed:
+				path._structureChanged()
+
+	@property
+	def type(self):
+		return _typesForBytes[self._getByte() & _typeMask]
+
+	@type.setter
+	def type(self, value):
+		if value not in _bytesForTypes:
+			raise ValueError("Unknown node type: %s" % value)
+		self._setByte(_bytesForTypes[value] | (self._getByte() & _smoothFlag))
+
+	@property
+	def smooth(self):
+		return bool(self._getByte() & _smoothFlag)
+
+	@smooth.setter
+	def smooth(self, value):
+		byte = self._getByte() & _typeMask
+		self._setByte(byte | _smoothFlag if value else byte)
+
+	connection = smooth
+
+	@property
+	def userData(self):
+		if self._path is None:
+			if self._userData is None:
+				self._userData = {}
+			return self._userData
+		return self._path._nodeUserData.setdefault(self._index, {})
+
+	@userData.setter
+	def userData(self, value):
+		value = dict(value) if value else None
+		if self._path is None:
+			self._userData = value
+		elif value:
+			self._path._nodeUserData[self._index] = value
+		else:
+			self._path._nodeUserData.pop(self._index, None)
+
+	@property
+	def name(self):
+		userData = self._values()[3]
+		if userData:
+			return userData.get("name")
+		return None
+
+	@name.setter
+	def name(self, value):
+		if value is None:
+			userData = self._values()[3]
+			if userData:
+				userData.pop("name", None)
+			return
+		self.userData["name"] = value
+
+	@property
+	def index(self):
+		return self._index
+
+	@property
+	def nextNode(self):
+		if self._path is None:
+			return None
+		return GSNode._view(self._path, (self._index + 1) % len(self._path._types))
+
+	@property
+	def prevNode(self):
+		if self._path is None:
+			return None
+		return GSNode._view(self._path, (self._index - 1) % len(self._path._types))
+
+	def makeNodeFirst(self):
+		path = self._path
+		if path is None or not path.closed:
+			raise ValueError("Only nodes of closed paths can be made first")
+		# the first node of a closed path is the last in the list
+		count = len(path._types)
+		path._reorderNodes([(self._index + 1 + offset) % count for offset in range(count)])
+		self._index = count - 1
+
+
+def _nodeByte(code):
+	byte = ord(code[0])
+	if code.endswith("s"):
+		byte |= _smoothFlag
+	return byte
+
+
+def _nodeData(x, y, byte, userData):
+	code = chr(byte & _typeMask)
+	if byte & _smoothFlag and byte & _typeMask != _offCurveByte:
+		code += "s"
+	if userData:
+		return [x, y, code, userData]
+	return [x, y, code]
+
+
+class GSShape(_GSObject):
+	__slots__ = ("parent",)
+
+	def _structureChanged(self):
+		layer = self.parent
+		if layer is not None:
+			layer._structureChanged()
+
+	@property
+	def shapeType(self):
+		raise NotImplementedError
+
+	@classmethod
+	def _fromDict(cls, data):
+		if "ref" in data:
+			return GSComponent._fromDict(data)
+		return GSPath._fromDict(data)
+
+
+class GSPath(GSShape):
+	"""A path. The nodes are stored in arrays, not as objects:
+
+		_coordinates: array("d") of x, y pairs
+		_types: bytearray with the node type (the character code used in the file, "l", "c", "o" or "q") and _smoothFlag
+		_nodeUserData: {node index: userData} for the few nodes that have userData
+
+	`coordinates` gives access to the coordinate array, to transform whole paths
+	without creating node objects (numpy.frombuffer(path.coordinates) gives a
+	NumPy view on it). The node objects in `nodes` are created on access.
+
+	`_coordinatesVersion` changes with every change of the coordinates, so caches
+	of the values (see interpolation.py) know when to read them again.
+	"""
+	__slots__ = ("_coordinates", "_types", "_nodeUserData", "_closed", "_attributes", "_coordinatesVersion")
+	_fileKeys = (("closed", "_closed"), ("attr", "_attributes"))
+
+	def __init__(self):
+		self._initKeys()
+		self._coordinates = array("d")
+		self._types = bytearray()
+		self._nodeUserData = {}
+		self._closed = 1
+		self._coordinatesVersion = next(_coordinatesVersions)
+		self.parent = None
+
+	def __str__(self):
+		return "<GSPath %s nodes>" % len(self._types)
+
+	__repr__ = __str__
+
+	def __len__(self):
+		return len(self._types)
+
+	@classmethod
+	def _fromDict(cls, data):
+		path = cls.__new__(cls)
+		extra = path._readKeys(data)
+		coordinates = []
+		types = bytearray()
+		userData = {}
+		for index, nodeData in enumerate(extra.pop("nodes", None) or []):
+			coordinates.append(nodeData[0])
+			coordinates.append(nodeData[1])
+			types.append(_nodeByte(nodeData[2]))
+			if len(nodeData) > 3:
+				userData[index] = nodeData[3]
+		path._coordinates = array("d", coordinates)
+		path._types = types
+		path._nodeUserData = userData
+		path._coordinatesVersion = next(_coordinatesVersions)
+		path.parent = None
+		return path
+
+	def _toDict(self):
+		coordinates = [_number(value) for value in self._coordinates]
+		userData = self._nodeUserData
+		data = {"nodes": [
+			_nodeData(coordinates[2 * index], coordinates[2 * index + 1], byte, userData.get(index))
+			for index, byte in enumerate(self._types)
+		]}
+		return self._writeKeys(data)
+
+	def __deepcopy__(self, memo):
+		path = GSPath.__new__(GSPath)
+		path._readKeys(self._writeKeys({}))
+		path._extra = copy.deepcopy(path._extra)
+		path._attributes = copy.deepcopy(self._attributes)
+		path._coordinates = array("d", self._coordinates)
+		path._types = bytearray(self._types)
+		path._nodeUserData = copy.deepcopy(self._nodeUserData)
+		path._coordinatesVersion = next(_coordinatesVersions)
+		path.parent = None
+		return path
+
+	@property
+	def shapeType(self):
+		return GSShapeTypePath
+
+	@property
+	def nodes(self):
+		return PathNodesProxy(self)
+
+	@nodes.setter
+	def nodes(self, value):
+		PathNodesProxy(self).setter(value)
+
+	@property
+	def coordinates(self):
+		"""The node coordinates as array("d") of x, y pairs. Changes to the array change the path.
+		Don't keep the array to change it later, get it again (or set `coordinates`) for each change."""
+		# the caller may change the array
+		self._coordinatesChanged()
+		return self._coordinates
+
+	@coordinates.setter
+	def coordinates(self, values):
+		values = array("d", values)
+		if len(values) != 2 * len(self._types):
+			raise ValueError("Expected %d coordinates, got %d" % (2 * len(self._types), len(values)))
+		self._coordinates = values
+		self._coordinatesChanged()
+
+	@property
+	def nodeTypes(self):
+		"""The node types, in the same order as the nodes."""
+		return [_typesForBytes[byte & _typeMask] for byte in self._types]
+
+	# node storage
+
+	def _coordinatesChanged(self):
+		self._coordinatesVersion = next(_coordinatesVersions)
+
+	def _structureChanged(self):
+		self._coordinatesChanged()
+		GSShape._structureChanged(self)
+
+	def _setNode(self, index, node):
+		x, y, byte, userData = node._values()
+		self._coordinates[2 * index] = x
+		self._coordinates[2 * index + 1] = y
+		self._types[index] = byte
+		if userData:
+			self._nodeUserData[index] = userData
+		else:
+			self._nodeUserData.pop(index, None)
+		self._structureChanged()
+
+	def _shiftUserData(self, start, delta):
+		# move the userData of the nodes from `start` on by `delta`
+		if self._nodeUserData:
+			self._nodeUserData = dict((index + delta if index >= start else index, userData) for index, userData in self._nodeUserData.items())
+
+	def _insertNodes(self, index, nodes):
+		values = [node._values() for node in nodes]
+		coordinates = array("d")
+		for x, y, _, _ in values:
+			coordinates.append(x)
+			coordinates.append(y)
+		self._coordinates[2 * index:2 * index] = coordinates
+		self._types[index:index] = bytearray(byte for _, _, byte, _ in values)
+		self._shiftUserData(index, len(values))
+		for offset, (_, _, _, userData) in enumerate(values):
+			if userData:
+				self._nodeUserData[index + offset] = userData
+		self._structureChanged()
+
+	def _removeNodes(self, start, stop):
+		del self._coordinates[2 * start:2 * stop]
+		del self._types[start:stop]
+		if self._nodeUserData:
+			self._nodeUserData = dict(
+				(index - (stop - start) if index >= stop else index, userData)
+				for index, userData in self._nodeUserData.items() if not start <= index < stop
+			)
+		self._structureChanged()
+
+	def _keepNodes(self, indexes):
+		# keep only the nodes at the (sorted) indexes
+		coordinates = self._coordinates
+		types = self._types
+		self._coordinates = array("d", [value for idx in indexes for value in (coordinates[2 * idx], coordinates[2 * idx + 1])])
+		self._types = bytearray(types[idx] for idx in indexes)
+		if self._nodeUserData:
+			userData = self._nodeUserData
+			self._nodeUserData = dict((newIndex, userData[idx]) for newIndex, idx in enumerate(indexes) if idx in userData)
+		self._structureChanged()
+
+	def _setNodes(self, nodes):
+		values = [node._values() for node in nodes]
+		self._coordinates = array("d")
+		for x, y, _, _ in values:
+			self._coordinates.append(x)
+			self._coordinates.append(y)
+		self._types = bytearray(byte for _, _, byte, _ in values)
+		self._nodeUserData = dict((index, value[3]) for index, value in enumerate(values) if value[3])
+		for index, node in enumerate(nodes):
+			node._attach(self, index)
+		self._structureChanged()
+
+	def _reorderNodes(self, order, types=None):
+		# order: the old index for each new index
+		coordinates = self._coordinates
+		newCoordinates = array("d", bytes(8 * len(coordinates)))
+		newCoordinates[0::2] = array("d", (coordinates[2 * index] for index in order))
+		newCoordinates[1::2] = array("d", (coordinates[2 * index + 1] for index in order))
+		self._coordinates = newCoordinates
+		types = self._types if types is None else types
+		self._types = bytearray(types[index] for index in order)
+		if self._nodeUserData:
+			newIndexes = dict((oldIndex, newIndex) for newIndex, oldIndex in enumerate(order))
+			self._nodeUserData = dict((newIndexes[index], userData) for index, userData in self._nodeUserData.items())
+		self._structureChanged()
+
+	@property
+	def closed(self):
+		return bool(self._closed)
+
+	@closed.setter
+	def closed(self, value):
+		self._closed = 1 if value else None
+		self._structureChanged()
+
+	@property
+	def attributes(self):
+		if self._attributes is None:
+			self._attributes = {}
+		return self._attributes
+
+	@attributes.setter
+	def attributes(self, value):
+		self._attributes = dict(value) if value else None
+
+	def _points(self):
+		coordinates = self._coordinates
+		return list(zip(coordinates[0::2], coordinates[1::2])), [_typesForBytes[byte & _typeMask] for byte in self._types]
+
+	@property
+	def segments(self):
+		"""A list of segments as lists of NSPoints. Two points represent a line, three a quadratic and four a cubic curve."""
+		points, types = self._points()
+		return [[NSPoint(x, y) for x, y in segment] for segment in _segmentsFromPoints(points, types, self.closed)]
+
+	@property
+	def bounds(self):
+		return _rectFromBounds(self._bounds())
+
+	def _bounds(self, transform=None):
+		points, types = self._points()
+		if transform is not None:
+			points = [_transformPoint(transform, x, y) for x, y in points]
+		if not points:
+			return None
+		segments = _segmentsFromPoints(points, types, self.closed)
+		if not segments:
+			xs = [x for x, y in points]
+			ys = [y for x, y in points]
+			return min(xs), min(ys), max(xs), max(ys)
+		return _unionBounds(_segmentBounds(segment) for segment in segments)
+
+	@property
+	def area(self):
+		"""The signed area, positive for counter clockwise paths."""
+		points, types = self._points()
+		area = 0
+		for segment in _segmentsFromPoints(points, types, self.closed):
+			flat = _flattenSegment(segment)
+			for (x0, y0), (x1, y1) in zip(flat, flat[1:]):
+				area += x0 * y1 - x1 * y0
+		return area / 2
+
+	@property
+	def direction(self):
+		"""Path direction. -1 for counter clockwise, 1 for clockwise."""
+		return -1 if self.area > 0 else 1
+
+	def reverse(self):
+		"""Reverses the path direction"""
+		count = len(self._types)
+		types = bytearray(self._types)
+		onCurves = [index for index, byte in enumerate(types) if byte & _typeMask != _offCurveByte]
+		if not onCurves:
+			self._reorderNodes(range(count - 1, -1, -1))
+			return
+		# the type of an on curve node describes the segment that ends in it. After reversing,
+		# that segment ends in the on curve node that started it, the next one in the old order
+		nextTypes = [self._types[onCurves[(position + 1) % len(onCurves)]] & _typeMask for position in range(len(onCurves))]
+		for index, byte in zip(onCurves, nextTypes):
+			types[index] = byte | (types[index] & _smoothFlag)
+		if self.closed:
+			# the last node is the start point and stays the start point
+			order = list(range(count - 2, -1, -1)) + [count - 1]
+		else:
+			types[onCurves[-1]] = _lineByte | (types[onCurves[-1]] & _smoothFlag)
+			order = range(count - 1, -1, -1)
+		self._reorderNodes(order, types)
+
+	def applyTransform(self, transform):
+		"""Apply a transformation matrix (a, b, c, d, tx, ty) to the path."""
+		a, b, c, d, tx, ty = transform
+		coordinates = self._coordinates
+		xs = coordinates[0::2]
+		ys = coordinates[1::2]
+		coordinates[0::2] = array("d", [a * x + c * y + tx for x, y in zip(xs, ys)])
+		coordinates[1::2] = array("d", [b * x + d * y + ty for x, y in zip(xs, ys)])
+		self._coordinatesChanged()
+
+	def _transformedCopy(self, transform):
+		path = self.copy()
+		path.applyTransform(transform)
+		return path
+
+
+def _segmentsFromPoints(points, types, closed):
+	# split the points of a path into segments, each starting with the on curve point of the previous one
+	count = len(points)
+	if count < 2:
+		return []
+	onCurveIndexes = [index for index, nodeType in enumerate(types) if nodeType != OFFCURVE]
+	if not onCurveIndexes:
+		# a TrueType contour that only has off curve points
+		if not closed:
+			return []
+		starts = [((points[i][0] + points[i - 1][0]) / 2, (points[i][1] + points[i - 1][1]) / 2) for i in range(count)]
+		return [[starts[i], points[i], starts[(i + 1) % count]] for i in range(count)]
+	segments = []
+	if closed:
+		previous = onCurveIndexes[-1] - count
+		indexes = onCurveIndexes
+	else:
+		previous = onCurveIndexes[0]
+		indexes = onCurveIndexes[1:]
+	for index in indexes:
+		start = points[previous % count]
+		offCurves = [points[i % count] for i in range(previous + 1, index)]
+		end = points[index]
+		if types[index] == QCURVE and len(offCurves) > 1:
+			# implied on curve points between the off curve points
+			for first, second in zip(offCurves, offCurves[1:]):
+				middle = ((first[0] + second[0]) / 2, (first[1] + second[1]) / 2)
+				segments.append([start, first, middle])
+				start = middle
+			segments.append([start, offCurves[-1], end])
+		elif len(offCurves) > 2:
+			segments.append([start, offCurves[0], offCurves[-1], end])
+		else:
+			segments.append([start] + offCurves + [end])
+		previous = index
+	return segments
+
+
+def _flattenSegment(segment, steps=8):
+	if len(segment) == 2:
+		return segment
+	if len(segment) == 3:
+		(x0, y0), (x1, y1), (x2, y2) = segment
+		return [((1 - t) ** 2 * x0 + 2 * (1 - t) * t * x1 + t * t * x2, (1 - t) ** 2 * y0 + 2 * (1 - t) * t * y1 + t * t * y2)
+				for t in (i / steps for i in range(steps + 1))]
+	(x0, y0), (x1, y1), (x2, y2), (x3, y3) = segment
+	return [(_cubicPoint(x0, x1, x2, x3, t), _cubicPoint(y0, y1, y2, y3, t)) for t in (i / steps for i in range(steps + 1))]
+
+
+class GSComponent(GSShape):
+	__slots__ = ("_componentName", "_position", "_scale", "_angle", "alignment", "anchor", "_locked", "_piece", "userData", "_attributes")
+	_fileKeys = (
+		("ref", "_componentName"), ("pos", "_position"), ("scale", "_scale"), ("angle", "_angle"), ("alignment", "alignment"),
+		("anchor", "anchor"), ("locked", "_locked"), ("piece", "_piece"), ("userData", "userData"), ("attr", "_attributes"),
+	)
+
+	def __init__(self, glyph=None, offset=(0, 0), scale=(1, 1), transform=None):
+		self._initKeys()
+		self.parent = None
+		if isinstance(glyph, GSGlyph):
+			glyph = glyph.name
+		self._componentName = glyph
+		if transform is None:
+			self.position = offset
+			self.scale = scale
+		else:
+			self.transform = transform
+
+	def __str__(self):
+		return "<GSComponent \"%s\" x=%s y=%s>" % (self.componentName, self.position.x, self.position.y)
+
+	__repr__ = __str__
+
+	@classmethod
+	def _fromDict(cls, data):
+		component = cls.__new__(cls)
+		component._readKeys(data)
+		component.parent = None
+		return component
+
+	def _toDict(self):
+		return self._writeKeys({})
+
+	@property
+	def shapeType(self):
+		return GSShapeTypeComponent
+
+	@property
+	def componentName(self):
+		return self._componentName
+
+	@componentName.setter
+	def componentName(self, value):
+		self._componentName = value
+		self._structureChanged()
+
+	name = componentName
+
+	@property
+	def position(self):
+		if self._position is None:
+			return NSPoint(0, 0)
+		return NSPoint(*self._position)
+
+	@position.setter
+	def position(self, value):
+		x, y = _number(value[0]), _number(value[1])
+		self._position = [x, y] if (x, y) != (0, 0) else None
+
+	@property
+	def scale(self):
+		if self._scale is None:
+			return (1, 1)
+		return tuple(self._scale)
+
+	@scale.setter
+	def scale(self, value):
+		if isinstance(value, (int, float)):
+			value = (value, value)
+		x, y = _number(value[0]), _number(value[1])
+		self._scale = [x, y] if (x, y) != (1, 1) else None
+
+	@property
+	def rotation(self):
+		return self._angle or 0
+
+	@rotation.setter
+	def rotation(self, value):
+		self._angle = _number(value) or None
+
+	@property
+	def locked(self):
+		return bool(self._locked)
+
+	@locked.setter
+	def locked(self, value):
+		self._locked = 1 if value else None
+
+	@property
+	def smartComponentValues(self):
+		if self._piece is None:
+			self._piece = {}
+		return self._piece
+
+	@property
+	def attributes(self):
+		if self._attributes is None:
+			self._attributes = {}
+		return self._attributes
+
+	@property
+	def transform(self):
+		"""The transformation matrix (a, b, c, d, tx, ty) built from position, scale and rotation."""
+		scaleX, scaleY = self.scale
+		angle = math.radians(self.rotation)
+		cos, sin = math.cos(angle), math.sin(angle)
+		x, y = self.position
+		return (scaleX * cos, scaleX * sin, -scaleY * sin, scaleY * cos, x, y)
+
+	@transform.setter
+	def transform(self, value):
+		a, b, c, d, tx, ty = value
+		scaleX = math.hypot(a, b)
+		scaleY = (a * d - b * c) / scaleX if scaleX else math.hypot(c, d)
+		angle = math.degrees(math.atan2(b, a)) if scaleX else 0
+		self.position = (tx, ty)
+		self.scale = (round(scaleX, 6), round(scaleY, 6))
+		self.rotation = round(angle, 6)
+
+	@property
+	def component(self):
+		"""The glyph the component points to."""
+		font = self._font()
+		if font is None:
+			return None
+		return font.glyphs[self.componentName]
+
+	def _font(self):
+		layer = self.parent
+		glyph = layer.parent if layer is not None else None
+		return glyph.parent if glyph is not None else None
+
+	@property
+	def componentLayer(self):
+		"""The layer of the component glyph that matches the layer of the component."""
+		glyph = self.component
+		layer = self.parent
+		if glyph is None or layer is None:
+			return None
+		componentLayer = glyph._layerForId(layer.layerId)
+		if componentLayer is None and layer.associatedMasterId:
+			componentLayer = glyph._layerForId(layer.associatedMasterId)
+		return componentLayer
+
+	def _decomposedPaths(self, transform=None, depth=0):
+		layer = self.componentLayer
+		if layer is None or depth > 20:
+			return []
+		ownTransform = self.transform
+		if transform is not None:
+			ownTransform = _multiplyTransforms(ownTransform, transform)
+		paths = [path._transformedCopy(ownTransform) for path in layer.paths]
+		for component in layer.components:
+			paths.extend(component._decomposedPaths(ownTransform, depth + 1))
+		return paths
+
+	def _bounds(self, transform=None):
+		return _unionBounds(path._bounds() for path in self._decomposedPaths(transform))
+
+	@property
+	def bounds(self):
+		return _rectFromBounds(self._bounds())
+
+	def decompose(self):
+		"""Replace the component in its layer with the paths of the component glyph."""
+		layer = self.parent
+		if layer is None:
+			raise ValueError("The component is not in a layer")
+		index = layer._shapes.index(self)
+		paths = self._decomposedPaths()
+		for path in paths:
+			path.parent = layer
+		layer._shapes[index:index + 1] = paths
+		self.parent = None
+		layer._structureChanged()
+
+	def applyTransform(self, transform):
+		self.transform = _multiplyTransforms(self.transform, transform)
+
+
+class GSAnchor(_GSObject):
+	__slots__ = ("_name", "_position", "userData", "parent")
+	_fileKeys = (("name", "_name"), ("pos", "_position"), ("userData", "userData"))
+
+	def __init__(self, name=None, pt=None):
+		self._initKeys()
+		self._name = name
+		self.parent = None
+		if pt:
+			self.position = pt
+
+	def __str__(self):
+		return "<GSAnchor \"%s\" x=%s y=%s>" % (self.name, self.position.x, self.position.y)
+
+	__repr__ = __str__
+
+	@classmethod
+	def _fromDict(cls, data):
+		anchor = cls.__new__(cls)
+		anchor._readKeys(data)
+		anchor.parent = None
+		return anchor
+
+	def _toDict(self):
+		return self._writeKeys({})
+
+	@property
+	def position(self):
+		if self._position is None:
+			return NSPoint(0, 0)
+		return NSPoint(*self._position)
+
+	@position.setter
+	def position(self, value):
+		x, y = _number(value[0]), _number(value[1])
+		self._position = [x, y] if (x, y) != (0, 0) else None
+
+	@property
+	def name(self):
+		return self._name
+
+	@name.setter
+	def name(self, value):
+		self._name = value
+		if self.parent is not None:
+			self.parent._structureChanged()
+
+	@property
+	def x(self):
+		return self.position.x
+
+	@property
+	def y(self):
+		return self.position.y
+
+
+class GSLayer(_GSObject):
+	__slots__ = (
+		"name", "_layerId", "_associatedMasterId", "_width", "vertWidth", "vertOrigin", "_shapes", "_anchors",
+		"color", "leftMetricsKey", "rightMetricsKey", "widthMetricsKey", "userData", "_attributes", "_visible",
+		"_background", "_signature", "parent",
+	)
+	_fileKeys = (
+		("name", "name"), ("layerId", "_layerId"), ("associatedMasterId", "_associatedMasterId"), ("width", "_width"),
+		("vertWidth", "vertWidth"), ("vertOrigin", "vertOrigin"), ("color", "color"), ("metricLeft", "leftMetricsKey"),
+		("metricRight", "rightMetricsKey"), ("metricWidth", "widthMetricsKey"), ("userData", "userData"),
+		("attr", "_attributes"), ("visible", "_visible"),
+	)
+
+	def __init__(self):
+		self._initKeys()
+		self._shapes = []
+		self._anchors = []
+		self._background = None
+		self._width = 600
+		self._signature = None
+		self.parent = None
+
+	def __str__(self):
+		name = self.name or (self.master.name if self.master is not None else None) or 'orphan'
+		parent = self.parent.name if self.parent is not None and self.parent.name else 'orphan'
+		return "<%s \"%s\" (%s)>" % (type(self).__name__, name, parent)
+
+	__repr__ = __str__
+
+	@classmethod
+	def _fromDict(cls, data):
+		layer = cls.__new__(cls)
+		extra = layer._readKeys(data)
+		layer._readChildren(extra)
+		layer._signature = None
+		layer.parent = None
+		return layer
+
+	def _readChildren(self, extra):
+		shapes = []
+		for shapeData in extra.pop("shapes", None) or []:
+			shape = GSShape._fromDict(shapeData)
+			shape.parent = self
+			shapes.append(shape)
+		self._shapes = shapes
+		anchors = []
+		for anchorData in extra.pop("anchors", None) or []:
+			anchor = GSAnchor._fromDict(anchorData)
+			anchor.parent = self
+			anchors.append(anchor)
+		self._anchors = anchors
+		backgroundData = extra.pop("background", None)
+		self._background = None
+		if backgroundData is not None:
+			self._background = GSBackgroundLayer._fromDict(backgroundData)
+			self._background.parent = self
+
+	def _toDict(self):
+		data = {}
+		if self._shapes:
+			data["shapes"] = [shape._toDict() for shape in self._shapes]
+		if self._anchors:
+			data["anchors"] = [anchor._toDict() for anchor in self._anchors]
+		if self._background is not None:
+			data["background"] = self._background._toDict()
+		return self._writeKeys(data)
+
+	def _setLayerKey(self, name, value):
+		setattr(self, name, value)
+		# the glyph finds its layers by id and orders them by master
+		if isinstance(self.parent, GSGlyph):
+			self.parent._layersChanged()
+
+	layerId = property(lambda self: self._layerId, lambda self, value: self._setLayerKey("_layerId", value))
+	associatedMasterId = property(lambda self: self._associatedMasterId, lambda self, value: self._setLayerKey("_associatedMasterId", value))
+
+	@property
+	def glyph(self):
+		return self.parent
+
+	@property
+	def font(self):
+		return self.parent.parent if self.parent is not None else None
+
+	@property
+	def master(self):
+		font = self.font
+		if font is None:
+			return None
+		return font.masters[self.associatedMasterId or self.layerId]
+
+	@property
+	def isMasterLayer(self):
+		if self.associatedMasterId and self.associatedMasterId != self.layerId:
+			return False
+		font = self.font
+		if font is None:
+			return True
+		# by id only, font.masters[] would also match a master name
+		return any(master.id == self.layerId for master in font._masters)
+
+	@property
+	def width(self):
+		return self._width if self._width is not None else 0
+
+	@width.setter
+	def width(self, value):
+		self._width = _number(value)
+
+	@property
+	def shapes(self):
+		return LayerShapesProxy(self)
+
+	@shapes.setter
+	def shapes(self, value):
+		LayerShapesProxy(self).setter(value)
+
+	@property
+	def paths(self):
+		return [shape for shape in self._shapes if isinstance(shape, GSPath)]
+
+	@paths.setter
+	def paths(self, value):
+		self.shapes = self.components + list(value)
+
+	@property
+	def components(self):
+		return [shape for shape in self._shapes if isinstance(shape, GSComponent)]
+
+	@components.setter
+	def components(self, value):
+		self.shapes = self.paths + list(value)
+
+	@property
+	def anchors(self):
+		return LayerAnchorsProxy(self)
+
+	@anchors.setter
+	def anchors(self, value):
+		LayerAnchorsProxy(self).setter(value)
+
+	@property
+	def attributes(self):
+		if self._attributes is None:
+			self._attributes = {}
+		return self._attributes
+
+	@property
+	def visible(self):
+		return bool(self._visible)
+
+	@visible.setter
+	def visible(self, value):
+		self._visible = 1 if value else None
+
+	@property
+	def background(self):
+		if self._background is None:
+			self._background = GSBackgroundLayer()
+			self._background.parent = self
+		return self._background
+
+	@background.setter
+	def background(self, value):
+		self._background = value
+		if value is not None:
+			value.parent = self
+
+	def _bounds(self):
+		return _unionBounds(shape._bounds() for shape in self._shapes)
+
+	@property
+	def bounds(self):
+		return _rectFromBounds(self._bounds())
+
+	@property
+	def LSB(self):
+		bounds = self._bounds()
+		return bounds[0] if bounds is not None else 0
+
+	@LSB.setter
+	def LSB(self, value):
+		bounds = self._bounds()
+		if bounds is None:
+			return
+		delta = value - bounds[0]
+		self.applyTransform((1, 0, 0, 1, delta, 0))
+		self.width = self.width + delta
+
+	@property
+	def RSB(self):
+		bounds = self._bounds()
+		return self.width - bounds[2] if bounds is not None else 0
+
+	@RSB.setter
+	def RSB(self, value):
+		bounds = self._bounds()
+		if bounds is None:
+			return
+		self.width = bounds[2] + value
+
+	def applyTransform(self, transform):
+		"""Apply a transformation matrix (a, b, c, d, tx, ty) to shapes and anchors."""
+		for shape in self._shapes:
+			shape.applyTransform(transform)
+		for anchor in self._anchors:
+			anchor.position = _transformPoint(transform, *anchor.position)
+
+	def decomposeComponents(self):
+		for component in self.components:
+			component.decompose()
+
+	def copyDecomposedLayer(self):
+		layer = self.copy()
+		layer.parent = self.parent
+		layer.decomposeComponents()
+		layer.parent = None
+		return layer
+
+	def clear(self):
+		self.shapes = []
+		self.anchors = []
+
+	def _structureChanged(self):
+		self._signature = None
+
+	@property
+	def compatibilitySignature(self):
+		"""A hashable description of the structure of the layer: the node types and closed state of each path,
+		the component names and the anchor names. Layers with the same signature are compatible.
+		It is computed once and kept until shapes, nodes or anchors are added, removed or change their type or name."""
+		signature = self._signature
+		if signature is None:
+			shapes = []
+			for shape in self._shapes:
+				if isinstance(shape, GSPath):
+					shapes.append((shape._types.translate(_plainTypes), bool(shape._closed)))
+				else:
+					shapes.append(shape._componentName)
+			signature = (tuple(shapes), tuple(sorted(anchor._name for anchor in self._anchors)))
+			self._signature = signature
+		return signature
+
+	def compareString(self):
+		"""Returns a string representing the outline structure of the layer, for compatibility comparison."""
+		parts = [shape[0].decode("ascii") if isinstance(shape, tuple) else shape for shape in self.compatibilitySignature[0]]
+		return "_".join(parts) + "_" if parts else ""
+
+
+class GSBackgroundLayer(GSLayer):
+	__slots__ = ()
+
+	def __init__(self):
+		GSLayer.__init__(self)
+		self._width = None
+
+	@property
+	def font(self):
+		layer = self.parent
+		return layer.font if layer is not None else None
+
+
+class GSGlyph(_GSObject):
+	__slots__ = (
+		"_name", "_unicodes", "category", "subCategory", "case", "script", "_productionName",
+		"_kernLeft", "_kernRight", "_kernTop", "_kernBottom",
+		"leftMetricsKey", "rightMetricsKey", "widthMetricsKey", "_export", "color", "note", "_locked",
+		"lastChange", "tags", "userData", "_direction", "_layers", "_layerOrder", "parent",
+	)
+	_fileKeys = (
+		("glyphname", "_name"), ("category", "category"), ("subCategory", "subCategory"), ("case", "case"),
+		("script", "script"), ("production", "_productionName"), ("kernLeft", "_kernLeft"),
+		("kernRight", "_kernRight"), ("kernTop", "_kernTop"), ("kernBottom", "_kernBottom"),
+		("metricLeft", "leftMetricsKey"), ("metricRight", "rightMetricsKey"), ("metricWidth", "widthMetricsKey"),
+		("export", "_export"), ("color", "color"), ("note", "note"), ("locked", "_locked"),
+		("lastChange", "lastChange"), ("tags", "tags"), ("userData", "userData"), ("direction", "_direction"),
+	)
+
+	def __init__(self, name=None, autoName=True):
+		self._initKeys()
+		self._name = name
+		self._unicodes = None
+		self._layers = []
+		self._layerOrder = None
+		self.parent = None
+
+	def __str__(self):
+		return "<GSGlyph \"%s\" with %s layers>" % (self._name, len(self._layers))
+
+	__repr__ = __str__
+
+	@classmethod
+	def _fromDict(cls, data):
+		glyph = cls.__new__(cls)
+		extra = glyph._readKeys(data)
+		codes = extra.pop("unicode", None)
+		if codes is None:
+			glyph._unicodes = None
+		elif isinstance(codes, list):
+			glyph._unicodes = codes
+		else:
+			glyph._unicodes = [codes]
+		layers = []
+		for layerData in extra.pop("layers", None) or []:
+			layer = GSLayer._fromDict(layerData)
+			layer.parent = glyph
+			layers.append(layer)
+		glyph._layers = layers
+		glyph._layerOrder = None
+		glyph.parent = None
+		return glyph
+
+	def _toDict(self):
+		data = {"layers": [layer._toDict() for layer in self._layers]}
+		if self._unicodes:
+			data["unicode"] = self._unicodes[0] if len(self._unicodes) == 1 else list(self._unicodes)
+		return self._writeKeys(data)
+
+	@property
+	def name(self):
+		return self._name
+
+	@name.setter
+	def name(self, value):
+		if value == self._name:
+			return
+		font = self.parent
+		if font is not None:
+			if value in font._glyphsByName:
+				raise NameError('There is a glyph with the name \"%s\" already in the font.' % value)
+			font._renameGlyph(self, self._name, value)
+		self._name = value
+
+	@property
+	def productionName(self):
+		return self._productionName
+
+	@productionName.setter
+	def productionName(self, value):
+		oldName = self._productionName
+		self._productionName = value
+		if self.parent is not None:
+			self.parent._changedProductionName(self, oldName)
+
+	def _setKerningGroup(self, name, value):
+		setattr(self, name, value or None)
+		if self.parent is not None:
+			self.parent._kerningChanged()
+
+	leftKerningGroup = property(lambda self: self._kernLeft, lambda self, value: self._setKerningGroup("_kernLeft", value))
+	rightKerningGroup = property(lambda self: self._kernRight, lambda self, value: self._setKerningGroup("_kernRight", value))
+	topKerningGroup = property(lambda self: self._kernTop, lambda self, value: self._setKerningGroup("_kernTop", value))
+	bottomKerningGroup = property(lambda self: self._kernBottom, lambda self, value: self._setKerningGroup("_kernBottom", value))
+
+	@property
+	def unicodes(self):
+		"""The unicodes as hex strings, e.g. ["0041"]."""
+		if not self._unicodes:
+			return None
+		return ["%04X" % code for code in self._unicodes]
+
+	@unicodes.setter
+	def unicodes(self, values):
+		oldUnicodes = self._unicodes
+		if values is None or len(values) == 0:
+			self._unicodes = None
+		else:
+			self._unicodes = [int(value, 16) if isString(value) else int(value) for value in values]
+		if self.parent is not None:
+			self.parent._changedUnicodes(self, oldUnicodes)
+
+	@property
+	def unicode(self):
+		if not self._unicodes:
+			return None
+		return "%04X" % self._unicodes[0]
+
+	@unicode.setter
+	def unicode(self, value):
+		self.unicodes = [value] if value else None
+
+	@property
+	def string(self):
+		if not self._unicodes:
+			return None
+		return chr(self._unicodes[0])
+
+	@property
+	def export(self):
+		return self._export is None or bool(self._export)
+
+	@export.setter
+	def export(self, value):
+		self._export = None if value else 0
+
+	@property
+	def locked(self):
+		return bool(self._locked)
+
+	@locked.setter
+	def locked(self, value):
+		self._locked = 1 if value else None
+
+	@property
+	def direction(self):
+		return {"LTR": GSLTR, "RTL": GSRTL, "BIDI": 1, "VTL": GSVertical, "VTR": 8}.get(self._direction, GSLTR)
+
+	@property
+	def layers(self):
+		return GlyphLayerProxy(self)
+
+	@layers.setter
+	def layers(self, value):
+		GlyphLayerProxy(self).setter(value)
+
+	def _layerIndex(self):
+		# (master ids, ordered layers, layers by id). Built once and kept until layers are set or removed
+		# or the masters of the font change.
+		font = self.parent
+		masterIds = [master.id for master in font._masters] if font is not None else None
+		index = self._layerOrder
+		if index is not None and index[0] == masterIds:
+			return index
+		layersById = {}
+		for layer in self._layers:
+			layersById.setdefault(layer.layerId, layer)
+		if font is None:
+			layers = list(self._layers)
+		else:
+			masterLayers = {}
+			otherLayers = []
+			masterIdSet = set(masterIds)
+			for layer in self._layers:
+				if layer.layerId in masterIdSet and (not layer.associatedMasterId or layer.associatedMasterId == layer.layerId):
+					masterLayers[layer.layerId] = layer
+				else:
+					otherLayers.append(layer)
+			layers = [masterLayers[masterId] for masterId in masterIds if masterId in masterLayers] + otherLayers
+		index = self._layerOrder = (masterIds, layers, layersById)
+		return index
+
+	def _layersChanged(self):
+		self._layerOrder = None
+
+	def _layerForId(self, layerId):
+		return self._layerIndex()[2].get(layerId)
+
+	def _orderedLayers(self):
+		# master layers in the order of the masters, then all other layers
+		return self._layerIndex()[1]
+
+	def _setLayerForId(self, layer, layerId):
+		old = self._layerForId(layerId)
+		layer.layerId = layerId
+		layer.parent = self
+		if old is not None:
+			old.parent = None
+			self._layers[self._layers.index(old)] = layer
+		else:
+			self._layers.append(layer)
+		self._layersChanged()
+
+	def _removeLayerForId(self, layerId):
+		layer = self._layerForId(layerId)
+		if layer is not None:
+			self._layers.remove(layer)
+			layer.parent = None
+			self._layersChanged()
+
+	def _setLayers(self, layers):
+		for layer in self._layers:
+			layer.parent = None
+		self._layers = []
+		for layer in layers:
+			layer.parent = self
+			self._layers.append(layer)
+		self._layersChanged()
+
+	@property
+	def mastersCompatible(self):
+		layers = [layer for layer in self._orderedLayers() if layer.isMasterLayer]
+		if not layers:
+			return True
+		signature = layers[0].compatibilitySignature
+		return all(layer.compatibilitySignature == signature for layer in layers[1:])
+
+	def incompatibleLayers(self):
+		"""Check master, brace and bracket layers. Returns a list of (layer, reason) for the layers that don't match.
+
+		Master and brace layers are compared to the first master layer, bracket layers to the
+		bracket layers with the same axis rules."""
+		problems = []
+		groups = {}
+		for layer in self._orderedLayers():
+			attributes = layer._attributes
+			if layer.isMasterLayer or (attributes and "coordinates" in attributes):
+				key = None
+			elif attributes and "axisRules" in attributes:
+				key = repr(attributes["axisRules"])
+			else:
+				continue
+			reference = groups.setdefault(key, layer)
+			if reference is not layer:
+				reason = _signatureDifference(reference.compatibilitySignature, layer.compatibilitySignature)
+				if reason is not None:
+					problems.append((layer, reason))
+		return problems
+
+
+def _signatureDifference(first, second):
+	"""Describe the first difference between two compatibility signatures, None if they are the same."""
+	if first == second:
+		return None
+	firstShapes, firstAnchors = first
+	secondShapes, secondAnchors = second
+	if len(firstShapes) != len(secondShapes):
+		return "%d shapes instead of %d" % (len(secondShapes), len(firstShapes))
+	for index, (firstShape, secondShape) in enumerate(zip(firstShapes, secondShapes)):
+		if firstShape == secondShape:
+			continue
+		if isinstance(firstShape, tuple) and isinstance(secondShape, tuple):
+			if firstShape[1] != secondShape[1]:
+				return "path %d is %s" % (index, "closed" if secondShape[1] else "open")
+			if len(firstShape[0]) != len(secondShape[0]):
+				return "path %d has %d nodes instead of %d" % (index, len(secondShape[0]), len(firstShape[0]))
+			return "path %d has different node types: %s, %s" % (index, firstShape[0].decode("ascii"), secondShape[0].decode("ascii"))
+		describe = lambda shape: "a path" if isinstance(shape, tuple) else "component %s" % shape
+		return "shape %d is %s instead of %s" % (index, describe(secondShape), describe(firstShape))
+	missing = sorted(set(firstAnchors) - set(secondAnchors))
+	extra = sorted(set(secondAnchors) - set(firstAnchors))
+	parts = []
+	if missing:
+		parts.append("missing anchors: %s" % ", ".join(missing))
+	if extra:
+		parts.append("extra anchors: %s" % ", ".join(extra))
+	return "; ".join(parts) or "different anchors"
+
+
+class GSFont(_GSObject):
+	__slots__ = (
+		"filepath", "familyName", "_upm", "versionMajor", "versionMinor", "date", "note", "userData",
+		"_kerningLTR", "_kerningRTL", "_kerningVertical", "_kerningIndexes", "_metrics", "_glyphs", "_glyphsByName",
+		"_glyphsByUnicode", "_glyphsByProductionName", "_masters", "_axes",
+		"_instances", "_customParameters",
+	)
+	_fileKeys = (
+		("familyName", "familyName"), ("unitsPerEm", "_upm"), ("versionMajor", "versionMajor"), ("versionMinor", "versionMinor"),
+		("date", "date"), ("note", "note"), ("userData", "userData"), ("kerningLTR", "_kerningLTR"),
+		("kerningRTL", "_kerningRTL"), ("kerningVertical", "_kerningVertical"), ("metrics", "_metrics"),
+	)
+
+	def __init__(self, path=None):
+		self._initKeys()
+		self.filepath = None
+		self._kerningIndexes = {}
+		self._glyphs = []
+		self._clearGlyphIndex()
+		self._masters = []
+		self._axes = []
+		self._instances = []
+		self._customParameters = []
+		self._upm = 1000
+		self.versionMajor = 1
+		self.versionMinor = 0
+		self._metrics = []
+		if path is not None:
+			self._read(path)
+
+	def __str__(self):
+		return "<GSFont \"%s\" v%s.%s with %s masters and %s instances>" % (
+			self.familyName, self.versionMajor, self.versionMinor, len(self._masters), len(self._instances))
+
+	__repr__ = __str__
+
+	def _read(self, path):
+		path = os.fspath(path)
+		if os.path.isdir(path):
+			data = GlyphsPackageReader(path).font()
+		else:
+			data = load(path)
+		if data.get(".formatVersion") != 3:
+			raise ValueError("Only files in format version 3 can be read: %s" % path)
+		self._readDict(data)
+		self.filepath = path
+
+	@classmethod
+	def _fromDict(cls, data):
+		font = cls.__new__(cls)
+		font.filepath = None
+		font._readDict(data)
+		return font
+
+	def _readDict(self, data):
+		extra = self._readKeys(data)
+		self._kerningIndexes = {}
+		if self._metrics is None:
+			self._metrics = []
+		_readCustomParameters(self, extra)
+		self._axes = [GSAxis._fromDict(axisData) for axisData in extra.pop("axes", None) or []]
+		self._masters = [GSFontMaster._fromDict(masterData) for masterData in extra.pop("fontMaster", None) or []]
+		self._instances = [GSInstance._fromDict(instanceData) for instanceData in extra.pop("instances", None) or []]
+		for child in self._axes + self._masters + self._instances:
+			child.parent = self
+		self._glyphs = []
+		self._clearGlyphIndex()
+		for glyphData in extra.pop("glyphs", None) or []:
+			self._addGlyph(GSGlyph._fromDict(glyphData))
+
+	def _toDict(self):
+		data = {"glyphs": [glyph._toDict() for glyph in self._glyphs]}
+		if self._axes:
+			data["axes"] = [axis._toDict() for axis in self._axes]
+		if self._masters:
+			data["fontMaster"] = [master._toDict() for master in self._masters]
+		if self._instances:
+			data["instances"] = [instance._toDict() for instance in self._instances]
+		if self._metrics:
+			data["metrics"] = self._metrics
+		_writeCustomParameters(self, data)
+		data.setdefault(".formatVersion", 3)
+		return self._writeKeys(data)
+
+	def save(self, path=None, formatVersion=3, makeCopy=False):
+		"""Save the font. Paths ending in .glyphspackage are written as package."""
+		if formatVersion != 3:
+			raise ValueError("Only format version 3 can be written")
+		if path is None:
+			path = self.filepath
+		if path is None:
+			raise ValueError("No path set")
+		path = os.fspath(path)
+		data = self._toDict()
+		if path.endswith(".glyphspackage"):
+			writePackage(data, path)
+		else:
+			writeFont(data, path)
+		if not makeCopy:
+			self.filepath = path
+
+	def copy(self):
+		font = GSFont._fromDict(copy.deepcopy(self._toDict()))
+		return font
+
+	# glyphs
+	#
+	# _glyphsByName: {name: glyph}
+	# _glyphsByUnicode: {code point: [glyphs]}, _glyphsByProductionName: {production name: [glyphs]}
+	# The lists are in the order of the glyphs in the font and almost always have one item. All three
+	# are updated when glyphs are added, removed or renamed, or their unicodes or production name change.
+
+	def _clearGlyphIndex(self):
+		self._glyphsByName = {}
+		self._glyphsByUnicode = {}
+		self._glyphsByProductionName = {}
+
+	def _indexGlyph(self, index, key, glyph):
+		glyphs = index.get(key)
+		if glyphs is None:
+			index[key] = [glyph]
+		elif glyph not in glyphs:
+			glyphs.append(glyph)
+			if glyph is self._glyphs[-1]:
+				return
+			# keep the order of the font, so the first glyph wins like in a search through all glyphs
+			position = self._glyphs.index(glyph)
+			glyphs.sort(key=lambda item: position if item is glyph else self._glyphs.index(item))
+
+	def _unindexGlyph(self, index, key, glyph):
+		glyphs = index.get(key)
+		if glyphs is not None and glyph in glyphs:
+			glyphs.remove(glyph)
+			if not glyphs:
+				del index[key]
+
+	def _addGlyph(self, glyph):
+		if glyph._name in self._glyphsByName:
+			raise NameError('There is a glyph with the name \"%s\" already in the font.' % glyph._name)
+		glyph.parent = self
+		self._glyphs.append(glyph)
+		self._glyphsByName[glyph._name] = glyph
+		for code in glyph._unicodes or ():
+			self._indexGlyph(self._glyphsByUnicode, code, glyph)
+		if glyph._productionName:
+			self._indexGlyph(self._glyphsByProductionName, glyph._productionName, glyph)
+		self._kerningChanged()
+
+	def _removeGlyph(self, glyph):
+		self._glyphs.remove(glyph)
+		if self._glyphsByName.get(glyph._name) is glyph:
+			del self._glyphsByName[glyph._name]
+		for code in glyph._unicodes or ():
+			self._unindexGlyph(self._glyphsByUnicode, code, glyph)
+		if glyph._productionName:
+			self._unindexGlyph(self._glyphsByProductionName, glyph._productionName, glyph)
+		glyph.parent = None
+		self._kerningChanged()
+
+	def _setGlyphs(self, glyphs):
+		for glyph in self._glyphs:
+			glyph.parent = None
+		self._glyphs = []
+		self._clearGlyphIndex()
+		for glyph in glyphs:
+			self._addGlyph(glyph)
+
+	def _renameGlyph(self, glyph, oldName, newName):
+		if self._glyphsByName.get(oldName) is glyph:
+			del self._glyphsByName[oldName]
+		self._glyphsByName[newName] = glyph
+		self._kerningChanged()
+
+	def _changedUnicodes(self, glyph, oldUnicodes):
+		for code in oldUnicodes or ():
+			self._unindexGlyph(self._glyphsByUnicode, code, glyph)
+		for code in glyph._unicodes or ():
+			self._indexGlyph(self._glyphsByUnicode, code, glyph)
+
+	def _changedProductionName(self, glyph, oldName):
+		if oldName:
+			self._unindexGlyph(self._glyphsByProductionName, oldName, glyph)
+		if glyph._productionName:
+			self._indexGlyph(self._glyphsByProductionName, glyph._productionName, glyph)
+
+	def _glyphForKey(self, key):
+		# by glyph name
+		glyph = self._glyphsByName.get(key)
+		if glyph is not None:
+			return glyph
+		# by string representation as 'ä' or by unicode
+		if len(key) == 1:
+			code = ord(key)
+		else:
+			try:
+				code = int(key, 16)
+			except ValueError:
+				return None
+		glyphs = self._glyphsByUnicode.get(code)
+		return glyphs[0] if glyphs else None
+
+	def glyphForName(self, name):
+		"""The glyph with the name, None if there is none."""
+		return self._glyphsByName.get(name)
+
+	def glyphForUnicode(self, code):
+		"""The first glyph with the unicode, given as hex string like "00C4" or as int. None if there is none."""
+		if isString(code):
+			try:
+				code = int(code, 16)
+			except ValueError:
+				return None
+		glyphs = self._glyphsByUnicode.get(code)
+		return glyphs[0] if glyphs else None
+
+	def glyphForCharacter(self, character):
+		"""The first glyph for the character, like "Ä". None if there is none."""
+		glyphs = self._glyphsByUnicode.get(ord(character) if isString(character) else character)
+		return glyphs[0] if glyphs else None
+
+	def glyphForProductionName(self, name):
+		"""The first glyph with the production name, like "uni00C4". None if there is none."""
+		glyphs = self._glyphsByProductionName.get(name)
+		return glyphs[0] if glyphs else None
+
+	@property
+	def glyphs(self):
+		return FontGlyphsProxy(self)
+
+	@glyphs.setter
+	def glyphs(self, value):
+		FontGlyphsProxy(self).setter(value)
+
+	@property
+	def masters(self):
+		return FontFontMasterProxy(self)
+
+	@masters.setter
+	def masters(self, value):
+		FontFontMasterProxy(self).setter(value)
+
+	@property
+	def axes(self):
+		return FontAxesProxy(self)
+
+	@axes.setter
+	def axes(self, value):
+		FontAxesProxy(self).setter(value)
+
+	@property
+	def instances(self):
+		return FontInstancesProxy(self)
+
+	@instances.setter
+	def instances(self, value):
+		FontInstancesProxy(self).setter(value)
+
+	@property
+	def customParameters(self):
+		return CustomParametersProxy(self)
+
+	@customParameters.setter
+	def customParameters(self, value):
+		CustomParametersProxy(self).setter(value)
+
+	@property
+	def upm(self):
+		return self._upm
+
+	@upm.setter
+	def upm(self, value):
+		self._upm = int(value)
+
+	unitsPerEm = upm
+
+	@property
+	def formatVersion(self):
+		return self._extra.get(".formatVersion", 3)
+
+	@property
+	def appVersion(self):
+		return self._extra.get(".appVersion")
+
+	def _setKerning(self, name, value):
+		setattr(self, name, value)
+		self._kerningChanged()
+
+	kerningLTR = property(lambda self: self._kerningLTR, lambda self, value: self._setKerning("_kerningLTR", value))
+	kerningRTL = property(lambda self: self._kerningRTL, lambda self, value: self._setKerning("_kerningRTL", value))
+	kerningVertical = property(lambda self: self._kerningVertical, lambda self, value: self._setKerning("_kerningVertical", value))
+
+	@property
+	def kerning(self):
+		if self._kerningLTR is None:
+			self._kerningLTR = {}
+		return self._kerningLTR
+
+	@kerning.setter
+	def kerning(self, value):
+		self.kerningLTR = value
+
+	def _kerningDict(self, direction, create=False):
+		if direction == GSRTL:
+			name = "_kerningRTL"
+		elif direction in (GSVertical, GSVerticalToRight):
+			name = "_kerningVertical"
+		else:
+			name = "_kerningLTR"
+		kerning = getattr(self, name)
+		if kerning is None and create:
+			kerning = {}
+			setattr(self, name, kerning)
+		return kerning
+
+	def _kerningChanged(self):
+		self._kerningIndexes.clear()
+
+	def kerningIndex(self, direction=GSLTR):
+		"""The KerningIndex for the direction. It is kept until glyphs, kerning groups or the kerning dicts are replaced."""
+		index = self._kerningIndexes.get(direction)
+		if index is None:
+			index = KerningIndex(self, direction)
+			self._kerningIndexes[direction] = index
+		return index
+
+	def _checkKerningKey(self, key):
+		if not key.startswith("@") and key not in self._glyphsByName:
+			raise KeyError("Glyphs with name: %s not found" % key)
+
+	def kerningForPair(self, FontMasterID, LeftKerningId, RightKerningId, direction=GSLTR):
+		"""The kerning value for the two glyph names or kerning group keys (@MMK_L_X, @MMK_R_X), None if not kerned."""
+		self._checkKerningKey(LeftKerningId)
+		self._checkKerningKey(RightKerningId)
+		return (self._kerningDict(direction) or {}).get(FontMasterID, {}).get(LeftKerningId, {}).get(RightKerningId)
+
+	def setKerningForPair(self, FontMasterID, LeftKerningId, RightKerningId, Value, direction=GSLTR):
+		self._checkKerningKey(LeftKerningId)
+		self._checkKerningKey(RightKerningId)
+		kerning = self._kerningDict(direction, create=True)
+		kerning.setdefault(FontMasterID, {}).setdefault(LeftKerningId, {})[RightKerningId] = _number(Value)
+		index = self._kerningIndexes.get(direction)
+		if index is not None:
+			index._setValue(FontMasterID, LeftKerningId, RightKerningId, _number(Value))
+
+	def removeKerningForPair(self, FontMasterID, LeftKerningId, RightKerningId, direction=GSLTR):
+		self._checkKerningKey(LeftKerningId)
+		self._checkKerningKey(RightKerningId)
+		masterKerning = (self._kerningDict(direction) or {}).get(FontMasterID, {})
+		pairs = masterKerning.get(LeftKerningId)
+		if pairs is not None:
+			pairs.pop(RightKerningId, None)
+			if not pairs:
+				del masterKerning[LeftKerningId]
+		index = self._kerningIndexes.get(direction)
+		if index is not None:
+			index._removeValue(FontMasterID, LeftKerningId, RightKerningId)
+
+	def kerningBatch(self, FontMasterID, direction=GSLTR):
+		"""Collect many kerning changes for a master and apply them together, see KerningBatch."""
+		return KerningBatch(self, FontMasterID, direction)
+
+	def _applyKerningChanges(self, FontMasterID, changes, direction):
+		# changes: {(left key, right key): value or None to remove the pair}
+		missing = set()
+		for pair in changes:
+			for key in pair:
+				if not key.startswith("@") and key not in self._glyphsByName:
+					missing.add(key)
+		if missing:
+			raise KeyError("Glyphs with name: %s not found" % ", ".join(sorted(missing)))
+		changes = dict((pair, _number(value)) for pair, value in changes.items())
+		kerning = self._kerningDict(direction, create=any(value is not None for value in changes.values()))
+		if kerning is not None:
+			masterKerning = kerning.setdefault(FontMasterID, {})
+			for (left, right), value in changes.items():
+				if value is None:
+					pairs = masterKerning.get(left)
+					if pairs is not None:
+						pairs.pop(right, None)
+						if not pairs:
+							del masterKerning[left]
+				else:
+					pairs = masterKerning.get(left)
+					if pairs is None:
+						pairs = masterKerning[left] = {}
+					pairs[right] = value
+			if not masterKerning:
+				del kerning[FontMasterID]
+		index = self._kerningIndexes.get(direction)
+		if index is not None:
+			index._updateValues(FontMasterID, changes)
+
+	def snapshot(self, fields, master=None, records=False):
+		"""Read `fields` (glyph attributes like "name" or "category" and master layer attributes like "width"
+		or "LSB") for all glyphs in one pass. Returns {field: column}, or a numpy.recarray with records=True.
+		`master` is a GSFontMaster, a master id or name, the first master by default. See snapshot.py."""
+		return fontSnapshot(self, fields, master, records)
+
+	def incompatibleGlyphs(self):
+		"""Check the compatibility of all glyphs in one pass.
+
+		Returns {glyph name: [(layer, reason), ...]} for the glyphs that have incompatible layers
+		(see GSGlyph.incompatibleLayers()). The layer signatures are cached, so calling this again
+		after editing some glyphs only recomputes the signatures of the changed layers."""
+		report = {}
+		for glyph in self._glyphs:
+			problems = glyph.incompatibleLayers()
+			if problems:
+				report[glyph._name] = problems
+		return report
@@ -0,0 +1,597 @@
+# encoding: utf-8
+
+"""Boolean operations on closed paths, without the app.
+
+removeOverlap(), subtractPaths() and intersectPaths() work like the functions
+of the GlyphsApp module (that use GSPathOperator inside the app), and
+GSLayer.removeOverlap() is added to the layer:
+
+	paths = removeOverlap(layer.paths)
+	paths = subtractPaths(layer.paths, otherLayer.paths)
+	layer.removeOverlap()
+
+The steps:
+
+1. The segments of the closed paths are flattened to line pieces that know the
+   segment and the t range they come from.
+2. Crossings between pieces are found with a sweep over x: a piece is only
+   compared with the pieces whose x range reaches into its own. Crossings on
+   curves are moved onto the curves with a few Newton steps.
+3. The pieces are split at the crossings; pieces that lie on top of each other
+   are merged.
+4. The winding numbers on both sides of each piece are counted with a sweep
+   over y (nonzero rule), so only the pieces at the height of a piece are
+   looked at.
+5. The pieces between the inside and the outside of the result are linked to
+   closed paths, with the inside on the left (outer paths counter clockwise).
+   Consecutive pieces of the same segment become one line or curve again, cut
+   from the original segment at the t values of their ends.
+
+Paths that don't cross or touch any other path are kept as they are
+(reversed if needed) or dropped as a whole. Quadratic curves stay quadratic.
+"""
+
+from __future__ import print_function
+
+import math
+
+from array import array
+
+from .constants import LINE, CURVE, OFFCURVE, QCURVE
+from .objects import GSLayer, GSPath, _segmentsFromPoints, _bytesForTypes, _smoothFlag
+from .geometry import _cubicFromSegment, _blossomPoint
+
+__all__ = ["removeOverlap", "subtractPaths", "intersectPaths"]
+
+# the largest distance between a curve and its flattened pieces
+flatness = 0.1
+# points closer than this are on the same line
+_tolerance = 1e-9
+# all points are rounded to multiples of this (a power of two, so the middle of two points is exact).
+# Without it a crossing could end up a rounding error away from the y of a horizontal line through it
+_grid = 2.0 ** -20
+
+_lineSegment = 0
+_cubicSegment = 1
+_quadraticSegment = 2
+
+_union = 0
+_difference = 1
+_intersection = 2
+
+
+##################################################################################
+#
+#
+#
+#           SEGMENTS
+#
+#
+#
+##################################################################################
+
+
+def _segmentPoint(segment, t):
+	if segment[0] == _lineSegment:
+		(x0, y0), (x1, y1) = segment[1]
+		return x0 + (x1 - x0) * t, y0 + (y1 - y0) * t
+	return _blossomPoint(segment[1], t, t, t)
+
+
+def _segmentDerivative(segment, t):
+	if segment[0] == _lineSegment:
+		(x0, y0), (x1, y1) = segment[1]
+		return x1 - x0, y1 - y0
+	(x0, y0), (x1, y1), (x2, y2), (x3, y3) = segment[1]
+	mt = 1 - t
+	return (
+		3 * (mt * mt * (x1 - x0) + 2 * mt * t * (x2 - x1) + t * t * (x3 - x2)),
+		3 * (mt * mt * (y1 - y0) + 2 * mt * t * (y2 - y1) + t * t * (y3 - y2)),
+	)
+
+
+def _snap(point):
+	return round(point[0] / _grid) * _grid, round(point[1] / _grid) * _grid
+
+
+def _flatteningSteps(curve):
+	# the distance between a cubic curve and n chords is at most 3/4 * max |P0 - 2 P1 + P2|, |P1 - 2 P2 + P3| / n²
+	(x0, y0), (x1, y1), (x2, y2), (x3, y3) = curve
+	bend = max(math.hypot(x0 - 2 * x1 + x2, y0 - 2 * y1 + y2), math.hypot(x1 - 2 * x2 + x3, y1 - 2 * y2 + y3))
+	return max(1, min(64, int(math.ceil(math.sqrt(0.75 * bend / flatness)))))
+
+
+class _Arrangement(object):
+	"""The pieces of all paths of one operation."""
+
+	def __init__(self):
+		# (kind, points) per segment
+		self.segments = []
+		# per piece: x0, y0, x1, y1, operand, segment index, t0, t1, contour index
+		self.pieces = []
+		# per contour: (path, operand, index of the first piece, index after the last piece)
+		self.contours = []
+
+	def addPaths(self, paths, operand):
+		for path in paths:
+			if not path.closed:
+				continue
+			points, types = path._points()
+			segments = _segmentsFromPoints(points, types, True)
+			if not segments:
+				continue
+			contourIndex = len(self.contours)
+			firstPiece = len(self.pieces)
+			for segment in segments:
+				segmentIndex = len(self.segments)
+				start = _snap(segment[0])
+				end = _snap(segment[-1])
+				if len(segment) == 2:
+					self.segments.append((_lineSegment, (start, end)))
+					steps = 1
+				else:
+					curve = _cubicFromSegment(segment)
+					self.segments.append((_quadraticSegment if len(segment) == 3 else _cubicSegment, curve))
+					steps = _flatteningSteps(curve)
+				previous = start
+				for step in range(1, steps + 1):
+					t = step / steps
+					point = end if step == steps else _snap(_blossomPoint(curve, t, t, t))
+					if point != previous:
+						self.pieces.append((previous[0], previous[1], point[0], point[1], operand, segmentIndex, (step - 1) / steps, t, contourIndex))
+					previous = point
+			if len(self.pieces) > firstPiece:
+				self.contours.append((path, operand, firstPiece, len(self.pieces)))
+
+	##################################################################################
+	# crossings
+
+	def findCrossings(self):
+		"""{piece index: [(t on the segment, point), ...]} for the pieces that need to be split."""
+		pieces = self.pieces
+		splits = {}
+		order = sorted(range(len(pieces)), key=lambda index: min(pieces[index][0], pieces[index][2]))
+		active = []
+		for index in order:
+			x0, y0, x1, y1 = pieces[index][:4]
+			xMin = min(x0, x1)
+			yMin = min(y0, y1)
+			yMax = max(y0, y1)
+			# the sweep line is at xMin; pieces that end before it can't cross any of the following pieces
+			active = [other for other in active if max(pieces[other][0], pieces[other][2]) >= xMin]
+			for other in active:
+				ox0, oy0, ox1, oy1 = pieces[other][:4]
+				if min(oy0, oy1) > yMax or max(oy0, oy1) < yMin:
+					continue
+				self._crossPieces(index, other, splits)
+			active.append(index)
+		return splits
+
+	def _crossPieces(self, first, second, splits):
+		pieces = self.pieces
+		ax0, ay0, ax1, ay1 = pieces[first][:4]
+		bx0, by0, bx1, by1 = pieces[second][:4]
+		rx, ry = ax1 - ax0, ay1 - ay0
+		sx, sy = bx1 - bx0, by1 - by0
+		qx, qy = bx0 - ax0, by0 - ay0
+		rLength = math.hypot(rx, ry)
+		sLength = math.hypot(sx, sy)
+		denominator = rx * sy - ry * sx
+		if abs(denominator) <= _tolerance * rLength * sLength:
+			# parallel: split at the ends of the other piece if they are on this one
+			if abs(qx * ry - qy * rx) > _tolerance * rLength:
+				return
+			self._splitAtPoint(first, (bx0, by0), splits)
+			self._splitAtPoint(first, (bx1, by1), splits)
+			self._splitAtPoint(second, (ax0, ay0), splits)
+			self._splitAtPoint(second, (ax1, ay1), splits)
+			return
+		t = (qx * sy - qy * sx) / denominator
+		u = (qx * ry - qy * rx) / denominator
+		tSlack = _tolerance / rLength
+		uSlack = _tolerance / sLength
+		if t < -tSlack or t > 1 + tSlack or u < -uSlack or u > 1 + uSlack:
+			return
+		firstInside = tSlack < t < 1 - tSlack
+		secondInside = uSlack < u < 1 - uSlack
+		if not firstInside and not secondInside:
+			# the pieces only meet at their ends
+			return
+		if not firstInside:
+			self._splitAtPoint(second, (ax0, ay0) if t < 0.5 else (ax1, ay1), splits)
+			return
+		if not secondInside:
+			self._splitAtPoint(first, (bx0, by0) if u < 0.5 else (bx1, by1), splits)
+			return
+		firstT = self._segmentT(first, t)
+		secondT = self._segmentT(second, u)
+		point = (ax0 + rx * t, ay0 + ry * t)
+		refined = self._refineCrossing(first, second, firstT, secondT)
+		if refined is not None:
+			firstT, secondT, point = refined
+		point = _snap(point)
+		splits.setdefault(first, []).append((firstT, point))
+		splits.setdefault(second, []).append((secondT, point))
+
+	def _segmentT(self, index, t):
+		piece = self.pieces[index]
+		return piece[6] + (piece[7] - piece[6]) * t
+
+	def _splitAtPoint(self, index, point, splits):
+		# split the piece at a point that is on it (the end of another piece)
+		x0, y0, x1, y1 = self.pieces[index][:4]
+		rx, ry = x1 - x0, y1 - y0
+		lengthSquared = rx * rx + ry * ry
+		t = ((point[0] - x0) * rx + (point[1] - y0) * ry) / lengthSquared
+		slack = _tolerance / math.sqrt(lengthSquared)
+		if slack < t < 1 - slack:
+			splits.setdefault(index, []).append((self._segmentT(index, t), point))
+
+	def _refineCrossing(self, first, second, firstT, secondT):
+		# Newton steps on segment(first)(t) - segment(second)(u) = 0, starting at the crossing of the pieces
+		firstPiece = self.pieces[first]
+		secondPiece = self.pieces[second]
+		firstSegment = self.segments[firstPiece[5]]
+		secondSegment = self.segments[secondPiece[5]]
+		if firstSegment[0] == _lineSegment and secondSegment[0] == _lineSegment:
+			return None
+		t, u = firstT, secondT
+		for _ in range(8):
+			ax, ay = _segmentPoint(firstSegment, t)
+			bx, by = _segmentPoint(secondSegment, u)
+			fx, fy = ax - bx, ay - by
+			if abs(fx) < 1e-9 and abs(fy) < 1e-9:
+				break
+			dax, day = _segmentDerivative(firstSegment, t)
+			dbx, dby = _segmentDerivative(secondSegment, u)
+			determinant = dbx * day - dax * dby
+			if abs(determinant) < 1e-12:
+				return None
+			t += (fx * dby - dbx * fy) / determinant
+			u += (day * fx - dax * fy) / determinant
+		else:
+			return None
+		# the crossing must stay on the two pieces, otherwise the pieces next to them have it
+		if not firstPiece[6] < t < firstPiece[7] or not secondPiece[6] < u < secondPiece[7]:
+			return None
+		return t, u, _segmentPoint(firstSegment, t)
+
+	##################################################################################
+	# edges
+
+	def edges(self, splits):
+		"""Split the pieces and merge the ones on top of each other.
+
+		Returns the edges as {(start, end): [windingA, windingB, segment index, t at start, t at end]} with
+		start < end, and the set of contours that cross or touch other contours or themselves."""
+		edges = {}
+		touched = set()
+		starts = {}
+		for index, piece in enumerate(self.pieces):
+			x0, y0, x1, y1, operand, segmentIndex, t0, t1, contourIndex = piece
+			points = [(t0, (x0, y0))]
+			pieceSplits = splits.get(index)
+			if pieceSplits:
+				touched.add(contourIndex)
+				points.extend(sorted(pieceSplits))
+			points.append((t1, (x1, y1)))
+			for (startT, start), (endT, end) in zip(points, points[1:]):
+				if start == end:
+					continue
+				# every point of a path starts one edge, more than one if paths touch there
+				if start in starts:
+					touched.add(contourIndex)
+					touched.add(starts[start])
+				starts[start] = contourIndex
+				if start < end:
+					key = (start, end)
+					direction = 1
+				else:
+					key = (end, start)
+					direction = -1
+					startT, endT = endT, startT
+				edge = edges.get(key)
+				if edge is None:
+					edge = edges[key] = [0, 0, segmentIndex, startT, endT, contourIndex]
+				else:
+					touched.add(contourIndex)
+					touched.add(edge[5])
+				edge[operand] += direction
+		return edges, touched
+
+
+##################################################################################
+#
+#
+#
+#           WINDING
+#
+#
+#
+##################################################################################
+
+
+def _windings(edges, queries):
+	"""The winding numbers (A, B) at the query points (x, y, above, edge key to skip).
+
+	above: True to count the edges as if the point was a bit above y, False for a bit below.
+	Edges are counted if they cross the horizontal line through the point left of it;
+	upwards +1, downwards -1, times the number of times the edge is in each operand."""
+	crossing = []
+	for (start, end), edge in edges.items():
+		if start[1] == end[1]:
+			continue
+		crossing.append((min(start[1], end[1]), max(start[1], end[1]), start, end, edge))
+	crossing.sort(key=lambda item: item[0])
+	order = sorted(range(len(queries)), key=lambda index: queries[index][1])
+	results = [None] * len(queries)
+	active = []
+	position = 0
+	for index in order:
+		px, py, above, skip = queries[index]
+		while position < len(crossing) and crossing[position][0] <= py:
+			active.append(crossing[position])
+			position += 1
+		active = [item for item in active if item[1] >= py]
+		windingA = windingB = 0
+		for yMin, yMax, start, end, edge in active:
+			if above:
+				if not yMin <= py < yMax:
+					continue
+			elif not yMin < py <= yMax:
+				continue
+			if (start, end) == skip:
+				continue
+			(x0, y0), (x1, y1) = start, end
+			if x0 + (py - y0) * (x1 - x0) / (y1 - y0) >= px:
+				continue
+			if y1 > y0:
+				windingA += edge[0]
+				windingB += edge[1]
+			else:
+				windingA -= edge[0]
+				windingB -= edge[1]
+		results[index] = (windingA, windingB)
+	return results
+
+
+def _inside(operation, windingA, windingB):
+	if operation == _union:
+		return windingA != 0 or windingB != 0
+	if operation == _difference:
+		return windingA != 0 and windingB == 0
+	return windingA != 0 and windingB != 0
+
+
+def _edgeSides(edges, keys):
+	"""The winding numbers (left, right) of the edges, left and right looking from start to end."""
+	queries = []
+	for start, end in keys:
+		middle = ((start[0] + end[0]) / 2, (start[1] + end[1]) / 2)
+		if start[1] == end[1]:
+			queries.append((middle[0], middle[1], True, (start, end)))
+			queries.append((middle[0], middle[1], False, (start, end)))
+		else:
+			queries.append((middle[0], middle[1], True, (start, end)))
+	windings = iter(_windings(edges, queries))
+	sides = []
+	for start, end in keys:
+		if start[1] == end[1]:
+			above = next(windings)
+			below = next(windings)
+			# start < end, so a horizontal edge goes to the right and the inside of a counter clockwise path is above
+			sides.append((above, below))
+		else:
+			# the winding left of the point; crossing the edge to the right adds the edge
+			west = next(windings)
+			edge = edges[(start, end)]
+			if end[1] > start[1]:
+				sides.append((west, (west[0] + edge[0], west[1] + edge[1])))
+			else:
+				# going down, left of the edge is the east side
+				sides.append(((west[0] - edge[0], west[1] - edge[1]), west))
+	return sides
+
+
+##################################################################################
+#
+#
+#
+#           RESULT PATHS
+#
+#
+#
+##################################################################################
+
+
+def _traceLoops(directedEdges):
+	"""Link the edges (start, end, segment index, t at start, t at end) to closed loops."""
+	outgoing = {}
+	for index, edge in enumerate(directedEdges):
+		outgoing.setdefault(edge[0], []).append(index)
+	used = [False] * len(directedEdges)
+	loops = []
+	for first in range(len(directedEdges)):
+		if used[first]:
+			continue
+		loop = []
+		current = first
+		while True:
+			used[current] = True
+			loop.append(directedEdges[current])
+			start, end = directedEdges[current][:2]
+			if end == directedEdges[first][0]:
+				break
+			candidates = [index for index in outgoing.get(end, ()) if not used[index]]
+			if not candidates:
+				break
+			if len(candidates) > 1:
+				# the sharpest turn to the left keeps the loop around one piece of the inside
+				dx, dy = end[0] - start[0], end[1] - start[1]
+
+				def turn(index):
+					nextEnd = directedEdges[index][1]
+					ox, oy = nextEnd[0] - end[0], nextEnd[1] - end[1]
+					return math.atan2(dx * oy - dy * ox, dx * ox + dy * oy)
+				current = max(candidates, key=turn)
+			else:
+				current = candidates[0]
+		if len(loop) > 1:
+			loops.append(loop)
+	return loops
+
+
+def _runs(loop):
+	# consecutive edges that come from the same segment, as (segment index, t at start, t at end, start, end)
+	count = len(loop)
+
+	def continues(previous, edge):
+		return previous[2] == edge[2] and previous[4] == edge[3]
+	# start with an edge that doesn't continue the one before it
+	offset = 0
+	for index in range(count):
+		if not continues(loop[index - 1], loop[index]):
+			offset = index
+			break
+	runs = []
+	for index in range(count):
+		edge = loop[(index + offset) % count]
+		if runs and continues(runs[-1][5], edge):
+			run = runs[-1]
+			runs[-1] = (run[0], run[1], edge[4], run[3], edge[1], edge)
+		else:
+			runs.append((edge[2], edge[3], edge[4], edge[0], edge[1], edge))
+	return [run[:5] for run in runs]
+
+
+def _pathFromLoop(loop, segments):
+	nodes = []
+	for segmentIndex, startT, endT, start, end in _runs(loop):
+		kind, points = segments[segmentIndex]
+		if kind == _lineSegment:
+			nodes.append((end, LINE))
+			continue
+		if (startT, endT) == (0, 1):
+			handle1, handle2 = points[1], points[2]
+		elif (startT, endT) == (1, 0):
+			handle1, handle2 = points[2], points[1]
+		else:
+			handle1 = _blossomPoint(points, startT, startT, endT)
+			handle2 = _blossomPoint(points, startT, endT, endT)
+		if kind == _quadraticSegment:
+			# the off curve point of the quadratic curve that was raised to this cubic one
+			nodes.append(((1.5 * handle1[0] - 0.5 * start[0], 1.5 * handle1[1] - 0.5 * start[1]), OFFCURVE))
+			nodes.append((end, QCURVE))
+		else:
+			nodes.append((handle1, OFFCURVE))
+			nodes.append((handle2, OFFCURVE))
+			nodes.append((end, CURVE))
+	path = GSPath()
+	coordinates = array("d")
+	types = bytearray()
+	for (x, y), nodeType in nodes:
+		coordinates.append(x)
+		coordinates.append(y)
+		types.append(_bytesForTypes[nodeType])
+	count = len(types)
+	for index, byte in enumerate(types):
+		if byte == _bytesForTypes[OFFCURVE]:
+			continue
+		previous = nodes[index - 1][0]
+		following = nodes[(index + 1) % count][0]
+		if _isSmooth(previous, nodes[index][0], following) and (byte != _bytesForTypes[LINE] or types[(index + 1) % count] == _bytesForTypes[OFFCURVE]):
+			types[index] = byte | _smoothFlag
+	path._coordinates = coordinates
+	path._types = types
+	return path
+
+
+def _isSmooth(previous, point, following):
+	ax, ay = point[0] - previous[0], point[1] - previous[1]
+	bx, by = following[0] - point[0], following[1] - point[1]
+	lengths = math.hypot(ax, ay) * math.hypot(bx, by)
+	if not lengths:
+		return False
+	return ax * bx + ay * by > 0 and abs(ax * by - ay * bx) <= 1e-6 * lengths
+
+
+def _pathOperation(paths, otherPaths, operation):
+	arrangement = _Arrangement()
+	arrangement.addPaths(paths, 0)
+	arrangement.addPaths(otherPaths, 1)
+	edges, touched = arrangement.edges(arrangement.findCrossings())
+
+	# contours that don't meet others need the sides of one edge only; they are kept as a whole or dropped
+	keys = []
+	untouched = []
+	for contourIndex, (path, operand, firstPiece, lastPiece) in enumerate(arrangement.contours):
+		if contourIndex not in touched:
+			x0, y0, x1, y1 = arrangement.pieces[firstPiece][:4]
+			key = ((x0, y0), (x1, y1)) if (x0, y0) < (x1, y1) else ((x1, y1), (x0, y0))
+			untouched.append((path, key, key[0] == (x0, y0)))
+			keys.append(key)
+	keys.extend(key for key, edge in edges.items() if edge[5] in touched)
+	sides = _edgeSides(edges, keys)
+
+	result = []
+	for (path, key, forwards), (left, right) in zip(untouched, sides):
+		insideLeft = _inside(operation, *left)
+		if insideLeft == _inside(operation, *right):
+			continue
+		path = path.copy()
+		if insideLeft != forwards:
+			path.reverse()
+		result.append(path)
+
+	directedEdges = []
+	for (start, end), (left, right) in zip(keys[len(untouched):], sides[len(untouched):]):
+		insideLeft = _inside(operation, *left)
+		if insideLeft == _inside(operation, *right):
+			continue
+		edge = edges[(start, end)]
+		if insideLeft:
+			directedEdges.append((start, end, edge[2], edge[3], edge[4]))
+		else:
+			directedEdges.append((end, start, edge[2], edge[4], edge[3]))
+	for loop in _traceLoops(directedEdges):
+		result.append(_pathFromLoop(loop, arrangement.segments))
+	return result
+
+
+def _pathList(paths):
+	# a list of paths, like the GlyphsApp functions also accept proxies with values()
+	try:
+		return list(paths)
+	except TypeError:
+		return list(paths.values())
+
+
+def removeOverlap(paths):
+	"""Removes the overlaps from the list of paths and returns the resulting list of paths.
+	Open paths are returned unchanged."""
+	paths = _pathList(paths)
+	openPaths = [path for path in paths if not path.closed]
+	return _pathOperation(paths, (), _union) + [path.copy() for path in openPaths]
+
+
+def subtractPaths(paths, subtract):
+	"""The parts of `paths` that are not covered by `subtract`."""
+	return _pathOperation(_pathList(paths), _pathList(subtract), _difference)
+
+
+def intersectPaths(paths, otherPaths):
+	"""The parts that are covered by both `paths` and `otherPaths`."""
+	return _pathOperation(_pathList(paths), _pathList(otherPaths), _intersection)
+
+
+def __GSLayer_RemoveOverlap__(self, checkSelection=False):
+	"""Joins all closed paths. The headless objects have no selection, `checkSelection` is ignored."""
+	shapes = list(self._shapes)
+	paths = [shape for shape in shapes if isinstance(shape, GSPath) and shape.closed]
+	if not paths:
+		return
+	others = [shape for shape in shapes if not (isinstance(shape, GSPath) and shape.closed)]
+	self.shapes = others + _pathOperation(paths, (), _union)
+
+
+GSLayer.removeOverlap = __GSLayer_RemoveOverlap__
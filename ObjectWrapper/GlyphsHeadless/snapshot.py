@@ -0,0 +1,116 @@
+# encoding: utf-8
+
+"""Read many attributes of all glyphs at once.
+
+	columns = font.snapshot(["name", "unicode", "category", "width", "LSB"], master=font.masters[0])
+	for name, width in zip(columns["name"], columns["width"]):
+		...
+
+The values are collected in one pass over the glyphs and returned as a dict of
+columns: array("d") for the numeric layer fields (NaN where a glyph has no
+layer for the master) and lists for everything else. With records=True and
+NumPy installed, a numpy.recarray with one row per glyph is returned instead.
+
+Glyph fields are read from the glyph, layer fields from the layer of the master.
+The bounds of a layer are computed once even if several side bearings are asked for.
+"""
+
+from __future__ import print_function
+
+from array import array
+from operator import attrgetter
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+__all__ = []
+
+glyphFields = dict((name, attrgetter(name)) for name in (
+	"name", "unicode", "unicodes", "string", "productionName", "category", "subCategory", "case", "script",
+	"leftKerningGroup", "rightKerningGroup", "topKerningGroup", "bottomKerningGroup",
+	"leftMetricsKey", "rightMetricsKey", "widthMetricsKey", "export", "locked", "color", "note", "mastersCompatible",
+))
+
+_nan = float("nan")
+
+
+def _layerWidth(layer, bounds):
+	return layer.width
+
+
+def _layerLSB(layer, bounds):
+	return bounds[0] if bounds is not None else 0
+
+
+def _layerRSB(layer, bounds):
+	return layer.width - bounds[2] if bounds is not None else 0
+
+
+def _layerVertWidth(layer, bounds):
+	return layer.vertWidth
+
+
+def _layerVertOrigin(layer, bounds):
+	return layer.vertOrigin
+
+
+# name: (reader(layer, bounds), needs the bounds)
+layerFields = {
+	"width": (_layerWidth, False),
+	"LSB": (_layerLSB, True),
+	"RSB": (_layerRSB, True),
+	"vertWidth": (_layerVertWidth, False),
+	"vertOrigin": (_layerVertOrigin, False),
+}
+
+
+def _masterId(font, master):
+	if master is None:
+		if not font._masters:
+			raise ValueError("the font has no masters")
+		return font._masters[0].id
+	if isinstance(master, str):
+		if font.masters[master] is None:
+			raise KeyError("no master with id or name: %s" % master)
+		return font.masters[master].id
+	return master.id
+
+
+def fontSnapshot(font, fields, master=None, records=False):
+	"""The values of `fields` for all glyphs of the font, see the module documentation."""
+	fields = list(fields)
+	unknown = [field for field in fields if field not in glyphFields and field not in layerFields]
+	if unknown:
+		raise KeyError("unknown snapshot fields: %s" % ", ".join(unknown))
+	if records and numpy is None:
+		raise ImportError("snapshot(records=True) needs NumPy")
+	glyphs = font._glyphs
+	columns = {}
+	glyphReaders = [(field, glyphFields[field]) for field in fields if field in glyphFields]
+	for field, reader in glyphReaders:
+		columns[field] = [reader(glyph) for glyph in glyphs]
+	layerReaders = [(field, layerFields[field][0]) for field in fields if field in layerFields]
+	if layerReaders:
+		masterId = _masterId(font, master)
+		needsBounds = any(layerFields[field][1] for field, _ in layerReaders)
+		layerColumns = [array("d") for _ in layerReaders]
+		missing = array("d", [_nan])
+		for glyph in glyphs:
+			layer = glyph._layerForId(masterId)
+			if layer is None:
+				for column in layerColumns:
+					column.extend(missing)
+				continue
+			bounds = layer._bounds() if needsBounds else None
+			for column, (_, reader) in zip(layerColumns, layerReaders):
+				value = reader(layer, bounds)
+				column.append(_nan if value is None else value)
+		for (field, _), column in zip(layerReaders, layerColumns):
+			columns[field] = column
+	if records:
+		return numpy.rec.fromarrays(
+			[numpy.asarray(columns[field], dtype=float if field in layerFields else object) for field in fields],
+			names=fields)
+	return dict((field, columns[field]) for field in fields)
@@ -0,0 +1,696 @@
+# encoding: utf-8
+# -*- coding: utf-8 -*-
+
+"""Tests for the headless object model in GlyphsHeadless. They run without Glyphs:
+
+	python3 "ObjectWrapper/Unit Test/HeadlessUnitTest.py"
+"""
+
+from __future__ import print_function
+
+import unittest
+
+import copy
+import filecmp
+import math
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import GlyphsHeadless  # noqa: E402
+from GlyphsHeadless import *  # noqa: E402,F401,F403
+
+from glyphsWriter import writePackage  # noqa: E402
+from formatBenchmark import synthesizeFont  # noqa: E402
+
+FileFormatFolder = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "GlyphsFileFormat")
+PathToTestFile = os.path.join(FileFormatFolder, "GlyphsFileFormatv3.glyphs")
+PathToTestPackage = os.path.join(FileFormatFolder, "GlyphsFileFormatv3.glyphspackage")
+PathsToSampleFiles = [PathToTestFile, os.path.join(FileFormatFolder, "files", "LinkedFontv3.glyphs")]
+
+
+def rectanglePath(x, y, width, height):
+	path = GSPath()
+	for position in ((x, y), (x + width, y), (x + width, y + height), (x, y + height)):
+		path.nodes.append(GSNode(position, LINE))
+	path.closed = True
+	return path
+
+
+def circlePath(x, y, radius):
+	# four curves, counter clockwise from the right
+	handle = radius * 0.5522847498
+	positions = (
+		(x + radius, y + handle), (x + handle, y + radius), (x, y + radius),
+		(x - handle, y + radius), (x - radius, y + handle), (x - radius, y),
+		(x - radius, y - handle), (x - handle, y - radius), (x, y - radius),
+		(x + handle, y - radius), (x + radius, y - handle), (x + radius, y),
+	)
+	path = GSPath()
+	for index, position in enumerate(positions):
+		path.nodes.append(GSNode(position, CURVE if index % 3 == 2 else OFFCURVE))
+	path.closed = True
+	return path
+
+
+def packageFiles(path):
+	files = []
+	for folder, _, names in os.walk(path):
+		files.extend(os.path.relpath(os.path.join(folder, name), path) for name in names)
+	return sorted(files)
+
+
+class GlyphsHeadlessTests(unittest.TestCase):
+
+	def setUp(self):
+		self.font = GSFont(PathToTestFile)
+		self.tempFolder = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.tempFolder)
+
+	def test_fileRoundTrip(self):
+		for path in PathsToSampleFiles:
+			font = GSFont(path)
+			copyPath = os.path.join(self.tempFolder, os.path.basename(path))
+			font.save(copyPath, makeCopy=True)
+			self.assertEqual(font.filepath, path)
+			self.assertTrue(filecmp.cmp(path, copyPath, shallow=False), path)
+
+	def test_packageRoundTrip(self):
+		font = GSFont(PathToTestPackage)
+		self.assertEqual(len(font.glyphs), len(self.font.glyphs))
+		copyPath = os.path.join(self.tempFolder, "Copy.glyphspackage")
+		font.save(copyPath)
+		self.assertEqual(font.filepath, copyPath)
+		self.assertEqual(packageFiles(copyPath), packageFiles(PathToTestPackage))
+		for name in packageFiles(PathToTestPackage):
+			self.assertTrue(filecmp.cmp(os.path.join(PathToTestPackage, name), os.path.join(copyPath, name), shallow=False), name)
+
+	def test_incrementalPackageSave(self):
+		font = GSFont(PathToTestPackage)
+		copyPath = os.path.join(self.tempFolder, "Copy.glyphspackage")
+		font.save(copyPath)
+		# nothing changed, nothing is written
+		self.assertEqual(writePackage(font._toDict(), copyPath), [])
+		glyph = font.glyphs["A"]
+		glyph.layers[font.masters[0].id].width += 10
+		written = writePackage(font._toDict(), copyPath)
+		self.assertEqual(len(written), 1)
+		self.assertTrue(written[0].startswith(os.path.join(copyPath, "glyphs", "A")))
+		# the saved package reads back with the change
+		font = GSFont(copyPath)
+		self.assertEqual(font.glyphs["A"].layers[font.masters[0].id].width, glyph.layers[font.masters[0].id].width)
+		# removed glyphs remove their file
+		del font.glyphs["A"]
+		font.save()
+		self.assertIsNone(GSFont(copyPath).glyphs["A"])
+		self.assertEqual(len(packageFiles(copyPath)), len(packageFiles(PathToTestPackage)) - 1)
+
+	def test_copy(self):
+		font = self.font.copy()
+		self.assertIsNot(font, self.font)
+		self.assertEqual(font._toDict(), self.font._toDict())
+		self.assertIs(font.glyphs[0].parent, font)
+
+
+	def test_interpolationCache(self):
+		font = self.font
+		glyph = font.glyphs["alef-ar"]
+		cache = InterpolationCache(font)
+		node = glyph.layers[font.masters[0].id].paths[0].nodes[0]
+		otherNode = glyph.layers[font.masters[1].id].paths[0].nodes[0]
+		middle = cache.interpolatedLayer(glyph, (0.5, 0.5)).paths[0].nodes[0]
+		self.assertEqual(middle.x, (node.x + otherNode.x) * 0.5)
+		matrix = cache.matrix(glyph)
+		# the layers are flattened once, then only the layers that changed
+		layerValues = GlyphsHeadless.interpolation.layerValues
+		readLayers = []
+		GlyphsHeadless.interpolation.layerValues = lambda layer: readLayers.append(layer) or layerValues(layer)
+		try:
+			for weight in (0, 0.25, 0.5, 1):
+				cache.interpolatedLayer(glyph, (1 - weight, weight))
+			self.assertEqual(readLayers, [])
+			# moved nodes are picked up without clear()
+			node.x += 100
+			middle = cache.interpolatedLayer(glyph, (0.5, 0.5)).paths[0].nodes[0]
+			self.assertEqual(readLayers, [node.parent.parent])
+		finally:
+			GlyphsHeadless.interpolation.layerValues = layerValues
+		self.assertEqual(middle.x, (node.x + otherNode.x) * 0.5)
+		self.assertIs(cache.matrix(glyph), matrix)
+		otherNode.parent.applyTransform((1, 0, 0, 1, 10, 0))
+		middle = cache.interpolatedLayer(glyph, (0.5, 0.5)).paths[0].nodes[0]
+		self.assertEqual(middle.x, (node.x + otherNode.x) * 0.5)
+		# a change of the structure is checked again
+		glyph.layers[font.masters[0].id].paths[0].nodes.append(GSNode((0, 0), LINE))
+		with self.assertRaises(ValueError):
+			cache.matrix(glyph)
+
+
+	def test_layerIndex(self):
+		font = self.font
+		glyph = font.glyphs["A"]
+		regular, black = [glyph.layers[master.id] for master in font.masters]
+		self.assertEqual(list(glyph.layers)[:2], [regular, black])
+		self.assertEqual(len(glyph.layers), 4)
+		# the master layers follow the order of the masters
+		font.masters = list(reversed(font.masters))
+		self.assertEqual(list(glyph.layers)[:2], [black, regular])
+		self.assertIs(glyph.layers[0], black)
+		font.masters = list(reversed(font.masters))
+		# a new layer id is found at once, the old one isn't
+		layer = glyph.layers[2]
+		oldId = layer.layerId
+		layer.layerId = "newLayerId"
+		self.assertIs(glyph.layers["newLayerId"], layer)
+		self.assertIsNone(glyph.layers[oldId])
+		# a master layer that gets associated with another master isn't a master layer any more
+		black.associatedMasterId = font.masters[0].id
+		self.assertFalse(black.isMasterLayer)
+		self.assertIs(glyph.layers[0], regular)
+		self.assertNotEqual(list(glyph.layers).index(black), 1)
+		self.assertEqual(len(glyph.layers), 4)
+		black.associatedMasterId = None
+		self.assertIs(glyph.layers[1], black)
+		# adding and removing layers
+		newLayer = GSLayer()
+		newLayer.name = "Brace"
+		newLayer.associatedMasterId = font.masters[0].id
+		glyph.layers.append(newLayer)
+		self.assertEqual(len(glyph.layers), 5)
+		self.assertIs(glyph.layers[newLayer.layerId], newLayer)
+		self.assertIs(list(glyph.layers)[-1], newLayer)
+		del glyph.layers[newLayer.layerId]
+		self.assertEqual(len(glyph.layers), 4)
+		self.assertIsNone(glyph.layers[newLayer.layerId])
+		# a layer id that is the name of a master doesn't make a master layer
+		newLayer = GSLayer()
+		glyph.layers.append(newLayer)
+		newLayer.layerId = font.masters[1].name
+		newLayer.associatedMasterId = None
+		self.assertFalse(newLayer.isMasterLayer)
+		self.assertIs(list(glyph.layers)[1], black)
+
+
+	def test_glyphIndex(self):
+		font = self.font
+		glyph = font.glyphs["B"]
+		self.assertIs(font.glyphs["0042"], glyph)
+		self.assertIs(font.glyphs["b"], glyph)
+		self.assertIs(font.glyphForCharacter("B"), glyph)
+		# renaming
+		glyph.name = "B.alt"
+		self.assertIsNone(font.glyphForName("B"))
+		self.assertIs(font.glyphs["B.alt"], glyph)
+		self.assertIs(font.glyphForName("B.alt"), glyph)
+		self.assertIn("B.alt", font.glyphs)
+		# unicodes
+		glyph.unicode = "E000"
+		self.assertIsNone(font.glyphForUnicode("0042"))
+		self.assertIsNone(font.glyphForCharacter("b"))
+		self.assertIs(font.glyphForUnicode(0xE000), glyph)
+		glyph.unicodes = ["0042", "E001"]
+		self.assertIsNone(font.glyphForUnicode("E000"))
+		self.assertIs(font.glyphForCharacter("B"), glyph)
+		self.assertIs(font.glyphForUnicode("E001"), glyph)
+		# the second glyph with a unicode is found when the first one is removed
+		other = GSGlyph("B.other")
+		other.unicode = "0042"
+		font.glyphs.append(other)
+		self.assertIs(font.glyphForUnicode("0042"), glyph)
+		del font.glyphs["B.alt"]
+		self.assertIs(font.glyphForUnicode("0042"), other)
+		# production names
+		other.productionName = "uniE0FF"
+		self.assertIs(font.glyphForProductionName("uniE0FF"), other)
+		other.productionName = None
+		self.assertIsNone(font.glyphForProductionName("uniE0FF"))
+		# replacing all glyphs rebuilds the index
+		font.glyphs = [glyph]
+		self.assertIsNone(font.glyphs["B.other"])
+		self.assertIs(font.glyphs["B.alt"], glyph)
+		self.assertIs(font.glyphs["B"], glyph)
+
+
+	def test_kerningBatch(self):
+		font = self.font
+		masterId = font.masters[0].id
+		index = font.kerningIndex()
+		with font.kerningBatch(masterId) as batch:
+			batch["A", "C"] = -20
+			batch["@MMK_L_A", "D"] = -15.5
+			batch.update({"B": {"A": 10}, ("C", "A"): -5})
+			del batch["A", "B"]
+			# nothing is changed before the end of the block
+			self.assertEqual(font.kerningForPair(masterId, "A", "B"), 30)
+			self.assertIsNone(font.kerningForPair(masterId, "A", "C"))
+		self.assertEqual(font.kerningForPair(masterId, "A", "C"), -20)
+		self.assertEqual(font.kerningForPair(masterId, "@MMK_L_A", "D"), -15.5)
+		self.assertEqual(font.kerningForPair(masterId, "B", "A"), 10)
+		self.assertEqual(font.kerningForPair(masterId, "C", "A"), -5)
+		self.assertIsNone(font.kerningForPair(masterId, "A", "B"))
+		# the other master is not touched
+		self.assertEqual(font.kerningForPair(font.masters[1].id, "A", "B"), 30)
+		# the index is updated, not rebuilt
+		self.assertIs(font.kerningIndex(), index)
+		self.assertEqual(index.kerningForPair(masterId, "A", "C"), -20)
+		self.assertEqual(index.kerningForPair(masterId, "A", "D"), -15.5)
+		self.assertEqual(index.kerningForPair(masterId, "A.ss01", "A"), None)
+		self.assertIsNone(index.kerningForPair(masterId, "A", "B"))
+
+	def test_kerningBatchRollback(self):
+		font = self.font
+		masterId = font.masters[0].id
+		kerning = copy.deepcopy(font.kerningLTR)
+		index = font.kerningIndex()
+		with self.assertRaises(ZeroDivisionError):
+			with font.kerningBatch(masterId) as batch:
+				batch["A", "C"] = -20
+				del batch["A", "B"]
+				1 / 0
+		self.assertEqual(font.kerningLTR, kerning)
+		self.assertEqual(index.kerningForPair(masterId, "A", "B"), 30)
+		self.assertIsNone(index.kerningForPair(masterId, "A", "C"))
+		# all names are checked before anything is changed
+		batch = font.kerningBatch(masterId)
+		batch["A", "C"] = -20
+		batch["A", "notAGlyph"] = -20
+		with self.assertRaises(KeyError):
+			batch.apply()
+		self.assertEqual(font.kerningLTR, kerning)
+		self.assertIsNone(index.kerningForPair(masterId, "A", "C"))
+		# empty and None keys are refused when they are added
+		batch = font.kerningBatch(masterId)
+		for pair in (("", "A"), ("A", None)):
+			with self.assertRaises(KeyError):
+				batch[pair] = -20
+		with self.assertRaises(KeyError):
+			batch.update({"A": {"C": -20, "": -20}})
+		self.assertEqual(len(batch), 0)
+
+
+	def kernedFont(self):
+		# glyphs in groups, with group kerning, exceptions, redundant exceptions and zero pairs
+		font = GSFont._fromDict(synthesizeFont(40, nodeCount=4, kerningDensity=0.1))
+		names = [glyph.name for glyph in font.glyphs]
+		for index, glyph in enumerate(font.glyphs):
+			glyph.leftKerningGroup = "L%d" % (index % 5) if index % 4 else None
+			glyph.rightKerningGroup = "R%d" % (index % 3) if index % 3 else None
+		index = font.kerningIndex()
+		for masterNumber, master in enumerate(font.masters):
+			with font.kerningBatch(master.id) as batch:
+				for first in range(3):
+					for second in range(5):
+						batch["@MMK_L_R%d" % first, "@MMK_R_L%d" % second] = -10 * (first + second + masterNumber)
+				for first, second in zip(names[::3], names[1::3]):
+					group = index.groupKeys(first)[0]
+					if group:
+						batch[group, second] = -33
+				for first, second in zip(names[1:12], names[20:31]):
+					batch[first, second] = 0
+				# exceptions with the value of the group pair are redundant
+				batch[names[1], names[2]] = index.kerningForPair(master.id, names[1], names[2]) or 0
+		return font
+
+	def test_compactKerning(self):
+		font = self.kernedFont()
+		names = [glyph.name for glyph in font.glyphs]
+		index = KerningIndex(font)
+		compact = CompactKerning(font)
+		self.assertEqual(compact.toKerningDict(), font.kerningLTR)
+		for master in font.masters:
+			for first in names:
+				for second in names:
+					self.assertEqual(compact.kerningForPair(master.id, first, second), index.kerningForPair(master.id, first, second), (first, second))
+					self.assertEqual(compact.sourceForPair(master.id, first, second), index.sourceForPair(master.id, first, second))
+		with self.assertRaises(TypeError):
+			compact._setValue(font.masters[0].id, names[0], names[1], 10)
+		with self.assertRaises(KeyError):
+			compact.kerningForPair(font.masters[0].id, "notAGlyph", names[1])
+
+	def test_compactKerningRedundantPairs(self):
+		font = self.kernedFont()
+		names = [glyph.name for glyph in font.glyphs]
+		before = KerningIndex(font)
+		compact = CompactKerning(font)
+		redundant = compact.redundantPairs()
+		self.assertTrue(all(redundant.values()))
+		self.assertTrue(set(compact.zeroPairs()[font.masters[0].id]))
+		font.kerningLTR = compact.toKerningDict(removeRedundant=True)
+		after = KerningIndex(font)
+		for master in font.masters:
+			self.assertEqual(CompactKerning(font).redundantPairs(master.id)[master.id], [])
+			for first in names:
+				for second in names:
+					self.assertEqual(after.kerningForPair(master.id, first, second) or 0, before.kerningForPair(master.id, first, second) or 0)
+
+
+	def test_pathOperations(self):
+		first = rectanglePath(0, 0, 100, 100)
+		second = rectanglePath(50, 50, 100, 100)
+		self.assertEqual(first.area, 10000)
+		union = removeOverlap([first, second])
+		self.assertEqual(len(union), 1)
+		self.assertEqual(union[0].area, 17500)
+		self.assertEqual(len(union[0].nodes), 8)
+		difference = subtractPaths([first], [second])
+		self.assertEqual([path.area for path in difference], [7500])
+		intersection = intersectPaths([first], [second])
+		self.assertEqual([path.area for path in intersection], [2500])
+		bounds = intersection[0].bounds
+		self.assertEqual((bounds.origin.x, bounds.origin.y, bounds.size.width, bounds.size.height), (50, 50, 50, 50))
+		# the input is not changed
+		self.assertEqual(first.area, 10000)
+		self.assertEqual(len(second.nodes), 4)
+		# a hole, paths that don't touch and clockwise paths
+		inner = rectanglePath(25, 25, 50, 50)
+		difference = subtractPaths([first], [inner])
+		self.assertEqual(sorted(path.area for path in difference), [-2500, 10000])
+		distant = rectanglePath(300, 0, 100, 100)
+		distant.reverse()
+		self.assertEqual(distant.area, -10000)
+		union = removeOverlap([first, second, distant])
+		self.assertEqual(sorted(path.area for path in union), [10000, 17500])
+		self.assertEqual(intersectPaths([first], [distant]), [])
+
+	def test_pathOperationsCurves(self):
+		first = circlePath(0, 0, 100)
+		second = circlePath(100, 0, 100)
+		union = removeOverlap([first, second])
+		difference = subtractPaths([first], [second])
+		intersection = intersectPaths([first], [second])
+		for paths in (union, difference, intersection):
+			self.assertEqual(len(paths), 1)
+			self.assertEqual(set(node.type for node in paths[0].nodes), set((CURVE, OFFCURVE)))
+		unionArea, differenceArea, intersectionArea = union[0].area, difference[0].area, intersection[0].area
+		# the areas are measured on flattened curves
+		self.assertAlmostEqual(unionArea + intersectionArea, first.area + second.area, delta=first.area * 0.005)
+		self.assertAlmostEqual(differenceArea + intersectionArea, first.area, delta=first.area * 0.005)
+		self.assertAlmostEqual(intersectionArea, 2 * 100 * 100 * math.acos(0.5) - 50 * math.sqrt(30000), delta=intersectionArea * 0.01)
+
+	def test_layerRemoveOverlap(self):
+		layer = GSLayer()
+		layer.shapes = [rectanglePath(0, 0, 100, 100), rectanglePath(50, 50, 100, 100), GSComponent("A")]
+		openPath = rectanglePath(0, 200, 10, 10)
+		openPath.closed = False
+		layer.shapes.append(openPath)
+		layer.removeOverlap()
+		self.assertEqual(len(layer.shapes), 3)
+		self.assertEqual(len(layer.components), 1)
+		self.assertEqual(sorted(path.area for path in layer.paths if path.closed), [17500])
+		self.assertEqual(len([path for path in layer.paths if not path.closed]), 1)
+
+
+	def cleanUpTestFont(self):
+		font = GSFont._fromDict(synthesizeFont(60, nodeCount=12))
+		for glyph in list(font.glyphs)[::5]:
+			for layer in glyph.layers:
+				layer.paths[0].reverse()
+		# a node in the middle of a line
+		for layer in font.glyphs[1].layers:
+			path = rectanglePath(600, 0, 100, 100)
+			path.nodes.insert(1, GSNode((650, 0), LINE))
+			layer.shapes.append(path)
+		return font
+
+	def test_cleanUpFont(self):
+		font = self.cleanUpTestFont()
+		counts = cleanUpFont(font)
+		self.assertEqual(counts["incompatibleGlyphs"], [])
+		self.assertGreater(counts["pathsReversed"], 0)
+		self.assertGreater(counts["nodesAdded"], 0)
+		# the inserted nodes
+		self.assertEqual(counts["nodesRemoved"], 2)
+		self.assertEqual(font.incompatibleGlyphs(), {})
+		# a second run changes nothing
+		self.assertEqual(cleanUpFont(font), {"nodesAdded": 0, "nodesRemoved": 0, "pathsReversed": 0, "incompatibleGlyphs": []})
+
+	def test_cleanUpFontProcesses(self):
+		font = self.cleanUpTestFont()
+		otherFont = font.copy()
+		counts = cleanUpFont(font)
+		parallelThreshold = GlyphsHeadless.cleanup.parallelThreshold
+		GlyphsHeadless.cleanup.parallelThreshold = 0
+		try:
+			otherCounts = cleanUpFont(otherFont, processes=2)
+		finally:
+			GlyphsHeadless.cleanup.parallelThreshold = parallelThreshold
+		self.assertEqual(otherCounts, counts)
+		self.assertEqual(otherFont._toDict(), font._toDict())
+
+	def test_cleanUpFontKeepCompatible(self):
+		font = GSFont._fromDict(synthesizeFont(2, nodeCount=12))
+		glyph = font.glyphs[0]
+		firstLayer, secondLayer = [glyph.layers[master.id] for master in font.masters]
+		# the extremes of the rotated circle are missing
+		firstLayer.shapes = [circlePath(0, 0, 100)]
+		path = circlePath(0, 0, 100)
+		path.applyTransform((0.7071, 0.7071, -0.7071, 0.7071, 0, 0))
+		secondLayer.shapes = [path]
+		self.assertEqual(glyph.incompatibleLayers(), [])
+		counts = cleanUpFont(font, glyphNames=[glyph.name])
+		self.assertEqual(counts["incompatibleGlyphs"], [glyph.name])
+		self.assertEqual(len(secondLayer.paths[0].nodes), 12)
+		counts = cleanUpFont(font, glyphNames=[glyph.name], keepCompatible=False)
+		self.assertEqual(counts["incompatibleGlyphs"], [])
+		self.assertEqual(len(secondLayer.paths[0].nodes), 24)
+		with self.assertRaises(KeyError):
+			cleanUpFont(font, glyphNames=["notAGlyph"])
+
+
+	def test_removeManyGlyphs(self):
+		font = self.font
+		names = [glyph.name for glyph in font.glyphs]
+		glyphB = font.glyphs["B"]
+		# by name, index (also negative) and object, in one call
+		font.glyphs.removeMany(["A", 1, -1, glyphB])
+		removed = set(["A", names[1], names[-1], "B"])
+		self.assertEqual([glyph.name for glyph in font.glyphs], [name for name in names if name not in removed])
+		self.assertIsNone(font.glyphs["A"])
+		self.assertIsNone(font.glyphForUnicode("0042"))
+		self.assertIsNone(glyphB.parent)
+		count = len(font.glyphs)
+		with self.assertRaises(KeyError):
+			font.glyphs.removeMany(["C", "notAGlyph"])
+		with self.assertRaises(IndexError):
+			font.glyphs.removeMany([count])
+		self.assertEqual(len(font.glyphs), count)
+		self.assertIsNotNone(font.glyphs["C"])
+		# glyphs that are not in the font are ignored
+		font.glyphs.removeMany([GSGlyph("other")])
+		self.assertEqual(len(font.glyphs), count)
+
+	def test_removeMany(self):
+		font = self.font
+		glyph = font.glyphs["A"]
+		# layers keep their order
+		layers = list(glyph.layers)
+		glyph.layers.removeMany([3, layers[2]])
+		self.assertEqual(list(glyph.layers), layers[:2])
+		self.assertIsNone(layers[2].parent)
+		# nodes are found by index
+		path = font.glyphs["alef-ar"].layers[0].paths[0]
+		positions = [node.position for node in path.nodes]
+		path.nodes.removeMany([0, 2, -1])
+		self.assertEqual([node.position for node in path.nodes], positions[1:2] + positions[3:-1])
+		# replaceAll, clear and extend are single changes as well
+		anchors = list(glyph.layers[0].anchors)
+		self.assertGreater(len(anchors), 1)
+		glyph.layers[0].anchors.clear()
+		self.assertEqual(len(glyph.layers[0].anchors), 0)
+		glyph.layers[0].anchors.extend(anchors)
+		self.assertEqual([anchor.name for anchor in glyph.layers[0].anchors], [anchor.name for anchor in anchors])
+		glyph.layers[0].anchors.replaceAll(anchors[:1])
+		self.assertEqual(len(glyph.layers[0].anchors), 1)
+
+
+	def test_snapshot(self):
+		font = self.font
+		first, second = font.masters
+		columns = font.snapshot(["name", "unicode", "width", "LSB", "RSB"])
+		self.assertEqual(columns["name"], [glyph.name for glyph in font.glyphs])
+		self.assertEqual(columns["unicode"], [glyph.unicode for glyph in font.glyphs])
+		glyph = font.glyphs["A"]
+		index = columns["name"].index("A")
+		layer = glyph.layers[first.id]
+		# the first master by default
+		self.assertEqual(columns["width"][index], layer.width)
+		self.assertEqual(columns["LSB"][index], layer.LSB)
+		self.assertEqual(columns["RSB"][index], layer.RSB)
+		# masters by object, id and name
+		widths = [glyph.layers[second.id].width for glyph in font.glyphs]
+		for master in (second, second.id, second.name):
+			self.assertEqual(list(font.snapshot(["width"], master=master)["width"]), widths)
+		with self.assertRaises(KeyError):
+			font.snapshot(["width"], master="notAMaster")
+		with self.assertRaises(KeyError):
+			font.snapshot(["notAField"])
+		# glyphs without a layer for the master get NaN
+		font.glyphs.append(GSGlyph("empty"))
+		width = font.snapshot(["width"])["width"][-1]
+		self.assertNotEqual(width, width)
+
+
+	def test_nodeStorage(self):
+		path = rectanglePath(0, 0, 100, 100)
+		node = path.nodes[1]
+		self.assertEqual(node.position, (100, 0))
+		# the nodes are views on the arrays of the path
+		node.x += 10
+		self.assertEqual(path.nodes[1].x, 110)
+		self.assertEqual(list(path._coordinates[2:4]), [110, 0])
+		node.type = CURVE
+		node.smooth = True
+		self.assertEqual(path.nodes[1].type, CURVE)
+		self.assertTrue(path.nodes[1].smooth)
+		self.assertIs(node.parent, path)
+		path.nodes.insert(1, GSNode((50, -10), OFFCURVE))
+		path.nodes.insert(1, GSNode((20, -10), OFFCURVE))
+		self.assertEqual([node.type for node in path.nodes], [LINE, OFFCURVE, OFFCURVE, CURVE, LINE, LINE])
+		self.assertEqual(path.nodes[3].position, (110, 0))
+		del path.nodes[1:3]
+		self.assertEqual(len(path.nodes), 4)
+		# copies don't share the arrays
+		copied = path.copy()
+		copied.nodes[0].x = 500
+		self.assertEqual(path.nodes[0].x, 0)
+		self.assertEqual(GSPath._fromDict(path._toDict())._toDict(), path._toDict())
+		# nodes keep their userData when other nodes are removed
+		path.nodes[2].userData["key"] = "value"
+		path.nodes.removeMany([0])
+		self.assertEqual(path.nodes[1].userData["key"], "value")
+
+
+	def test_compatibilitySignature(self):
+		font = self.font
+		glyph = font.glyphs["alef-ar"]
+		firstLayer, secondLayer = [glyph.layers[master.id] for master in font.masters]
+		self.assertEqual(glyph.incompatibleLayers(), [])
+		self.assertNotIn("alef-ar", font.incompatibleGlyphs())
+		signature = firstLayer.compatibilitySignature
+		self.assertIs(firstLayer.compatibilitySignature, signature)
+		# moving nodes doesn't change the structure
+		firstLayer.paths[0].nodes[0].x += 10
+		self.assertIs(firstLayer.compatibilitySignature, signature)
+		# node types, added nodes, anchors and components do
+		node = firstLayer.paths[0].nodes[0]
+		oldType = node.type
+		node.type = OFFCURVE if oldType != OFFCURVE else LINE
+		self.assertNotEqual(firstLayer.compatibilitySignature, signature)
+		self.assertEqual(len(glyph.incompatibleLayers()), 1)
+		self.assertIn("alef-ar", font.incompatibleGlyphs())
+		node.type = oldType
+		self.assertEqual(firstLayer.compatibilitySignature, signature)
+		self.assertNotIn("alef-ar", font.incompatibleGlyphs())
+		secondLayer.paths[0].nodes.append(GSNode((0, 0), LINE))
+		self.assertIs(glyph.incompatibleLayers()[0][0], secondLayer)
+		del secondLayer.paths[0].nodes[-1]
+		self.assertEqual(glyph.incompatibleLayers(), [])
+		firstLayer.anchors.append(GSAnchor("top"))
+		anchor = GSAnchor("bottom")
+		secondLayer.anchors.append(anchor)
+		self.assertEqual(len(glyph.incompatibleLayers()), 1)
+		anchor.name = "top"
+		self.assertEqual(glyph.incompatibleLayers(), [])
+		firstLayer.shapes.append(GSComponent("A"))
+		secondLayer.shapes.append(GSComponent("B"))
+		self.assertEqual(len(glyph.incompatibleLayers()), 1)
+		secondLayer.components[0].componentName = "A"
+		self.assertEqual(glyph.incompatibleLayers(), [])
+
+
+	def test_kerningIndex(self):
+		font = self.font
+		masterId = font.masters[0].id
+		font.glyphs["B"].leftKerningGroup = "B"
+		font.glyphs["D"].leftKerningGroup = "B"
+		font.glyphs["C"].rightKerningGroup = "A"
+		with font.kerningBatch(masterId) as batch:
+			batch["@MMK_L_A", "@MMK_R_B"] = -50
+			batch["A", "@MMK_R_B"] = -40
+		index = font.kerningIndex()
+		# the most specific pair wins: glyph-glyph, glyph-group, group-glyph, group-group
+		self.assertEqual(index.kerningForPair(masterId, "A", "B"), 30)
+		self.assertEqual(index.sourceForPair(masterId, "A", "B"), ("A", "B"))
+		self.assertEqual(index.kerningForPair(masterId, "A", "D"), -40)
+		self.assertEqual(index.sourceForPair(masterId, "A", "D"), ("A", "@MMK_R_B"))
+		self.assertEqual(index.kerningForPair(masterId, "C", "D"), -50)
+		self.assertEqual(index.sourceForPair(masterId, "C", "D"), ("@MMK_L_A", "@MMK_R_B"))
+		self.assertIsNone(index.kerningForPair(masterId, "A", "C"))
+		self.assertIsNone(index.kerningForPair(font.masters[1].id, "A", "D"))
+		with self.assertRaises(KeyError):
+			index.kerningForPair(masterId, "A", "notAGlyph")
+		firstNames, secondNames, matrix = index.matrix(masterId, ["A", "B", "C"], ["B", "C", "D"])
+		self.assertEqual([[matrix[row][column] for column in range(3)] for row in range(3)], [[30, 0, -40], [0, 0, 0], [-50, 0, -50]])
+		# the index is rebuilt when the groups change
+		font.glyphs["C"].rightKerningGroup = None
+		self.assertIsNot(font.kerningIndex(), index)
+		index = font.kerningIndex()
+		self.assertEqual(index.groupKeys("C"), (None, None))
+		self.assertIsNone(index.kerningForPair(masterId, "C", "D"))
+		self.assertEqual(index.kerningForPair(masterId, "A", "D"), -40)
+
+
+	def geometryResults(self):
+		curves = curvesForPaths([circlePath(0, 0, 100), rectanglePath(0, 0, 30, 40)])
+		return {
+			"curves": [[tuple(map(float, point)) for point in curve] for curve in curves],
+			"bounds": [tuple(map(float, bounds)) for bounds in curveBounds(curves)],
+			"lengths": [float(length) for length in curveLengths(curves)],
+			"extrema": curveExtrema(curves),
+			"divided": [[tuple(map(float, point)) for point in points] for points in divideCurves(curves, 0.25)],
+			"points": [[tuple(map(float, point)) for point in points] for points in pointsOnCurves(curves, (0, 0.5, 1))],
+		}
+
+	def test_geometry(self):
+		results = self.geometryResults()
+		self.assertEqual(len(results["curves"]), 8)
+		# a quarter circle each, lines are raised to curves
+		self.assertEqual(results["bounds"][:4], [(0, 0, 100, 100), (-100, 0, 0, 100), (-100, -100, 0, 0), (0, -100, 100, 0)])
+		# closed paths start with the closing segment
+		self.assertEqual(results["bounds"][4:], [(0, 0, 0, 40), (0, 0, 30, 0), (30, 0, 30, 40), (0, 40, 30, 40)])
+		self.assertAlmostEqual(sum(results["lengths"][:4]), 2 * math.pi * 100, delta=0.1)
+		for length, expected in zip(results["lengths"][4:], (40, 30, 40, 30)):
+			self.assertAlmostEqual(length, expected, places=9)
+		self.assertEqual(results["extrema"][:4], [[], [], [], []])
+		for curve, divided in zip(results["curves"], results["divided"]):
+			self.assertEqual(divided, [tuple(map(float, point)) for point in divideCurve(curve[0], curve[1], curve[2], curve[3], 0.25)])
+		self.assertEqual([points[0] for points in results["points"]], [curve[0] for curve in results["curves"]])
+		self.assertEqual([points[2] for points in results["points"]], [curve[3] for curve in results["curves"]])
+		# the top of an arch is inside the curve
+		extrema = curveExtrema([((0, 0), (10, 20), (30, 20), (40, 0))])
+		self.assertEqual(extrema, [[0.5]])
+		self.assertEqual(tuple(map(float, curveBounds([((0, 0), (10, 20), (30, 20), (40, 0))])[0])), (0, 0, 40, 15))
+
+	def test_geometryWithoutNumPy(self):
+		if GlyphsHeadless.geometry.numpy is None:
+			self.skipTest("NumPy is not installed")
+		results = self.geometryResults()
+		numpy = GlyphsHeadless.geometry.numpy
+		GlyphsHeadless.geometry.numpy = None
+		try:
+			plainResults = self.geometryResults()
+		finally:
+			GlyphsHeadless.geometry.numpy = numpy
+		for key, values in results.items():
+			self.assertEqual(len(plainResults[key]), len(values), key)
+			for value, plainValue in zip(values, plainResults[key]):
+				if key == "lengths":
+					self.assertAlmostEqual(value, plainValue, places=9)
+				else:
+					self.assertEqual(len(value), len(plainValue))
+					for item, plainItem in zip(value, plainValue):
+						numbers = item if isinstance(item, tuple) else (item,)
+						plainNumbers = plainItem if isinstance(plainItem, tuple) else (plainItem,)
+						for number, plainNumber in zip(numbers, plainNumbers):
+							self.assertAlmostEqual(number, plainNumber, places=9, msg=key)
+
+
+sys.argv = ["GlyphsHeadlessTests"]
+
+if __name__ == '__main__':
+	unittest.main()